@@ -0,0 +1,47 @@
+import json
+
+import entity_cache
+from generic_handler import GenericHandler
+from google.appengine.api import memcache
+from google.appengine.api import users
+from handler_utils import CheckUserLoggedInAndMaybeReturnStatus
+from handler_utils import SetErrorStatus
+
+
+class CacheStatsHandler(GenericHandler):
+  ''' Handles requests to /api/cachestats '''
+
+  def get(self):
+    ''' Reports the hit and miss counters of the entity cache for every
+    cached kind, along with the counters of the application's whole memcache.
+
+    See api for request and response documentation.
+    '''
+    user = users.get_current_user()
+    if not CheckUserLoggedInAndMaybeReturnStatus(self.response, user):
+      return
+    if not users.is_current_user_admin():
+      SetErrorStatus(self.response, 403, "Forbidden User",
+                     "Only administrators can see cache statistics")
+      return
+
+    kinds = {}
+    for kind, counters in entity_cache.Stats().items():
+      kinds[kind] = self._CountersDict(counters["hits"], counters["misses"])
+    stats = memcache.get_stats() or {}
+    app_stats = self._CountersDict(stats.get('hits', 0),
+                                   stats.get('misses', 0))
+    app_stats.update({
+        "items": stats.get('items', 0),
+        "bytes": stats.get('bytes', 0),
+        "oldest_item_age": stats.get('oldest_item_age', 0)})
+    self.response.headers['Content-Type'] = 'application/json'
+    self.response.set_status(200)
+    self.response.out.write(json.dumps({"kinds": kinds,
+                                        "memcache": app_stats}, indent=2))
+
+  def _CountersDict(self, hits, misses):
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": float(hits) / (hits + misses) if hits + misses else None}
@@ -0,0 +1,44 @@
+import json
+
+from generic_handler import GenericHandler
+from google.appengine.api import users
+from handler_utils import CheckUserLoggedInAndMaybeReturnStatus
+from handler_utils import is_int
+from handler_utils import SetErrorStatus
+from movements import Movement
+
+
+class ConfigurationHandler(GenericHandler):
+  ''' Handles requests to /api/tournaments/configurations '''
+
+  def get(self):
+    ''' Lists the board configurations a tournament can be created with.
+
+    See api for request and response documentation.
+    '''
+    user = users.get_current_user()
+    if not CheckUserLoggedInAndMaybeReturnStatus(self.response, user):
+      return
+
+    no_pairs = self.request.get("no_pairs")
+    if not is_int(no_pairs) or int(no_pairs) < 2:
+      SetErrorStatus(self.response, 400, "Invalid Request",
+                     "no_pairs must be an integer greater than 1")
+      return
+    no_boards = self.request.get("no_boards")
+    if no_boards and (not is_int(no_boards) or int(no_boards) < 1):
+      SetErrorStatus(self.response, 400, "Invalid Request",
+                     "no_boards must be a positive integer")
+      return
+
+    no_boards = int(no_boards) if no_boards else None
+    configurations = Movement.FeasibleConfigurations(int(no_pairs), no_boards)
+    best = None
+    if configurations and (no_boards is None or
+                           configurations[0].no_boards == no_boards):
+      best = configurations.pop(0)._asdict()
+    self.response.headers['Content-Type'] = 'application/json'
+    self.response.set_status(200)
+    self.response.out.write(json.dumps({
+        "best": best,
+        "alternatives": [c._asdict() for c in configurations]}, indent=2))
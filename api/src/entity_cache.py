@@ -0,0 +1,124 @@
+''' Memcache read-through cache for the entities read on nearly every request.
+
+Tournaments, their lock statuses and player pairs are read by key on almost
+every call, so models whose kinds derive from CachedModel are read through
+memcache here instead of through ndb's own memcache, and every put or delete
+of one of them drops its cached copy. Hits and misses are counted per kind.
+
+A miss locks its cache entry before reading Datastore and only fills it if
+nothing touched the entry in the meantime, the same way ndb does, so a write
+that races with a read can never leave a stale copy behind.
+'''
+
+from google.appengine.api import memcache
+from google.appengine.ext import ndb
+
+# Seconds a cached entity is kept.
+TIMEOUT = 3600
+# Seconds a miss keeps its entry locked while it reads Datastore.
+_LOCK_TIME = 32
+_LOCKED = 0
+_NAMESPACE = "entity_cache"
+_STATS_NAMESPACE = "entity_cache_stats"
+
+
+class CachedModel(ndb.Model):
+  ''' Base for models read through this cache. Invalidates the cached copy of
+  an entity on every put and delete, once the write is committed.
+  '''
+  # Cached here instead, so ndb must not keep a second copy.
+  _use_memcache = False
+
+  def _post_put_hook(self, future):
+    Invalidate(self.key)
+
+  @classmethod
+  def _post_delete_hook(cls, key, future):
+    Invalidate(key)
+
+
+def CachedKinds():
+  ''' Returns the sorted kinds of all models read through this cache. '''
+  return sorted(kind for kind, model in ndb.Model._kind_map.items()
+                if issubclass(model, CachedModel) and model is not CachedModel)
+
+
+def GetMulti(keys):
+  ''' Fetches the entities of keys in a single batch, reading the keys of
+  cached kinds through memcache. Other keys are fetched as with ndb.get_multi.
+
+  Returns:
+    List of entities in the order of keys, None for keys that do not exist.
+  '''
+  return [future.get_result() for future in GetMultiAsync(keys)]
+
+
+def GetMultiAsync(keys):
+  ''' Same as GetMulti, but returns a list of Futures of the entities. ndb
+  batches their memcache and Datastore calls.
+  '''
+  return [GetAsync(key) for key in keys]
+
+
+@ndb.tasklet
+def GetAsync(key):
+  ''' Returns a Future of the entity of key, read through memcache if its kind
+  is cached. Transactions always read Datastore.
+  '''
+  if not _IsCached(key) or ndb.in_transaction():
+    entity = yield key.get_async()
+    raise ndb.Return(entity)
+  ctx = ndb.get_context()
+  cache_key = key.urlsafe()
+  cached = yield ctx.memcache_get(cache_key, namespace=_NAMESPACE)
+  if cached is not None and cached != _LOCKED:
+    yield _Count(ctx, key.kind(), "hits")
+    raise ndb.Return(cached)
+  if cached is None:
+    yield ctx.memcache_add(cache_key, _LOCKED, time=_LOCK_TIME,
+                           namespace=_NAMESPACE)
+    yield ctx.memcache_gets(cache_key, namespace=_NAMESPACE)
+  entity, _ = yield key.get_async(), _Count(ctx, key.kind(), "misses")
+  if cached is None and entity is not None:
+    # Fails if a write invalidated the entry since it was locked.
+    yield ctx.memcache_cas(cache_key, entity, time=TIMEOUT,
+                           namespace=_NAMESPACE)
+  raise ndb.Return(entity)
+
+
+def Invalidate(key):
+  ''' Drops the cached copy of the entity of key. Within a transaction, this
+  happens once the transaction commits.
+  '''
+  if ndb.in_transaction():
+    ndb.get_context().call_on_commit(lambda: Invalidate(key))
+    return
+  memcache.delete(key.urlsafe(), namespace=_NAMESPACE)
+
+
+def Stats():
+  ''' Returns a dict from every cached kind to a dict with its "hits" and
+  "misses" since the counters were last evicted.
+  '''
+  kinds = CachedKinds()
+  counters = memcache.get_multi(
+      [_CounterKey(kind, counter) for kind in kinds
+       for counter in ("hits", "misses")],
+      namespace=_STATS_NAMESPACE)
+  return dict((kind, {"hits": counters.get(_CounterKey(kind, "hits"), 0),
+                      "misses": counters.get(_CounterKey(kind, "misses"), 0)})
+              for kind in kinds)
+
+
+def _IsCached(key):
+  model = ndb.Model._kind_map.get(key.kind())
+  return model is not None and issubclass(model, CachedModel)
+
+
+def _Count(ctx, kind, counter):
+  return ctx.memcache_incr(_CounterKey(kind, counter), initial_value=0,
+                           namespace=_STATS_NAMESPACE)
+
+
+def _CounterKey(kind, counter):
+  return "{}:{}".format(kind, counter)
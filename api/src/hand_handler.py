@@ -5,20 +5,27 @@ from generic_handler import GenericHandler
 from google.appengine.api import users
 from google.appengine.ext import ndb
 from handler_utils import CheckUserOwnsTournamentAndMaybeReturnStatus
+from handler_utils import CheckValidHandParamsAndMaybeSetStatus
 from handler_utils import CheckValidHandPlayersCombinationAndMaybeSetStatus
+from handler_utils import CheckValidMatchupForMovementAndMaybeSetStatus
 from handler_utils import GetPairIdFromRequest
+from handler_utils import GetTourneyMovementAndMaybeSetStatus
 from handler_utils import GetTourneyWithIdAndMaybeReturnStatus
 from handler_utils import SetErrorStatus
 from handler_utils import ValidateHandResultMaybeSetStatus
 from handler_utils import AVG_VALUES
 from models import HandScore
-from models import PlayerPair
+from models import PairCode
 from models import Tournament
 from python.calculator import HandResult
 from python.calculator import Calls
 from python.calculator import InvalidCallError
 from python.calculator import InvalidScoreError
 
+# Most hands a single request to HandListHandler may submit. All of them are
+# written in one transaction.
+MAX_HANDS_PER_REQUEST = 100
+
 
 class HandHandler(GenericHandler):
   ''' Class to handle requests to 
@@ -98,16 +105,37 @@ class HandHandler(GenericHandler):
     if not tourney:
       return      
 
+    if not CheckValidHandParamsAndMaybeSetStatus(self.response, tourney,
+                                                 board_no, ns_pair, ew_pair):
+      return
+
+    user = users.get_current_user()
+    is_director = bool(user and tourney.owner_id == user.user_id())
+    pair_no = None
+    hand_score = None
+    if not is_director:
+      # Fetch everything the access and lock checks need in one batch right
+      # after the tournament, before the movement is built. The lock status
+      # came with the tournament.
+      pair_no_future = PairCode.ResolveInTourneyAsync(
+          tourney, GetPairIdFromRequest(self.request))
+      hand_score = HandScore.CreateKey(
+          tourney, int(board_no), int(ns_pair), int(ew_pair)).get()
+      pair_no = pair_no_future.get_result()
+      if hand_score and hand_score.deleted:
+        hand_score = None
+
     if not CheckValidHandPlayersCombinationAndMaybeSetStatus(
         self.response, tourney, board_no, ns_pair, ew_pair):
       return
 
     user_has_access, change_pair_no = self._CheckUserHasAccessMaybeSetStatus(
-        tourney, int(ns_pair), int(ew_pair))
+        is_director, pair_no, int(ns_pair), int(ew_pair))
     if not user_has_access:
       return
 
-    if not self._CanPutHandAndMaybeSetResponse(tourney, board_no, ns_pair, ew_pair):
+    if not self._CanPutHandAndMaybeSetResponse(tourney, is_director,
+                                               hand_score):
       return
 
     request_dict = self._ParsePutRequestInfoAndMaybeSetStatus()
@@ -124,8 +152,15 @@ class HandHandler(GenericHandler):
                                             ns_score, ew_score, calls):
       return
 
-    tourney.PutHandScore(int(board_no), int(ns_pair), int(ew_pair), calls,
-                         ns_score, ew_score, notes, change_pair_no)
+    # Another pair may have scored the hand of a lockable tournament since it
+    # was checked above.
+    scored = tourney.PutHandScore(int(board_no), int(ns_pair), int(ew_pair),
+                                  calls, ns_score, ew_score, notes,
+                                  change_pair_no,
+                                  overwrite=is_director or tourney.IsUnlocked())
+    if scored:
+      self._SetAlreadyScoredStatus(scored)
+      return
     self.response.set_status(204)
 
   @ndb.toplevel
@@ -161,45 +196,44 @@ class HandHandler(GenericHandler):
     hand_score.Delete()
     self.response.set_status(204) 
 
-  def _CheckUserHasAccessMaybeSetStatus(self, tourney, ns_pair, ew_pair):
-    ''' Tests if the current user has access to a hand with given players.
+  def _CheckUserHasAccessMaybeSetStatus(self, is_director, pair_no, ns_pair,
+                                        ew_pair):
+    ''' Tests if the current user has access to a hand.
 
     Uses the pair id code, if any, set in the request header to see if the user
-    is in one of the teams playing the hand. Directors always have access.
+    is in one of the teams playing the hand, resolved the same way as for
+    HandListHandler. Directors always have access.
 
     Args:
-      tourney: Tournament. Current tournament.
+      is_director: Boolean. True iff the user owns the tournament.
+      pair_no: Integer. Pair number the pair code in the request identifies
+        in the tournament, as by PairCode.ResolveInTourney. Only used if the
+        user is not the director.
       ns_pair: Integer. Pair number of team playing North/South.
       ew_pair: Integer. Pair number of team playing East/West.
 
     Returns:
       A (Boolean, Integer) pair. First member is True iff the user has access
-      to the hand between ns_pair and ew_pair. Second member is the pair number
-      of the user. Only set if first member is True.
+      to the hand. Second member is the pair number of the user. Only set if
+      first member is True.
     '''
-    user = users.get_current_user()
     error = "Forbidden User"
-    if user and tourney.owner_id == user.user_id():
+    if is_director:
       return (True, 0)
-    pair_id = GetPairIdFromRequest(self.request)
-    if not pair_id:
+    if not GetPairIdFromRequest(self.request):
       SetErrorStatus(self.response, 403, error,
                      "User does not own tournament and is not authenticated " + 
                      "with a pair code to overwrite this hand.")
       return (False, None)
-    player_pairs = PlayerPair.query(
-          ndb.OR(PlayerPair.pair_no == int(ns_pair),
-                 PlayerPair.pair_no == int(ew_pair)),
-          ancestor=tourney.key).fetch()
-    if (not player_pairs) or (pair_id not in [p.id for p in player_pairs]):
+    if pair_no not in (ns_pair, ew_pair):
       SetErrorStatus(self.response, 403, error,
                      "User does not own tournament and is authenticated with " +
                      "the wrong code for involved pairs")
       return (False, None)
-    return (True, next(p.pair_no for p in player_pairs if p.id == pair_id))
+    return (True, pair_no)
 
 
-  def _CanPutHandAndMaybeSetResponse(self, tourney, board_no, ns_pair, ew_pair):
+  def _CanPutHandAndMaybeSetResponse(self, tourney, is_director, hand_score):
     ''' Tests whether the tournament lock stats allows this user to write a hand.
   
     The owner is always allowed to write a hand. Pair code players can write a hand
@@ -208,23 +242,28 @@ class HandHandler(GenericHandler):
   
     Args:
       tourney: Tournament. Current tournament. 
-      board_no: Integer. Hand number.
-      ns_pair: Integer. Pair number of team playing North/South.  
-      ew_pair: Integer. Pair number of team playing East/West.
+      is_director: Boolean. True iff the user owns the tournament.
+      hand_score: HandScore currently written for the hand, or None if there
+        is none.
 
     Returns:
       Boolean. True iff the put call is allowed.
     '''
-    user = users.get_current_user()
-    if (user and tourney.owner_id == user.user_id()) or tourney.IsUnlocked():
+    if is_director or tourney.IsUnlocked():
       return True
     if tourney.IsLocked():
       SetErrorStatus(self.response, 405, "Forbidden by Tournament Status",
                      "This tournament is locked. No hands can be edited by non-directors")
       return False
-    hand_score = HandScore.GetByHandParams(tourney, board_no, ns_pair, ew_pair)
     if not hand_score:
-	  return True
+      return True
+    self._SetAlreadyScoredStatus(hand_score)
+    return False
+
+  def _SetAlreadyScoredStatus(self, hand_score):
+    ''' Sets response to status 405 with the score of hand_score, the hand a
+    pair code player tried to overwrite in a lockable tournament.
+    '''
     self.response.headers['Content-Type'] = 'application/json'
     response = {
         'calls' : hand_score.calls_dict(),
@@ -234,7 +273,6 @@ class HandHandler(GenericHandler):
     }
     self.response.set_status(405)
     self.response.out.write(json.dumps(response, indent=2))
-    return False
 
 
   def _ParsePutRequestInfoAndMaybeSetStatus(self):
@@ -253,38 +291,247 @@ class HandHandler(GenericHandler):
       SetErrorStatus(self.response, 500, "Invalid Input",
                      "Unable to parse request body as JSON object")
       return None
-    ns_score = request_dict.get('ns_score')
-    ew_score = request_dict.get('ew_score')
-    if not isinstance(ns_score, int):
-      if not isinstance(ns_score, basestring):
-        SetErrorStatus(self.response, 400, "Invalid Input", 
-                       "ns_score must be int or string, was " + 
-                       type(ns_score).__name__)
-        return None
-      if ns_score.strip().upper() not in AVG_VALUES:
-        SetErrorStatus(self.response, 400, "Invalid Input",
-                       "ns_score must be an integer or avg, was " + 
-                       str(ns_score))
-        return None
-      if isinstance(ew_score, int):
-        SetErrorStatus(self.response, 400, "Invalid Input",
-                       "Cannot have one team with an avg score and another "
-                       "with a real Tichu value ")
-        return None
-    if not isinstance(ew_score, int):
-      if not isinstance(ew_score, basestring):
-        SetErrorStatus(self.response, 400, "Invalid Input", 
-                       "ew_score must be int or string, was " + 
-                       type(ew_score).__name__)
-        return None
-      if ew_score.strip().upper() not in AVG_VALUES:
-        SetErrorStatus(self.response, 400, "Invalid Input",
-                       "ew_score must be an integer or avg, was " + 
-                       str(ew_score))
-        return None
-      if isinstance(ns_score, int):
-        SetErrorStatus(self.response, 400, "Invalid Input",
-                       "Cannot have one team with an avg score and another "
-                       "with a real Tichu value")
-        return None
+    if not CheckScoreTypesAndMaybeSetStatus(self.response,
+                                            request_dict.get('ns_score'),
+                                            request_dict.get('ew_score')):
+      return None
     return request_dict
+
+
+
+class HandListHandler(GenericHandler):
+  ''' Class to handle requests to /api/tournaments/:id/hands '''
+
+  @ndb.toplevel
+  def put(self, id):
+    ''' Add several scored hands, e.g. all hands of a round or of a table, to
+    the tournament with this id in one request.
+
+    Every hand is validated on its own against the tournament's movement.
+    Valid hands are written together; invalid ones are reported in the
+    response and do not stop the others from being written.
+
+    Args:
+      id: String. Tournament id.
+
+    See api for request and response documentation.
+    '''
+    tourney = GetTourneyWithIdAndMaybeReturnStatus(self.response, id)
+    if not tourney:
+      return
+
+    hand_list = self._ParsePutRequestInfoAndMaybeSetStatus()
+    if hand_list is None:
+      return
+
+    change_pair_no = self._GetChangePairNoAndMaybeSetStatus(tourney)
+    if change_pair_no is None:
+      return
+
+    movement = GetTourneyMovementAndMaybeSetStatus(self.response, tourney)
+    if not movement:
+      return
+
+    results = []
+    valid_hands = []
+    seen = set()
+    for hand in hand_list:
+      hand_response = webapp2.Response()
+      if self._CheckHandAndMaybeSetStatus(hand_response, tourney, movement,
+                                          hand, change_pair_no, seen):
+        valid_hands.append((len(results), hand))
+      results.append(self._HandResult(hand, hand_response))
+
+    if valid_hands:
+      # A lockable tournament lets players score a hand only once. Checked in
+      # the transaction that writes the hands, so that concurrent requests
+      # cannot both score the same hand.
+      existing = tourney.PutHandScores(
+          [(h["board_no"], h["ns_pair"], h["ew_pair"], h.get("calls") or {},
+            h.get("ns_score"), h.get("ew_score"), h.get("notes"))
+           for _, h in valid_hands], change_pair_no,
+          overwrite=not change_pair_no or tourney.IsUnlocked())
+      for (i, hand), hand_score in zip(valid_hands, existing):
+        if hand_score:
+          results[i].update({
+              "status": 405,
+              "error": "Forbidden by Tournament Status",
+              "detail": "This hand has already been scored",
+              "score": {
+                  'calls' : hand_score.calls_dict(),
+                  'ns_score' : hand_score.get_ns_score(),
+                  'ew_score' : hand_score.get_ew_score(),
+                  'notes' : hand_score.notes,
+              }})
+
+    self.response.headers['Content-Type'] = 'application/json'
+    self.response.set_status(200)
+    self.response.out.write(json.dumps({"hands": results}, indent=2))
+
+  def _ParsePutRequestInfoAndMaybeSetStatus(self):
+    ''' Parse the body of the request.
+
+    Returns:
+      The list of hands in the request, or None if the body is not a JSON
+      object with a list of at most MAX_HANDS_PER_REQUEST hands.
+    '''
+    try:
+      request_dict = json.loads(self.request.body)
+    except ValueError:
+      SetErrorStatus(self.response, 500, "Invalid Input",
+                     "Unable to parse request body as JSON object")
+      return None
+    hand_list = (request_dict.get("hands")
+                 if isinstance(request_dict, dict) else None)
+    if not isinstance(hand_list, list):
+      SetErrorStatus(self.response, 400, "Invalid Input",
+                     "Request must have a list of hands")
+      return None
+    if len(hand_list) > MAX_HANDS_PER_REQUEST:
+      SetErrorStatus(self.response, 400, "Invalid Input",
+                     "At most {} hands can be submitted at once".format(
+                         MAX_HANDS_PER_REQUEST))
+      return None
+    return hand_list
+
+  def _GetChangePairNoAndMaybeSetStatus(self, tourney):
+    ''' Finds who is submitting hands to tourney.
+
+    Returns:
+      0 if the user is the director, the pair number of the pair code in the
+      request header if the tournament allows players to score hands, or None
+      if the user may not score any hand.
+    '''
+    user = users.get_current_user()
+    if user and tourney.owner_id == user.user_id():
+      return 0
+    pair_no = PairCode.ResolveInTourney(tourney,
+                                        GetPairIdFromRequest(self.request))
+    if not pair_no:
+      SetErrorStatus(self.response, 403, "Forbidden User",
+                     "User does not own tournament and is not authenticated " +
+                     "with a pair code of this tournament.")
+      return None
+    if tourney.IsLocked():
+      SetErrorStatus(self.response, 405, "Forbidden by Tournament Status",
+                     "This tournament is locked. No hands can be edited by non-directors")
+      return None
+    return pair_no
+
+  def _CheckHandAndMaybeSetStatus(self, response, tourney, movement, hand,
+                                  change_pair_no, seen):
+    ''' Test if a single hand of the request can be written.
+
+    Args:
+      response: Response for this hand only.
+      tourney: Tournament. Current tournament.
+      movement: Movement of tourney.
+      hand: The hand as sent in the request.
+      change_pair_no: Integer. Pair number of the user. 0 if director.
+      seen: Set of (board_no, ns_pair, ew_pair) tuples of the valid hands
+        earlier in the request. Updated with this hand if it is valid.
+
+    Returns:
+      True iff the hand is valid and the user may write it.
+    '''
+    if not isinstance(hand, dict):
+      SetErrorStatus(response, 400, "Invalid Input",
+                     "Every hand must be a JSON object")
+      return False
+    for field in ("board_no", "ns_pair", "ew_pair"):
+      value = hand.get(field)
+      if not isinstance(value, int) or isinstance(value, bool):
+        SetErrorStatus(response, 400, "Invalid Input",
+                       "{} must be an integer".format(field))
+        return False
+    board_no, ns_pair, ew_pair = (hand["board_no"], hand["ns_pair"],
+                                  hand["ew_pair"])
+    if not CheckValidHandParamsAndMaybeSetStatus(response, tourney, board_no,
+                                                 ns_pair, ew_pair):
+      return False
+    if not CheckValidMatchupForMovementAndMaybeSetStatus(response, movement,
+        board_no, ns_pair, ew_pair):
+      return False
+    if change_pair_no and change_pair_no not in (ns_pair, ew_pair):
+      SetErrorStatus(response, 403, "Forbidden User",
+                     "User is authenticated with the code of a pair that " +
+                     "does not play this hand")
+      return False
+    ns_score = hand.get("ns_score")
+    ew_score = hand.get("ew_score")
+    if not CheckScoreTypesAndMaybeSetStatus(response, ns_score, ew_score):
+      return False
+    if not ValidateHandResultMaybeSetStatus(response, board_no, ns_pair,
+                                            ew_pair, ns_score, ew_score,
+                                            hand.get("calls") or {}):
+      return False
+    if (board_no, ns_pair, ew_pair) in seen:
+      SetErrorStatus(response, 400, "Invalid Input",
+                     "Hand appears more than once in the request")
+      return False
+    seen.add((board_no, ns_pair, ew_pair))
+    return True
+
+  def _HandResult(self, hand, hand_response):
+    ''' Returns the entry of the response describing the outcome of hand,
+    whose checks wrote to hand_response.
+    '''
+    result = {}
+    if isinstance(hand, dict):
+      for field in ("board_no", "ns_pair", "ew_pair"):
+        result[field] = hand.get(field)
+    if hand_response.status_int >= 400:
+      result["status"] = hand_response.status_int
+      result.update(json.loads(hand_response.body))
+    else:
+      result["status"] = 204
+    return result
+
+def CheckScoreTypesAndMaybeSetStatus(response, ns_score, ew_score):
+  ''' Test if the scores of a hand have the right types.
+
+  Args:
+    response: Response.
+    ns_score: Score of the North/South team as sent in the request.
+    ew_score: Score of the East/West team as sent in the request.
+
+  Side effects:
+    Sets response to status 400 with a detailed error if either score is
+      neither an integer nor an avg value, or only one of them is an avg value.
+
+  Returns:
+    True iff both scores are integers or both are avg values.
+  '''
+  if not isinstance(ns_score, int):
+    if not isinstance(ns_score, basestring):
+      SetErrorStatus(response, 400, "Invalid Input", 
+                     "ns_score must be int or string, was " + 
+                     type(ns_score).__name__)
+      return False
+    if ns_score.strip().upper() not in AVG_VALUES:
+      SetErrorStatus(response, 400, "Invalid Input",
+                     "ns_score must be an integer or avg, was " + 
+                     str(ns_score))
+      return False
+    if isinstance(ew_score, int):
+      SetErrorStatus(response, 400, "Invalid Input",
+                     "Cannot have one team with an avg score and another "
+                     "with a real Tichu value ")
+      return False
+  if not isinstance(ew_score, int):
+    if not isinstance(ew_score, basestring):
+      SetErrorStatus(response, 400, "Invalid Input", 
+                     "ew_score must be int or string, was " + 
+                     type(ew_score).__name__)
+      return False
+    if ew_score.strip().upper() not in AVG_VALUES:
+      SetErrorStatus(response, 400, "Invalid Input",
+                     "ew_score must be an integer or avg, was " + 
+                     str(ew_score))
+      return False
+    if isinstance(ns_score, int):
+      SetErrorStatus(response, 400, "Invalid Input",
+                     "Cannot have one team with an avg score and another "
+                     "with a real Tichu value")
+      return False
+  return True
@@ -0,0 +1,84 @@
+''' Splits the preparation of hands evenly between the pairs of a movement.
+
+A pair can prepare any hand it does not play. Hands are assigned one at a time,
+each along an alternating path to the least loaded pair it can reach: the new
+hand goes to a pair that could prepare it, that pair hands one of its hands on
+to another pair that could prepare that one, and so on. This is the optimal
+semi-matching algorithm of Harvey, Ladner, Lovasz and Tamir, so the result
+minimizes the most hands any pair prepares and spreads the rest as evenly as
+the movement allows.
+'''
+
+import collections
+
+
+def UnplayedHands(played_hands):
+  ''' Finds the hands every pair does not play.
+
+  Args:
+    played_hands: Dict from pair number to an iterable of the hands it plays.
+
+  Returns:
+    Tuple (total boards, dict from pair number to the sorted list of hands up
+    to total boards that the pair does not play). Pairs that play every hand
+    are left out.
+  '''
+  total_boards = max([max(hands) for hands in played_hands.values() if hands]
+                     or [0])
+  unplayed_hands = {}
+  for pair_no, hands in played_hands.items():
+    hands = set(hands)
+    unplayed = [hand for hand in xrange(1, total_boards + 1)
+                if hand not in hands]
+    if unplayed:
+      unplayed_hands[pair_no] = unplayed
+  return total_boards, unplayed_hands
+
+
+def BalancedHandPrep(unplayed_hands):
+  ''' Assigns every hand that some pair does not play to one such pair.
+
+  Args:
+    unplayed_hands: Dict from pair number to the list of hands it does not
+      play, as returned by UnplayedHands.
+
+  Returns:
+    Dict from pair number to the sorted list of hands it prepares. Pairs that
+    prepare no hands are left out.
+  '''
+  candidates = {}
+  for pair_no in sorted(unplayed_hands):
+    for hand in unplayed_hands[pair_no]:
+      candidates.setdefault(hand, []).append(pair_no)
+
+  owner = {}
+  prepared = collections.defaultdict(list)
+  for hand in sorted(candidates):
+    # Breadth first search over alternating paths, remembering through which
+    # hand every pair was reached.
+    reached_by = {}
+    queue = collections.deque([hand])
+    while queue:
+      next_hand = queue.popleft()
+      for pair_no in candidates[next_hand]:
+        if pair_no in reached_by:
+          continue
+        reached_by[pair_no] = next_hand
+        queue.extend(prepared[pair_no])
+    target = min(reached_by, key=lambda p: (len(prepared[p]), p))
+
+    # Shift every hand on the path one pair along, ending at target.
+    pair_no = target
+    while True:
+      moved_hand = reached_by[pair_no]
+      previous_owner = owner.get(moved_hand)
+      if previous_owner is not None:
+        prepared[previous_owner].remove(moved_hand)
+      prepared[pair_no].append(moved_hand)
+      owner[moved_hand] = pair_no
+      if moved_hand == hand:
+        break
+      pair_no = previous_owner
+
+  return dict((pair_no, sorted(hands)) for pair_no, hands in prepared.items()
+              if hands)
@@ -3,8 +3,8 @@ import json
 
 from generic_handler import GenericHandler
 from google.appengine.api import users
-from handler_utils import BuildMovementAndMaybeSetStatus
 from handler_utils import CheckUserOwnsTournamentAndMaybeReturnStatus
+from handler_utils import GetTourneyMovementAndMaybeSetStatus
 from handler_utils import GetTourneyWithIdAndMaybeReturnStatus
 from models import Tournament
 
@@ -29,9 +29,7 @@ class HandPreparationHandler(GenericHandler):
         users.get_current_user(), tourney):
       return
 
-    movement = BuildMovementAndMaybeSetStatus(
-        self.response, tourney.no_pairs, tourney.no_boards,
-        tourney.legacy_version_id)
+    movement = GetTourneyMovementAndMaybeSetStatus(self.response, tourney)
     if not movement:
       return
 
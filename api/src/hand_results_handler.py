@@ -3,14 +3,13 @@ import json
 
 from generic_handler import GenericHandler
 from google.appengine.api import users
-from google.appengine.ext import ndb
 from handler_utils import CheckUserOwnsTournamentAndMaybeReturnStatus
 from handler_utils import GetPairIdFromRequest
 from handler_utils import GetTourneyWithIdAndMaybeReturnStatus
 from handler_utils import is_int
 from handler_utils import SetErrorStatus
 from models import HandScore
-from models import PlayerPair
+from models import PairCode
 from python.calculator import Calls
 from python.calculator import HandResult
 from python.calculator import Board
@@ -158,15 +157,13 @@ class HandResultsHandler(GenericHandler):
       return (False, None, None)
 
     error = "Forbidden User"
-    pair_id = GetPairIdFromRequest(self.request)
-    player_pairs = PlayerPair._query(ndb.GenericProperty('id') == 
-        pair_id).fetch(1, projection=[PlayerPair.pair_no])
-    if not pair_id or not player_pairs:
+    pair_no = PairCode.ResolveInTourney(tourney,
+                                        GetPairIdFromRequest(self.request))
+    if not pair_no:
       SetErrorStatus(self.response, 403, error,
                      "User does not own tournament and is not authenticated " + 
                      "with a pair code to see the results of this hand.")
       return (False, None, None)
-    pair_no = player_pairs[0].pair_no;
     if not self._PlayerInMatchupList(pair_no, all_matchups):
       SetErrorStatus(self.response, 403, error,
                      "User does not play this hand.")
@@ -3,6 +3,7 @@ import json
 from google.appengine.ext import ndb
 from models import Tournament
 from movements import Movement
+from movements import SwissMovement
 from python.calculator import HandResult
 from python.calculator import Calls
 from python.calculator import InvalidCallError
@@ -18,6 +19,16 @@ def is_int(s):
   except ValueError:
     return False
 
+def is_positive_int(value):
+  ''' True iff value is an integer, but not a boolean, of at least 1. '''
+  return (isinstance(value, int) and not isinstance(value, bool) and
+          value >= 1)
+
+def is_optional_positive_int(value):
+  ''' True iff value is None or an integer, but not a boolean, of at least 1.
+  '''
+  return value is None or is_positive_int(value)
+
 def ValidateHandResultMaybeSetStatus(response, board_no, ns_pair, ew_pair,
                                      ns_score, ew_score, calls):
   ''' Validates the proposed hand results as a real Tichu score.
@@ -73,7 +84,39 @@ def CheckValidHandPlayersCombinationAndMaybeSetStatus(response, tourney,
   Returns:
     True iff the Hand/Player Pairs combination is legal in this tourney.
   '''
-  # First basic sanity checks on inputs.
+  if not CheckValidHandParamsAndMaybeSetStatus(response, tourney, board_no,
+                                               ns_pair, ew_pair):
+    return False
+
+  # Now check if they make sense in this tournament setup.
+  error = "Invalid Hand Parameters"
+  movements = GetTourneyMovementAndMaybeSetStatus(response, tourney)
+  if not movements:
+    SetErrorStatus(response, 400, error, 
+                   ("Tournament config with {} pairs and {} boards is not" +
+                        "valid").format(tourney.no_pairs, tourney.no_boards))
+    return False
+  return CheckValidMatchupForMovementAndMaybeSetStatus(response, movements,
+      int(board_no), int(ns_pair), int(ew_pair))
+
+def CheckValidHandParamsAndMaybeSetStatus(response, tourney, board_no, ns_pair,
+                                          ew_pair):
+  ''' Test if the input board number and player pairs are within the bounds of
+  this tourney, without looking at its movement.
+
+  Args:
+    response: Response.
+    tourney: Tournament. Existing tournament that is used to check bounds.
+    board_no: String or Integer. Hand number.
+    ns_pair: String or Integer. Pair number of team playing North/South.
+    ew_pair: String or Integer. Pair number of team playing East/West.
+
+  Side effects:
+    Sets response to status 404 with a detailed error if the inputs are invalid.
+
+  Returns:
+    True iff the board and pair numbers are valid in this tourney.
+  '''
   error = "Invalid Hand Parameters"
   if (not is_int(board_no)) or int(board_no) < 1 or int(board_no) > tourney.no_boards:
     SetErrorStatus(response, 404, error,
@@ -90,27 +133,21 @@ def CheckValidHandPlayersCombinationAndMaybeSetStatus(response, tourney,
   elif ew_pair == ns_pair:
     SetErrorStatus(response, 404, error, "NS and EW pairs are the same")
     return False
-
-  # Now check if they make sense in this tournament setup.
-  movements = BuildMovementAndMaybeSetStatus(response, tourney.no_pairs,
-                                             tourney.no_boards,
-                                             tourney.legacy_version_id)
-  if not movements:
-    SetErrorStatus(response, 400, error, 
-                   ("Tournament config with {} pairs and {} boards is not" +
-                        "valid").format(tourney.no_pairs, tourney.no_boards))
-    return False
-  return CheckValidMatchupForMovementAndMaybeSetStatus(response, movements,
-      int(board_no), int(ns_pair), int(ew_pair))
+  return True
 
 def BuildMovementAndMaybeSetStatus(response, no_pairs, no_boards,
-                                   legacy_version_id=None):
+                                   legacy_version_id=None, no_sections=None,
+                                   swiss_hands_per_round=None):
   ''' Build a unique valid Movement for this tourney.
    
   Args:
     response: Response.
     no_pairs: Integer. Number of pairs in the tournament.
     no_boards: Integer. Number of hands in the tournament.
+    no_sections: Integer. Number of sections the pairs are split into. None
+      for a tournament without sections.
+    swiss_hands_per_round: Integer. Number of hands per round of a Swiss
+      tournament. None for a tournament with a fixed movement.
 
   Side effects:
     Sets response to status 400 with a detailed error if configuration is 
@@ -118,21 +155,62 @@ def BuildMovementAndMaybeSetStatus(response, no_pairs, no_boards,
 
   Returns:
     A valid movement if it is feasible, or None if no such movement exists
-    for the configuration of boards and pairs in tourney.
+    for the configuration of boards and pairs in tourney. The movement of a
+    Swiss tournament has no rounds paired.
   '''
+  if swiss_hands_per_round:
+    if no_sections and no_sections > 1:
+      SetErrorStatus(response, 400, "Invalid Tournament Config",
+                     "Swiss tournaments cannot be split into sections")
+      return None
+    try:
+      return SwissMovement(no_pairs, no_boards, swiss_hands_per_round, [])
+    except ValueError as e:
+      SetErrorStatus(response, 400, "Invalid Tournament Config", str(e))
+      return None
+
   # Check if a valid movement exists for this pair/board combination.
-  no_hands_per_round, no_rounds = Movement.NumBoardsPerRoundFromTotal(
-      no_pairs, no_boards)
   try:
-    movements = Movement.CreateMovement(no_pairs, no_hands_per_round,
-                                        no_rounds, legacy_version_id)
+    movements = Movement.CreateSectionedMovement(no_pairs, no_sections,
+                                                 no_boards, legacy_version_id)
   except ValueError:
+    if no_sections and no_sections > 1:
+      SetErrorStatus(response, 400, "Invalid Tournament Config",
+                     ("No valid configuration {} pairs in {} sections and " +
+                      "{} boards").format(no_pairs, no_sections, no_boards))
+      return None
+    closest = sorted(set(c.no_boards for c in
+        Movement.FeasibleConfigurations(no_pairs, no_boards)[:3]))
     SetErrorStatus(response, 400, "Invalid Tournament Config",
-                   "No valid configuration {} pairs and {} boards".format(
-                       no_pairs, no_boards))
+                   ("No valid configuration {} pairs and {} boards. " +
+                    "Closest valid numbers of boards: {}").format(
+                       no_pairs, no_boards,
+                       ", ".join(str(b) for b in closest) or "none"))
     return None
   return movements
 
+def GetTourneyMovementAndMaybeSetStatus(response, tourney):
+  ''' Build the Movement of an existing tourney. For a Swiss tournament this
+  is the movement of the rounds paired so far.
+
+  Side effects:
+    Sets response to status 400 with a detailed error if the configuration of
+      tourney is invalid.
+
+  Returns:
+    The movement, or None if tourney has no valid movement.
+  '''
+  if not tourney.swiss_hands_per_round:
+    return BuildMovementAndMaybeSetStatus(response, tourney.no_pairs,
+                                          tourney.no_boards,
+                                          tourney.legacy_version_id,
+                                          tourney.no_sections)
+  try:
+    return tourney.GetMovement()
+  except ValueError as e:
+    SetErrorStatus(response, 400, "Invalid Tournament Config", str(e))
+    return None
+
 def CheckValidMatchupForMovementAndMaybeSetStatus(response, movement, board_no,
                                                   ns_pair, ew_pair):
   ''' Test if the ns_pair plays ew_pair for board_no in this movements.
@@ -154,22 +232,10 @@ def CheckValidMatchupForMovementAndMaybeSetStatus(response, movement, board_no,
   error = "Invalid Hand-Players Combination"
   detail = ("NS pair {} and EW pairs {} do not play board {} against each " + 
            "other in this tournament format").format(ns_pair, ew_pair, board_no)
-  for round in movement.GetMovement(ns_pair):
-    if not round.opponent:
-      continue
-    if round.opponent != ew_pair:
-      continue
-    if not round.is_north:
-      SetErrorStatus(response, 400, error, detail)
-      return False
-    if not board_no in round.hands:
-      SetErrorStatus(response, 400, error, detail)
-      return False
-    return True
-
-  # There is no round where ns_pair plays ew_pair.
-  SetErrorStatus(response, 400, error, detail)
-  return False
+  if not movement.GetRoundForMatchup(board_no, ns_pair, ew_pair):
+    SetErrorStatus(response, 400, error, detail)
+    return False
+  return True
 
 def CheckUserLoggedInAndMaybeReturnStatus(response, user):
   ''' Test if the user is logged in.
@@ -231,7 +297,7 @@ def GetTourneyWithIdAndMaybeReturnStatus(response, id):
   if not is_int(id):
     TourneyDoesNotExistStatus(response, id)
     return None
-  tourney = Tournament.get_by_id(int(id));
+  tourney = Tournament.GetWithLockStatus(int(id))
   if not tourney:
     TourneyDoesNotExistStatus(response, id)
     return None
@@ -4,39 +4,53 @@ from api.src.board_handler import PdfBoardHandler
 from auth_handler import AuthHandler
 from auth_handler import LoginHandler
 from auth_handler import LogoutHandler
+from cache_stats_handler import CacheStatsHandler
 from change_log_handler import ChangeLogHandler
+from configuration_handler import ConfigurationHandler
 from hand_handler import HandHandler
+from hand_handler import HandListHandler
 from hand_results_handler import HandResultsHandler
 from hand_preparation_handler import HandPreparationHandler
 from movement_handler import MovementHandler
+from pair_id_handler import PairCodeBackfillHandler
 from pair_id_handler import PairIdHandler
 from pair_id_handler import TourneyPairIdHandler
 from pair_id_handler import TourneyPairIdsHandler
+from projection_handler import ProjectionHandler
 from result_handler import CompleteScoringHandler
 from result_handler import ResultHandler
 from result_handler import XlxsResultHandler
+from swiss_handler import SwissRoundHandler
 from tournament_handler import TourneyHandler
 from tournament_list_handler import TourneyListHandler
+from warmup_handler import WarmupHandler
 from welcome_handler import WelcomeHandler
 from results_email_handler import ResultsEmailHandler
 
 app = webapp2.WSGIApplication([
+    ('/_ah/warmup', WarmupHandler),
     ('/api/checkAuth', AuthHandler),
     ('/api/login', LoginHandler),
     ('/api/logout', LogoutHandler),
+    ('/api/cachestats/?', CacheStatsHandler),
+    ('/api/admin/paircodes/?', PairCodeBackfillHandler),
     ('/api/tournaments/?', TourneyListHandler),
     ('/api/tournaments/pairno/([^/]+)/?', PairIdHandler),
+    ('/api/tournaments/configurations/?', ConfigurationHandler),
     ('/api/tournaments/([^/]+)/?', TourneyHandler),
     ('/api/tournaments/([^/]+)/handStatus/?', CompleteScoringHandler),
     ('/api/tournaments/([^/]+)/handprep/?', HandPreparationHandler),
     ('/api/tournaments/([^/]+)/handresults/([^/]+)/?', HandResultsHandler),
+    ('/api/tournaments/([^/]+)/hands/?', HandListHandler),
     ('/api/tournaments/([^/]+)/hands/([^/]+)/([^/]+)/([^/]+)/?', HandHandler),
     ('/api/tournaments/([^/]+)/hands/changelog/([^/]+)/([^/]+)/([^/]+)/?', ChangeLogHandler),
     ('/api/tournaments/([^/]+)/pairids/([^/]+)/?', TourneyPairIdHandler),
     ('/api/tournaments/([^/]+)/pairids/?', TourneyPairIdsHandler),
     ('/api/tournaments/([^/]+)/movement/([^/]+)/?', MovementHandler),
+    ('/api/tournaments/([^/]+)/swiss/?', SwissRoundHandler),
     ('/api/tournaments/([^/]+)/results/?', ResultHandler),
     ('/api/tournaments/([^/]+)/xlsresults/?', XlxsResultHandler),
+    ('/api/tournaments/([^/]+)/projection/?', ProjectionHandler),
     ('/api/tournaments/([^/]+)/pdfboards/?', PdfBoardHandler),
     ('/api/tournaments/([^/]+)/welcomeemail/?', WelcomeHandler),
     ('/api/tournaments/([^/]+)/resultsemail/?', ResultsEmailHandler),
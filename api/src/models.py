@@ -1,10 +1,17 @@
 import datetime
 import json
 import random
+import entity_cache
+from entity_cache import CachedModel
 from model_utils import ListOfScoredHandsToListOfDicts
 from model_utils import ListOfModelBoardsToListOfBoards
 from movements import Movement
+from movements import SectionName
+from movements import SectionSizes
+from movements import SwissMovement
+from python.standings import Standings
 
+from google.appengine.api import datastore_errors
 from google.appengine.ext import ndb
 
 AVG = 555
@@ -13,6 +20,10 @@ AVGPP = 777
 AVGM = 888
 AVGMM = 999
 
+# Least number of boards generated for a tournament. Tournaments with more
+# boards get one for every board they play.
+MIN_GENERATED_BOARDS = 35
+
 # Lock states. Internal codes for the lock state of the tournament.
 INVALID = -1
 # Teams involved in the hand can edit hand even if it's already been scored.
@@ -23,7 +34,7 @@ LOCKABLE = 1
 # Only administrators can score any hands.
 LOCKED = 2
 
-class Tournament(ndb.Model):
+class Tournament(CachedModel):
   ''' Model for all the information needed to describe a Tournament
      
   Attributes:
@@ -36,14 +47,42 @@ class Tournament(ndb.Model):
                        unset. 
     lock_status: The amount of write access non-administrators have to score 
                  hands. See full descriptions in constant definitions above.
+    no_sections: Number of sections the pairs are split into. Every section
+                 plays its own movement on the same boards. Pairs are
+                 numbered across the whole tournament, section after section.
+                 Unset for a tournament without sections.
+    swiss_hands_per_round: Number of hands played in each round of a Swiss
+                 tournament, whose rounds are paired one at a time from the
+                 standings and stored as SwissRounds. Unset for a tournament
+                 with a fixed movement.
   '''
   owner_id = ndb.StringProperty()
   name = ndb.StringProperty()
   no_boards = ndb.IntegerProperty()
   no_pairs = ndb.IntegerProperty()
   legacy_version_id = ndb.IntegerProperty()
+  no_sections = ndb.IntegerProperty()
+  swiss_hands_per_round = ndb.IntegerProperty()
   lock_status = INVALID
 
+  @classmethod
+  def GetWithLockStatus(cls, id):
+    ''' Fetches the tournament with id together with its lock status in one
+    batched get, so that IsLocked and friends need no further lookup.
+
+    Args:
+      id: Integer. Tournament id.
+
+    Returns:
+      The Tournament, or None if it does not exist.
+    '''
+    tourney_key = ndb.Key(cls, id)
+    tourney, lock_status = entity_cache.GetMulti(
+        [tourney_key, LockStatus.CreateKeyFromTourneyKey(tourney_key)])
+    if tourney and lock_status:
+      tourney.lock_status = lock_status.lock_status
+    return tourney
+
   @classmethod
   def CreateAndPersist(cls, boards, **kwargs):
     '''Creates and persists a new tournament with the given properties and
@@ -58,15 +97,31 @@ class Tournament(ndb.Model):
     '''
     tournament = cls(**kwargs)
     tournament.put()
-    i = 0
-    for board in boards:
-      i+=1
-      board = Board(board_number=i,
-                    board=board.ToJson(),
-                    parent=tournament.key)
-      board.put_async()
+    TournamentStandings(
+        key=TournamentStandings.CreateKey(tournament.key)).put_async()
+    tournament._PutBoardsAsync(boards)
     return tournament
 
+  def PutMissingBoards(self, boards):
+    '''Persists the boards of boards whose number this tournament has no
+      board for yet, e.g. after its number of boards was raised.
+
+    Boards are put asynchronously so a caller of this method should be
+    decorated with @ndb.toplevel.
+
+    Args:
+      boards: List of handgenerator board objects numbered from 1.
+    '''
+    existing = set(b.board_number for b in
+                   Board.query(ancestor=self.key).fetch())
+    self._PutBoardsAsync(b for b in boards if b.id not in existing)
+
+  def _PutBoardsAsync(self, boards):
+    for board in boards:
+      Board(board_number=board.id,
+            board=board.ToJson(),
+            parent=self.key).put_async()
+
   def PutPlayers(self, player_list, old_no_pairs):
     ''' Create a or update PlayerPair Entities corresponding to each player 
     pair in this tournament (1 ... no_pairs).
@@ -98,11 +153,13 @@ class Tournament(ndb.Model):
     # in existing pairs. Otherwise, we delete existing pairs and create new 
     # ones.
     if (self.no_pairs > old_no_pairs):
-      random_ids = self._RandomId(self.no_pairs - old_no_pairs)
+      random_ids = self._ClaimRandomIds(old_no_pairs + 1,
+                                        self.no_pairs - old_no_pairs)
     elif (self.no_pairs < old_no_pairs):
-      ndb.delete_multi_async(
-          [existing_player_futures[i].get_result().key for i in 
-           xrange(self.no_pairs, old_no_pairs)])
+      removed_pairs = [existing_player_futures[i].get_result() for i in
+                       xrange(self.no_pairs, old_no_pairs)]
+      ndb.delete_multi_async([p.key for p in removed_pairs])
+      self.ReleasePairCodesAsync(removed_pairs)
 
     # The create a PlayerPair and put it into Datastore for each possible
     # number. Use reversed to start with new players and give futures more 
@@ -120,19 +177,30 @@ class Tournament(ndb.Model):
       player_pair.key = PlayerPair.CreateKey(self, i)
       player_pair.put_async()
 
+  def ReleasePairCodesAsync(self, player_pairs):
+    ''' Releases the codes of player_pairs, a list of PlayerPairs of this
+    tournament, so they no longer identify these pairs.
+
+    Returns:
+      List of Futures, one per released code.
+    '''
+    return [PairCode.ReleaseAsync(p.id, self.key.id())
+            for p in player_pairs if p and p.id]
+
   def GetAllPlayerPairsAsync(self, no_pairs=None):
     '''Returns a list of futures for the first no_pairs PlayerPairs associated
        with this tournament in pair number order.
     '''
     no_pairs = no_pairs if no_pairs else self.no_pairs
-    return [PlayerPair.CreateKey(self, i + 1).get_async() for i in xrange(no_pairs)]
+    return entity_cache.GetMultiAsync(
+        [PlayerPair.CreateKey(self, i + 1) for i in xrange(no_pairs)])
 
   def PutHandScore(self, hand_no, ns_pair, ew_pair, hand_calls, hand_ns_score,
-                   hand_ew_score, hand_notes, changed_by):
+                   hand_ew_score, hand_notes, changed_by, overwrite=True):
     ''' Create a new HandScore Entity corresponding to this hand and put it 
-        into datastore.
+        into datastore, updating the tournament's standings.
     
-    Everything is put asynchronously so a caller of this method should be 
+    The change log is put asynchronously so a caller of this method should be 
     decorated with @ndb.toplevel.
 
     Args:
@@ -148,27 +216,77 @@ class Tournament(ndb.Model):
          capitalization.
       hand_notes: String. Notes for the hand.
       changed_by: Integer. Pair number of the requestor. 0 if director.
+      overwrite: Boolean. False to leave the hand alone if it has already been
+         scored. Checked in the same transaction as the write.
+
+    Returns:
+      The HandScore already scored for the hand if overwrite is False and the
+      hand was therefore not written, None otherwise.
     '''
-    if not isinstance(hand_ns_score, int):
-      hand_ns_score = self._TransformAvgScoreToInt(hand_ns_score)
-      hand_ew_score = self._TransformAvgScoreToInt(hand_ew_score)
+    return self.PutHandScores([(hand_no, ns_pair, ew_pair, hand_calls,
+                                hand_ns_score, hand_ew_score, hand_notes)],
+                              changed_by, overwrite)[0]
 
-    hand_score = HandScore(calls=json.dumps(hand_calls), notes=hand_notes,
-                           ns_score=hand_ns_score, ew_score=hand_ew_score,
-                           deleted=False)
-    hand_score.key = HandScore.CreateKey(self, hand_no, ns_pair, ew_pair)
-    hand_score.put_async()
-    hand_score.PutChangeLog(changed_by)
+  def PutHandScores(self, hands, changed_by, overwrite=True):
+    ''' Same as PutHandScore, but for several hands at once. All hands and the
+    tournament's standings are written in a single transaction and all change
+    logs in a single batch.
+
+    Args:
+      hands: List of (hand_no, ns_pair, ew_pair, hand_calls, hand_ns_score,
+        hand_ew_score, hand_notes) tuples, as the arguments of PutHandScore.
+      changed_by: Integer. Pair number of the requestor. 0 if director.
+      overwrite: Boolean. False to leave hands that have already been scored
+        alone, as in PutHandScore.
+
+    Returns:
+      List with an entry for every hand in hands: the HandScore already scored
+      for it if it was not written because of overwrite, None otherwise.
+    '''
+    hand_scores = []
+    for (hand_no, ns_pair, ew_pair, hand_calls, hand_ns_score, hand_ew_score,
+         hand_notes) in hands:
+      if not isinstance(hand_ns_score, int):
+        hand_ns_score = self._TransformAvgScoreToInt(hand_ns_score)
+        hand_ew_score = self._TransformAvgScoreToInt(hand_ew_score)
+      hand_score = HandScore(calls=json.dumps(hand_calls), notes=hand_notes,
+                             ns_score=hand_ns_score, ew_score=hand_ew_score,
+                             deleted=False)
+      hand_score.key = HandScore.CreateKey(self, hand_no, ns_pair, ew_pair)
+      hand_scores.append(hand_score)
+    existing = TournamentStandings.PutHandScores(self.key, hand_scores,
+                                                 overwrite=overwrite)
+    ndb.put_multi_async([hand_score.BuildChangeLog(changed_by)
+                         for hand_score, scored in zip(hand_scores, existing)
+                         if not scored])
+    return existing
 
   def GetMovement(self):
     '''Returns a movement associated with this tournament. 
 
     Assumes that this is a valid tournament.
     '''
-    no_hands_per_round, no_rounds = Movement.NumBoardsPerRoundFromTotal(
-      self.no_pairs, self.no_boards)
-    return Movement.CreateMovement(self.no_pairs, no_hands_per_round,
-                                   no_rounds, self.legacy_version_id)
+    if self.swiss_hands_per_round:
+      return SwissMovement(self.no_pairs, self.no_boards,
+                           self.swiss_hands_per_round,
+                           [r.Pairings() for r in SwissRound.GetAll(self)])
+    return Movement.CreateSectionedMovement(self.no_pairs, self.no_sections,
+                                            self.no_boards,
+                                            self.legacy_version_id)
+
+  def GetSections(self):
+    '''Returns a list of (section name, list of pair numbers) tuples of every
+    section of this tournament in section order. A tournament without sections
+    has a single section A.
+    '''
+    sections = []
+    first_pair_no = 1
+    for i, section_size in enumerate(
+        SectionSizes(self.no_pairs, self.no_sections or 1)):
+      sections.append((SectionName(i),
+                       range(first_pair_no, first_pair_no + section_size)))
+      first_pair_no += section_size
+    return sections
 
   def _TransformAvgScoreToInt(self, score):
     ''' Return the integer representation of an avg score. If score is not legal
@@ -188,25 +306,25 @@ class Tournament(ndb.Model):
       return AVGMM
     return None
 
-  def _RandomId(self, num_ids):
-    ''' Generate a list of num_ids unique random 4 character capitalized ids.
-    
-    Ensures that the ids are not used by any other pair in any other tournament.
-    '''
-    ret = []
-    while (len(ret) < num_ids):
-      futures = []
-      ids = []
-      for i in range(num_ids - len(ret)):
-        id = ''.join(
-            random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for j in range(4))
-        ids.append(id)
-        futures.append(PlayerPair._query(ndb.GenericProperty('id') == id).fetch_async(
-            keys_only=True, limit=1))
-      for i in xrange(len(futures)):
-        player_pairs = futures[i].get_result()
-        if not player_pairs:
-          ret.append(ids[i])
+  def _ClaimRandomIds(self, first_pair_no, num_ids):
+    ''' Generate a list of num_ids unique random 4 character capitalized ids
+    for the pairs numbered first_pair_no onwards and claim their PairCodes.
+
+    Ensures that the ids are not used by any other pair in any other tournament
+    by claiming every candidate in a transaction on its PairCode, which fails
+    if the code is already taken. Candidates are claimed in parallel and only
+    the ones that failed are drawn again.
+    '''
+    ret = [None] * num_ids
+    while None in ret:
+      pending = [i for i in xrange(num_ids) if ret[i] is None]
+      ids = [''.join(random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                     for j in range(4)) for i in pending]
+      futures = [PairCode.ClaimAsync(id, self.key.id(), first_pair_no + i)
+                 for i, id in zip(pending, ids)]
+      for i, id, future in zip(pending, ids, futures):
+        if future.get_result():
+          ret[i] = id
     return ret
 
   def GetScoredHandList(self):
@@ -228,10 +346,12 @@ class Tournament(ndb.Model):
           "board_no": 1,
           "ns_pair": 2,
         }
-      calls and notes may be null.
+      calls and notes may be null. Ordered by HandScore key id. Read from the
+      stored hands of the tournament's standings, without their scores.
     '''
-    return ListOfScoredHandsToListOfDicts(
-        HandScore.query(HandScore.deleted == False, ancestor=self.key).fetch())
+    return sorted(TournamentStandings.GetHandList(self.key),
+                  key=lambda h: HandScore.CreateKeyId(
+                      h["board_no"], h["ns_pair"], h["ew_pair"]))
 
   def GetScoredHandListAsync(self):
     ''' Fetch the list of all non deleted scored hands that are associated with
@@ -249,16 +369,22 @@ class Tournament(ndb.Model):
     Return:
       A list of tuples (hand no, north/south team, east/west team) of all hands
       scores in this tournament.
-    A less expensive and quicker method than GetScoredHandList(self).
+    Read from the stored hands of the tournament's standings, without their
+    scores.
     '''
-    ret = []
-    hands = HandScore.query(HandScore.deleted == False,
-                            ancestor=self.key).fetch(keys_only=True)
-    for hand in hands:
-      ret.append(HandScore.DescriptionFromKeyId(hand.id()))
-    return ret
+    return [(h["board_no"], h["ns_pair"], h["ew_pair"])
+            for h in TournamentStandings.GetHandList(self.key)]
 
 
+  def GetStandings(self):
+    ''' Returns the python.standings.Standings of all non-deleted hands in this
+    tournament.
+
+    Standings are kept up to date on every hand write, so this does not need to
+    score any hands unless the tournament has never had its standings stored.
+    '''
+    return TournamentStandings.Get(self.key)
+
   def GetBoards(self):
     """Returns this tournaments boards.
 
@@ -275,19 +401,19 @@ class Tournament(ndb.Model):
 
   def IsLocked(self):
     if self.lock_status == INVALID:
-      ls = LockStatus.CreateKey(self).get()
+      ls = entity_cache.GetAsync(LockStatus.CreateKey(self)).get_result()
       self.lock_status = ls.lock_status if ls else INVALID
     return self.lock_status == LOCKED
     
   def IsLockable(self):
     if self.lock_status == INVALID:
-      ls = LockStatus.CreateKey(self).get()
+      ls = entity_cache.GetAsync(LockStatus.CreateKey(self)).get_result()
       self.lock_status = ls.lock_status if ls else INVALID
     return self.lock_status == LOCKABLE
     
   def IsUnlocked(self):
     if self.lock_status == INVALID:
-      ls = LockStatus.CreateKey(self).get()
+      ls = entity_cache.GetAsync(LockStatus.CreateKey(self)).get_result()
       self.lock_status = ls.lock_status if ls else INVALID
     return (not self.lock_status) or self.lock_status == UNLOCKED
   
@@ -307,7 +433,7 @@ class Tournament(ndb.Model):
     self.lock_status = LOCKABLE
     self.SetLockStatus()
 
-class LockStatus(ndb.Model):
+class LockStatus(CachedModel):
   ''' Model for the status of lockability of a specific tournament.
   
   Refers to whether a tournament is locked (only administrator may edit hands),
@@ -319,6 +445,11 @@ class LockStatus(ndb.Model):
   '''
   lock_status = ndb.IntegerProperty()
   
+  @classmethod
+  def CreateKeyFromTourneyKey(cls, parent_tourney_key):
+    ''' Create a key for the tournament with key parent_tourney_key. '''
+    return ndb.Key(cls._get_kind(), 1, parent=parent_tourney_key)
+
   @classmethod
   def CreateKey(cls, parent_tourney):
     ''' Create a key for a parent_tourney.
@@ -331,9 +462,366 @@ class LockStatus(ndb.Model):
     Returns:
       ndb.Key that has parent_tourney as a parent.
     '''
-    return ndb.Key(cls._get_kind(), 1, parent=parent_tourney.key)
+    return cls.CreateKeyFromTourneyKey(parent_tourney.key)
+
+class TournamentStandings(ndb.Model):
+  ''' Model recording that the standings of a specific tournament are stored.
+
+  The standings themselves are split into one BoardStandings per board, so the
+  hands every table scores at the end of a round, which are on different
+  boards, update different entities instead of contending for a single one.
+  This entity is written once, when the tournament is created or when the
+  standings of a tournament scored before they were kept are first built, and
+  never by hand writes. Must be a child of some tournament.
+  '''
+
+  @classmethod
+  def CreateKey(cls, parent_tourney_key):
+    ''' Create a key for the tournament with key parent_tourney_key.
+
+    The id is always going to be 1 as there is at most 1 TournamentStandings
+    per tournament.
+    Args:
+      parent_tourney_key: ndb.Key of the tournament.
+
+    Returns:
+      ndb.Key that has parent_tourney_key as a parent.
+    '''
+    return ndb.Key(cls._get_kind(), 1, parent=parent_tourney_key)
+
+  @classmethod
+  def Get(cls, parent_tourney_key):
+    ''' Fetches the standings of a tournament, see _GetBoardJsons.
+
+    Returns:
+      python.standings.Standings.
+    '''
+    return Standings.Merge(
+        [Standings.FromJson(board_json)
+         for board_json in cls._GetBoardJsons(parent_tourney_key).values()])
+
+  @classmethod
+  def GetHandList(cls, parent_tourney_key):
+    ''' Fetches the live hands of a tournament from its standings, without
+    loading any scores, see _GetBoardJsons.
+
+    Returns:
+      List of hand dicts, as in python.standings.Standings.HandList, ordered
+      by board number.
+    '''
+    board_jsons = cls._GetBoardJsons(parent_tourney_key)
+    return [hand for board_no in sorted(board_jsons)
+            for hand in Standings.HandListFromJson(board_jsons[board_no])]
+
+  @classmethod
+  def _GetBoardJsons(cls, parent_tourney_key):
+    ''' Fetches the serialized standings of every board of a tournament with
+    a single get and a single ancestor query, outside of a transaction unless
+    some boards need to be rescored from their hands.
+
+    Returns:
+      Dict from board number to the json string of its
+      python.standings.Standings.
+    '''
+    marker_future = cls.CreateKey(parent_tourney_key).get_async()
+    board_standings = BoardStandings.query(ancestor=parent_tourney_key).fetch()
+    if not marker_future.get_result():
+      try:
+        rebuilt = cls._CreateAll(parent_tourney_key)
+      except datastore_errors.TransactionFailedError:
+        # Hands are being written right now. Score them without storing the
+        # standings; a later read will.
+        rebuilt = BoardStandings.BuildFromHands(parent_tourney_key)
+      return dict((board_no, s.ToJson()) for board_no, s in rebuilt.items())
+    board_jsons = dict((b.key.id(), b.standings) for b in board_standings
+                       if not b.stale)
+    stale = [b.key.id() for b in board_standings if b.stale]
+    if stale:
+      try:
+        rebuilt = BoardStandings.Rebuild(parent_tourney_key, stale)
+      except datastore_errors.TransactionFailedError:
+        rebuilt = BoardStandings.BuildFromHands(parent_tourney_key, stale)
+      board_jsons.update(
+          (board_no, s.ToJson()) for board_no, s in rebuilt.items())
+    return board_jsons
+
+  @classmethod
+  @ndb.transactional
+  def _CreateAll(cls, parent_tourney_key):
+    ''' Builds and stores the standings of every board from all scored hands
+    of a tournament, unless they have been stored in the meantime.
+
+    Returns:
+      Dict from board number to python.standings.Standings.
+    '''
+    marker_key = cls.CreateKey(parent_tourney_key)
+    if marker_key.get():
+      board_standings = BoardStandings.query(
+          ancestor=parent_tourney_key).fetch()
+      standings = BoardStandings.BuildFromHands(
+          parent_tourney_key, [b.key.id() for b in board_standings if b.stale])
+      standings.update((b.key.id(), b.Load()) for b in board_standings
+                       if not b.stale)
+      return standings
+    standings = BoardStandings.BuildFromHands(parent_tourney_key)
+    # Boards written since standings were kept are rebuilt as well, and those
+    # without live hands left are dropped.
+    ndb.delete_multi(
+        [k for k in BoardStandings.query(ancestor=parent_tourney_key).fetch(
+             keys_only=True)
+         if k.id() not in standings])
+    ndb.put_multi([BoardStandings.FromStandings(parent_tourney_key, board_no, s)
+                   for board_no, s in standings.items()] +
+                  [cls(key=marker_key)])
+    return standings
+
+  @classmethod
+  def PutHandScores(cls, parent_tourney_key, hand_scores, allow_stale=True,
+                    overwrite=True):
+    ''' Puts hand_scores and updates the standings of their boards in a
+    single transaction.
+
+    Only hands scored on the same board at the same time contend with each
+    other. If the transaction still fails after its retries and allow_stale
+    is set, the hands are put without it and their boards are marked stale,
+    so that the next read or write rescores just those boards, rather than
+    failing the write.
+
+    Args:
+      parent_tourney_key: ndb.Key of the tournament all hands belong to.
+      hand_scores: list of HandScores. Deleted hands are removed from the
+        standings.
+      allow_stale: Boolean. False to raise TransactionFailedError instead of
+        putting the hands without their standings.
+      overwrite: Boolean. False to skip the hands that already have a live
+        HandScore. Checked in the transaction that writes them, or in one
+        transaction per hand if the hands are put without their standings.
+
+    Returns:
+      List with an entry for every hand of hand_scores: its live HandScore if
+      the hand was skipped because of overwrite, None otherwise.
+    '''
+    try:
+      return cls._PutHandScoresAndStandings(parent_tourney_key, hand_scores,
+                                            overwrite)
+    except datastore_errors.TransactionFailedError:
+      if not allow_stale:
+        raise
+    if overwrite:
+      existing = [None] * len(hand_scores)
+      ndb.put_multi(hand_scores)
+    else:
+      existing = [f.get_result() for f in
+                  [h.PutIfNotScoredAsync() for h in hand_scores]]
+    ndb.put_multi([
+        BoardStandings(key=BoardStandings.CreateKey(parent_tourney_key,
+                                                    board_no),
+                       stale=True)
+        for board_no in BoardStandings.BoardNumbers(
+            [h for h, scored in zip(hand_scores, existing) if not scored])])
+    return existing
+
+  @classmethod
+  @ndb.transactional
+  def _PutHandScoresAndStandings(cls, parent_tourney_key, hand_scores,
+                                 overwrite):
+    ''' Puts hand_scores and the updated standings of their boards in a
+    transaction. Returns the live HandScores that kept hands from being
+    written, as PutHandScores.
+    '''
+    board_nos = BoardStandings.BoardNumbers(hand_scores)
+    entities = ndb.get_multi(
+        [cls.CreateKey(parent_tourney_key)] +
+        [BoardStandings.CreateKey(parent_tourney_key, board_no)
+         for board_no in board_nos] +
+        ([] if overwrite else [h.key for h in hand_scores]))
+    marker = entities[0]
+    entities, stored = (entities[1:len(board_nos) + 1],
+                        entities[len(board_nos) + 1:])
+    if overwrite:
+      existing = [None] * len(hand_scores)
+    else:
+      existing = [h if h and not h.deleted else None for h in stored]
+      hand_scores = [h for h, scored in zip(hand_scores, existing)
+                     if not scored]
+      written_boards = set(BoardStandings.BoardNumbers(hand_scores))
+      entities = [entity for board_no, entity in zip(board_nos, entities)
+                  if board_no in written_boards]
+      board_nos = sorted(written_boards)
+    # Boards without standings have no hands yet, unless the tournament was
+    # scored before standings were kept.
+    rebuild = [board_no for board_no, entity in zip(board_nos, entities)
+               if (entity.stale if entity else not marker)]
+    standings = BoardStandings.BuildFromHands(parent_tourney_key, rebuild)
+    for board_no, entity in zip(board_nos, entities):
+      if board_no not in standings:
+        standings[board_no] = entity.Load() if entity else Standings()
+    for hand_score in hand_scores:
+      board_no, ns_pair, ew_pair = HandScore.DescriptionFromKeyId(
+          hand_score.key.id())
+      if hand_score.deleted:
+        standings[board_no].RemoveHand(board_no, ns_pair, ew_pair)
+      else:
+        standings[board_no].SetHand(
+            ListOfScoredHandsToListOfDicts([hand_score])[0])
+    ndb.put_multi(hand_scores +
+                  [BoardStandings.FromStandings(parent_tourney_key, board_no,
+                                                standings[board_no])
+                   for board_no in board_nos])
+    return existing
+
+class BoardStandings(ndb.Model):
+  ''' Model for the current scores of a single board of a specific tournament.
+
+  Updated in the same transaction as every write of a HandScore of the board
+  so that results can be read without scoring the whole tournament. Must be a
+  child of some tournament, keyed by board number.
+
+  Attributes:
+    standings: json string of the serialized python.standings.Standings of
+               the board, which also holds its live hands. Whole-tournament
+               reads of hands use them instead of querying every HandScore.
+               Unset if stale.
+    stale: True if a hand of the board was put without updating the
+           standings, because their transaction kept colliding with other
+           writes. The board is then rescored from its hands when next read
+           or written.
+  '''
+  standings = ndb.TextProperty()
+  stale = ndb.BooleanProperty(indexed=False)
 
-class PlayerPair(ndb.Model):
+  @classmethod
+  def CreateKey(cls, parent_tourney_key, board_no):
+    ''' Create a key for board board_no of the tournament with key
+    parent_tourney_key.
+    '''
+    return ndb.Key(cls._get_kind(), board_no, parent=parent_tourney_key)
+
+  @classmethod
+  def FromStandings(cls, parent_tourney_key, board_no, standings):
+    ''' Returns an unsaved BoardStandings holding standings. '''
+    return cls(key=cls.CreateKey(parent_tourney_key, board_no),
+               standings=standings.ToJson(), stale=False)
+
+  def Load(self):
+    ''' Returns the python.standings.Standings of the board. '''
+    return Standings.FromJson(self.standings)
+
+  @staticmethod
+  def BoardNumbers(hand_scores):
+    ''' Returns the sorted board numbers of a list of HandScores. '''
+    return sorted(set(HandScore.DescriptionFromKeyId(h.key.id())[0]
+                      for h in hand_scores))
+
+  @classmethod
+  def BuildFromHands(cls, parent_tourney_key, board_nos=None):
+    ''' Scores boards from their live hands.
+
+    Args:
+      parent_tourney_key: ndb.Key of the tournament.
+      board_nos: List of board numbers to score. Every board with live hands
+        if None.
+
+    Returns:
+      Dict from board number to python.standings.Standings.
+    '''
+    if board_nos == []:
+      return {}
+    hands = {}
+    for hand in ListOfScoredHandsToListOfDicts(
+        HandScore.query(HandScore.deleted == False,
+                        ancestor=parent_tourney_key).fetch()):
+      hands.setdefault(hand["board_no"], []).append(hand)
+    if board_nos is None:
+      board_nos = hands.keys()
+    return dict((board_no, Standings.FromHandList(hands.get(board_no, [])))
+                for board_no in board_nos)
+
+  @classmethod
+  @ndb.transactional
+  def Rebuild(cls, parent_tourney_key, board_nos):
+    ''' Rescores and stores those boards of board_nos that are still stale.
+
+    Returns:
+      Dict from board number to python.standings.Standings of every board of
+      board_nos.
+    '''
+    entities = ndb.get_multi([cls.CreateKey(parent_tourney_key, board_no)
+                              for board_no in board_nos])
+    standings = cls.BuildFromHands(
+        parent_tourney_key, [e.key.id() for e in entities if e and e.stale])
+    ndb.put_multi([cls.FromStandings(parent_tourney_key, board_no, s)
+                   for board_no, s in standings.items()])
+    for entity in entities:
+      if entity and not entity.stale:
+        standings[entity.key.id()] = entity.Load()
+    return standings
+
+class SwissRound(ndb.Model):
+  ''' Model for the pairings of a single round of a Swiss tournament.
+
+  Must be a child of some tournament. Keyed by round number.
+
+  Attributes:
+    tables: json list of [ns_pair, ew_pair] lists of every table, in table
+            order.
+    bye: Pair number of the pair sitting out this round. Unset if every pair
+         plays.
+  '''
+  tables = ndb.JsonProperty()
+  bye = ndb.IntegerProperty()
+
+  def Pairings(self):
+    ''' Returns the tuple (list of (ns_pair, ew_pair) tuples, bye) of this
+    round.
+    '''
+    return ([tuple(t) for t in json.loads(self.tables)], self.bye)
+
+  @classmethod
+  def CreateKey(cls, parent_tourney, round_no):
+    ''' Create a key for round round_no of parent_tourney.
+
+    Args:
+      parent_tourney: Tournament. Tournament the round belongs to.
+      round_no: Integer. Round number, starting at 1.
+
+    Returns:
+      ndb.Key that has parent_tourney as a parent.
+    '''
+    return ndb.Key(cls._get_kind(), round_no, parent=parent_tourney.key)
+
+  @classmethod
+  def GetAll(cls, parent_tourney):
+    ''' Fetches every round of parent_tourney in round order. '''
+    return sorted(cls.query(ancestor=parent_tourney.key).fetch(),
+                  key=lambda r: r.key.id())
+
+  @classmethod
+  @ndb.transactional
+  def Create(cls, parent_tourney, round_no, tables, bye):
+    ''' Stores the pairings of round round_no unless the round has already
+    been paired, e.g. by a concurrent request.
+
+    Args:
+      parent_tourney: Tournament. Tournament the round belongs to.
+      round_no: Integer. Round number, starting at 1.
+      tables: List of (ns_pair, ew_pair) tuples in table order.
+      bye: Pair number sitting out, or None.
+
+    Returns:
+      The SwissRound stored for round_no.
+    '''
+    key = cls.CreateKey(parent_tourney, round_no)
+    swiss_round = key.get()
+    if swiss_round:
+      return swiss_round
+    swiss_round = cls(key=key, tables=json.dumps([list(t) for t in tables]),
+                      bye=bye)
+    swiss_round.put()
+    return swiss_round
+
+
+class PlayerPair(CachedModel):
   ''' Model for all the information about a player pair in a specific tournament.
 
   Must be a child of some tournament.
@@ -377,12 +865,140 @@ class PlayerPair(ndb.Model):
       PlayerPair with this pair_no if it exists in the tournament. None 
       otherwise.
     '''
-    return cls.CreateKey(parent_tourney, pair_no).get()
+    return entity_cache.GetAsync(
+        cls.CreateKey(parent_tourney, pair_no)).get_result()
     
   @classmethod
   def GetByPairNoAsync(cls, parent_tourney, pair_no):
     '''Same as a above but returns a Future that will contain tha PlayerPair.'''
-    return cls.CreateKey(parent_tourney, pair_no).get_async()
+    return entity_cache.GetAsync(cls.CreateKey(parent_tourney, pair_no))
+
+class PairCode(ndb.Model):
+  ''' Index from a pair code to the pair it identifies.
+
+  Keyed by the code itself and not a child of any tournament, so a code is
+  resolved with a strongly consistent get and claimed for a new pair in a
+  transaction on this one entity instead of with a global query on
+  PlayerPair.id. Codes handed out before PairCodes existed are indexed by the
+  one-off PairCodeBackfillHandler.
+
+  Attributes:
+    tourney_id: id of the tournament of the pair.
+    pair_no: the number of the pair in that tournament.
+    legacy_pairs: list of further [tourney_id, pair_no] that were handed the
+      same code before codes were unique. Empty for all newer codes.
+  '''
+  tourney_id = ndb.IntegerProperty(indexed=False)
+  pair_no = ndb.IntegerProperty(indexed=False)
+  legacy_pairs = ndb.JsonProperty(default=[])
+
+  @classmethod
+  def CreateKey(cls, code):
+    ''' Create a key for pair code code. '''
+    return ndb.Key(cls._get_kind(), code)
+
+  def Pairs(self):
+    ''' Returns the list of (tourney_id, pair_no) of all pairs with this code.
+    '''
+    pairs = [(self.tourney_id, self.pair_no)] if self.tourney_id else []
+    return pairs + [tuple(p) for p in self.legacy_pairs]
+
+  @classmethod
+  def Resolve(cls, code):
+    ''' Finds the pairs identified by code.
+
+    Args:
+      code: String. Pair code.
+
+    Returns:
+      The list of (tourney_id, pair_no) of the pairs code identifies. Empty if
+      no pair has this code. Only codes handed out before codes were unique can
+      identify more than one pair.
+    '''
+    return cls.ResolveAsync(code).get_result()
+
+  @classmethod
+  @ndb.tasklet
+  def ResolveAsync(cls, code):
+    ''' Same as Resolve, but returns a Future of the list of pairs. '''
+    if not code:
+      raise ndb.Return([])
+    pair_code = yield cls.CreateKey(code).get_async()
+    raise ndb.Return(pair_code.Pairs() if pair_code else [])
+
+  @classmethod
+  def ResolveInTourney(cls, tourney, code):
+    ''' Returns the pair number code identifies in tourney, or None if it
+    does not identify a pair of tourney. This is how every request made with
+    a pair code is authorized.
+    '''
+    return cls.ResolveInTourneyAsync(tourney, code).get_result()
+
+  @classmethod
+  @ndb.tasklet
+  def ResolveInTourneyAsync(cls, tourney, code):
+    ''' Same as ResolveInTourney, but returns a Future of the pair number. '''
+    pairs = yield cls.ResolveAsync(code)
+    for tourney_id, pair_no in pairs:
+      if tourney_id == tourney.key.id():
+        raise ndb.Return(pair_no)
+    raise ndb.Return(None)
+
+  @classmethod
+  @ndb.transactional_tasklet
+  def ClaimAsync(cls, code, tourney_id, pair_no):
+    ''' Makes code identify pair pair_no of tournament tourney_id unless some
+    pair already has it.
+
+    Returns:
+      A Future of whether the code was claimed.
+    '''
+    key = cls.CreateKey(code)
+    pair_code = yield key.get_async()
+    if pair_code:
+      raise ndb.Return(False)
+    yield cls(key=key, tourney_id=tourney_id, pair_no=pair_no).put_async()
+    raise ndb.Return(True)
+
+  @classmethod
+  @ndb.transactional_tasklet
+  def AddLegacyPairAsync(cls, code, tourney_id, pair_no):
+    ''' Makes code identify pair pair_no of tournament tourney_id as well as
+    the pairs it already identifies. Only meant for codes handed out before
+    codes were unique.
+
+    Returns:
+      A Future of whether the pair was added, False if code already
+      identified it.
+    '''
+    key = cls.CreateKey(code)
+    pair_code = yield key.get_async()
+    if not pair_code:
+      pair_code = cls(key=key, tourney_id=tourney_id, pair_no=pair_no)
+    elif (tourney_id, pair_no) in pair_code.Pairs():
+      raise ndb.Return(False)
+    else:
+      pair_code.legacy_pairs = pair_code.legacy_pairs + [[tourney_id, pair_no]]
+    yield pair_code.put_async()
+    raise ndb.Return(True)
+
+  @classmethod
+  @ndb.transactional_tasklet
+  def ReleaseAsync(cls, code, tourney_id):
+    ''' Makes code no longer identify any pair of tournament tourney_id, and
+    deletes it once it identifies no pair at all.
+    '''
+    key = cls.CreateKey(code)
+    pair_code = yield key.get_async()
+    if not pair_code:
+      return
+    pairs = [p for p in pair_code.Pairs() if p[0] != tourney_id]
+    if not pairs:
+      yield key.delete_async()
+      return
+    pair_code.tourney_id, pair_code.pair_no = pairs[0]
+    pair_code.legacy_pairs = [list(p) for p in pairs[1:]]
+    yield pair_code.put_async()
 
 class HandScore(ndb.Model):
   ''' Model for all the information about a single hand.
@@ -533,9 +1149,10 @@ class HandScore(ndb.Model):
     return all_hands
 
   def Delete(self):
-    ''' Mark this hand as deleted and add to Datastore. Also update changelog.
+    ''' Mark this hand as deleted and add to Datastore. Also update changelog
+    and the tournament's standings, in the same transaction as the hand.
 
-    The delete is done asynchronosouly, so a caller of this method should have
+    The changelog is put asynchronosouly, so a caller of this method should have
     a @ndb.toplevel decoration.
     
     Assumes this change has been made by the tournament's director.
@@ -545,15 +1162,40 @@ class HandScore(ndb.Model):
     self.ns_score = None
     self.ew_score = None
     self.deleted = True
-    self.put_async()
+    TournamentStandings.PutHandScores(self.key.parent(), [self],
+                                      allow_stale=False)
     self.PutChangeLog(0)
   
+  @ndb.transactional_tasklet
+  def PutIfNotScoredAsync(self):
+    ''' Puts this hand in a transaction unless it already has a live
+    HandScore, without updating the standings.
+
+    Returns:
+      A Future of the live HandScore that kept this hand from being put, or
+      of None if it was put.
+    '''
+    stored = yield self.key.get_async()
+    if stored and not stored.deleted:
+      raise ndb.Return(stored)
+    yield self.put_async()
+    raise ndb.Return(None)
+
   def PutChangeLog(self, changed_by):
     ''' Create a change log for the current state of the hand.
 
     Uses current timestamp in seconds as key. The put is done asynchronosouly,
     so a caller of this method should have a @ndb.toplevel decoration.
 
+    Args:
+        changed_by: Integer. Pair number for the user requesting the change.
+    '''
+    self.BuildChangeLog(changed_by).put_async()
+
+  def BuildChangeLog(self, changed_by):
+    ''' Returns an unsaved change log for the current state of the hand, keyed
+    by the current timestamp in seconds.
+
     Args:
         changed_by: Integer. Pair number for the user requesting the change.
     '''
@@ -568,7 +1210,7 @@ class HandScore(ndb.Model):
     change_log = ChangeLog(changed_by=changed_by, change=json.dumps(change_dict))
     change_log.key = ndb.Key("ChangeLog", str((nowtime - epoch).total_seconds()),
                              parent=self.key)
-    change_log.put_async()
+    return change_log
 
 
 class ChangeLog(ndb.Model):
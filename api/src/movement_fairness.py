@@ -0,0 +1,151 @@
+''' Fairness statistics of a movement.
+
+Two pairs are compared on a board when they play it in the same direction,
+since their scores are then matchpointed against each other. A fair movement
+compares every pair about as often with each other pair, which is what
+python/movement_generation/model.mod minimizes, and seats every pair about as
+often North/South as East/West.
+
+Seats are stored as one bitmask per pair and direction with a bit per hand
+set, so the comparison count of two pairs is the popcount of two ANDs rather
+than a loop over boards.
+
+Example commandline:
+  python api/src/movement_fairness.py api/src/movement_files/10_pair_3_hands.txt
+'''
+
+import json
+import sys
+
+
+def SeatMasks(pair_dict):
+  ''' Builds the seat matrix of a movement.
+
+  Args:
+    pair_dict: Dict from pair number to its list of MovementRounds, as in
+      Movement.pair_dict.
+
+  Returns:
+    Tuple (north, east, sit_outs). north and east are dicts from pair number
+    to a bitmask with bit i set if the pair plays hand set i in that
+    direction. Hand sets are numbered in order of their lowest hand. sit_outs
+    is a dict from pair number to the number of rounds it does not play.
+  '''
+  hand_sets = set()
+  for rounds in pair_dict.values():
+    for round in rounds:
+      if round.hands:
+        hand_sets.add(tuple(sorted(round.hands)))
+  bits = dict((hand_set, 1 << i) for i, hand_set in enumerate(sorted(hand_sets)))
+  north = {}
+  east = {}
+  sit_outs = {}
+  for pair_no, rounds in pair_dict.items():
+    north[pair_no] = 0
+    east[pair_no] = 0
+    sit_outs[pair_no] = 0
+    for round in rounds:
+      if not round.hands:
+        sit_outs[pair_no] += 1
+        continue
+      bit = bits[tuple(sorted(round.hands))]
+      if round.is_north:
+        north[pair_no] |= bit
+      else:
+        east[pair_no] |= bit
+  return (north, east, sit_outs)
+
+
+def ComparisonMatrix(north, east):
+  ''' Counts the hand sets every two pairs play in the same direction.
+
+  Args:
+    north, east: Seat bitmasks as returned by SeatMasks.
+
+  Returns:
+    Dict from pair number to a dict from every other pair number to the
+    number of hand sets the two pairs are compared on.
+  '''
+  pairs = sorted(north)
+  comparisons = dict((p, {}) for p in pairs)
+  for i, p in enumerate(pairs):
+    north_p = north[p]
+    east_p = east[p]
+    for q in pairs[i + 1:]:
+      count = (bin(north_p & north[q]).count("1") +
+               bin(east_p & east[q]).count("1"))
+      comparisons[p][q] = count
+      comparisons[q][p] = count
+  return comparisons
+
+
+def Imbalance(counts):
+  ''' Returns the sum of |a - b| over all two entries of counts. '''
+  values = sorted(counts)
+  n = len(values)
+  return sum(v * (2 * i - n + 1) for i, v in enumerate(values))
+
+
+def AnalyzeMovement(pair_dict):
+  ''' Computes the fairness statistics of a movement.
+
+  Args:
+    pair_dict: Dict from pair number to its list of MovementRounds, as in
+      Movement.pair_dict.
+
+  Returns:
+    Dict of format:
+      {
+        "objective": 238,
+        "pairs": {
+          1: {
+            "imbalance": 24,
+            "min_comparisons": 2,
+            "max_comparisons": 4,
+            "north": 4,
+            "east": 3,
+            "sit_outs": 0
+          },
+          ...
+        }
+      }
+    objective is the sum of the imbalances of all pairs, the objective of
+    model.mod. The imbalance of a pair is the sum over all two other pairs of
+    the difference between the number of hand sets it is compared with each
+    of them. north and east count the rounds played in each direction.
+  '''
+  north, east, sit_outs = SeatMasks(pair_dict)
+  comparisons = ComparisonMatrix(north, east)
+  pairs = {}
+  for pair_no, row in comparisons.items():
+    counts = row.values()
+    pairs[pair_no] = {
+        "imbalance": Imbalance(counts),
+        "min_comparisons": min(counts) if counts else 0,
+        "max_comparisons": max(counts) if counts else 0,
+        "north": bin(north[pair_no]).count("1"),
+        "east": bin(east[pair_no]).count("1"),
+        "sit_outs": sit_outs[pair_no],
+    }
+  return {"objective": sum(p["imbalance"] for p in pairs.values()),
+          "pairs": pairs}
+
+
+def main(argv):
+  from movements import MovementRound
+  from movements import _ParseMovement
+  for path in argv:
+    with open(path) as f:
+      pair_dict = dict(
+          (pair_no, [MovementRound(*round) for round in rounds])
+          for pair_no, rounds in _ParseMovement(json.load(f)).items())
+    report = AnalyzeMovement(pair_dict)
+    print "{}: objective {}".format(path, report["objective"])
+    for pair_no, stats in sorted(report["pairs"].items()):
+      print ("  pair {0:>3}: imbalance {imbalance:>5}, compared {min_comparisons}" +
+             "-{max_comparisons} times, {north} N / {east} E, " +
+             "{sit_outs} sit-outs").format(pair_no, **stats)
+
+
+if __name__ == "__main__":
+  main(sys.argv[1:])
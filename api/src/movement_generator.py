@@ -0,0 +1,232 @@
+''' Generates complete Howell movements for any number of pairs.
+
+Pairs are numbered by the elements of Z_n plus a fixed pair, where n is the
+number of rounds: the number of pairs minus one for an even field, and the
+number of pairs for an odd one. For odd fields the fixed pair is a phantom and
+its opponent sits out.
+
+A starter is a partition of the non-zero elements of Z_n into pairs {a, b}
+whose differences +-(b - a) cover each non-zero element exactly once. In round
+r, starter pair {a, b} seats pairs r + a and r + b at the same table, which
+plays hand set r + (a + b) / 2, and the fixed pair plays pair r on hand set r.
+Every pair then meets every other pair once and never plays a hand set twice.
+Tables whose starter pairs share the same (a + b) / 2 play the same hand set
+in every round and become relay tables.
+'''
+
+import movement_fairness
+
+# Largest field a movement is generated for.
+MAX_PAIRS = 40
+# Most hands per round of a generated movement, as in the largest movement
+# files.
+MAX_HANDS_PER_ROUND = 8
+
+# Dictionary of tuple (n, fixed pair plays, max tables per hand set) to starter.
+_STARTERS = {}
+
+
+def GenerateMovement(no_pairs, no_hands_per_round, no_rounds=None):
+  ''' Generates a complete Howell movement.
+
+  Args:
+    no_pairs: Integer. Number of pairs.
+    no_hands_per_round: Integer. Number of hands played in each round.
+    no_rounds: Integer. Optional, must be the number of rounds returned by
+      NumRounds if set.
+
+  Returns:
+    Dict from pair number to the list of MovementRound arguments of each of
+    its rounds, in the format of movements.CompileBundle.
+
+  Raises:
+    ValueError if no movement can be generated for this configuration.
+  '''
+  if (no_pairs < 3 or no_pairs > MAX_PAIRS or no_hands_per_round < 1 or
+      no_hands_per_round > MAX_HANDS_PER_ROUND or
+      no_rounds not in (None, NumRounds(no_pairs))):
+    raise ValueError(("Cannot generate a movement for {} pairs with {} hands " +
+                      "per round and {} rounds").format(
+                          no_pairs, no_hands_per_round, no_rounds))
+  n = NumRounds(no_pairs)
+  has_phantom = no_pairs % 2 == 1
+  # Use as few relay tables as possible. Z_n always has a starter when every
+  # table may play the same hand set.
+  for max_tables_per_set in xrange(1, n + 1):
+    starter = _FindStarter(n, not has_phantom, max_tables_per_set)
+    if starter is not None:
+      break
+
+  inverse_of_two = (n + 1) / 2
+  centers = [(a + b) * inverse_of_two % n for a, b in starter]
+  # Tables of the starter pairs are numbered first, the fixed pair plays at the
+  # last table.
+  tables = [(a, b, center, centers.count(center) > 1, table_no + 1)
+            for table_no, ((a, b), center) in enumerate(zip(starter, centers))]
+  if not has_phantom:
+    tables.append((None, 0, 0, centers.count(0) > 0, len(starter) + 1))
+
+  # Every pair plays each starter table once as r + a and once as r + b, so
+  # seating r + a North/South at a table in every round sits each pair as often
+  # in both directions. Which of the two it is only changes how often pairs
+  # are compared, so pick it per table to make that as even as possible.
+  flipped = [False] * len(tables)
+  objective = _Objective(_Seats(n, tables, flipped))
+  improved = True
+  while improved:
+    improved = False
+    for i in xrange(len(tables)):
+      flipped[i] = not flipped[i]
+      new_objective = _Objective(_Seats(n, tables, flipped))
+      if new_objective < objective:
+        objective = new_objective
+        improved = True
+      else:
+        flipped[i] = not flipped[i]
+
+  pair_dict = dict((pair_no, []) for pair_no in xrange(1, no_pairs + 1))
+  if has_phantom:
+    for r in xrange(n):
+      pair_dict[r + 1].append((r + 1, None, None, [], None, None))
+  for round_no, table_no, north, east, hand_set, relay_table in _Seats(
+      n, tables, flipped):
+    hands = range(hand_set * no_hands_per_round + 1,
+                  (hand_set + 1) * no_hands_per_round + 1)
+    pair_dict[north].append(
+        (round_no, table_no, True, hands, east, relay_table))
+    pair_dict[east].append(
+        (round_no, table_no, False, list(hands), north, relay_table))
+  for rounds in pair_dict.values():
+    rounds.sort()
+  _CheckMovement(pair_dict)
+  return pair_dict
+
+
+def _Seats(n, tables, flipped):
+  ''' Seats the pairs of every table in every round.
+
+  Args:
+    n: Integer. Number of rounds.
+    tables: List of (a, b, center, relay table, table number) tuples. a is None
+      for the table of the fixed pair.
+    flipped: List of booleans. Whether pair r + b of each table sits
+      North/South.
+
+  Returns:
+    List of (round number, table number, north pair, east pair, hand set,
+    relay table) tuples.
+  '''
+  seats = []
+  fixed_pair = n + 1
+  for r in xrange(n):
+    for (a, b, center, relay_table, table_no), flip in zip(tables, flipped):
+      north = fixed_pair if a is None else (r + a) % n + 1
+      east = (r + b) % n + 1
+      # The fixed pair always plays at its table, so alternate it by round.
+      if flip != (a is None and r % 2 == 1):
+        north, east = east, north
+      seats.append((r + 1, table_no, north, east, (r + center) % n,
+                    relay_table))
+  return seats
+
+
+def _Objective(seats):
+  ''' Returns the fairness objective of movement_fairness for seats. '''
+  pairs = set(seat[2] for seat in seats) | set(seat[3] for seat in seats)
+  north = dict((pair_no, 0) for pair_no in pairs)
+  east = dict(north)
+  for _, _, north_pair, east_pair, hand_set, _ in seats:
+    north[north_pair] |= 1 << hand_set
+    east[east_pair] |= 1 << hand_set
+  comparisons = movement_fairness.ComparisonMatrix(north, east)
+  return sum(movement_fairness.Imbalance(row.values())
+             for row in comparisons.values())
+
+
+def NumRounds(no_pairs):
+  ''' Returns the number of rounds of a generated movement for no_pairs. '''
+  return no_pairs if no_pairs % 2 == 1 else no_pairs - 1
+
+
+def Configurations(no_pairs):
+  ''' Returns the list of (total boards, boards per round, rounds) tuples a
+  movement can be generated for with no_pairs.
+  '''
+  if no_pairs < 3 or no_pairs > MAX_PAIRS:
+    return []
+  no_rounds = NumRounds(no_pairs)
+  return [(no_hands_per_round * no_rounds, no_hands_per_round, no_rounds)
+          for no_hands_per_round in xrange(1, MAX_HANDS_PER_ROUND + 1)]
+
+
+def _FindStarter(n, zero_is_table, max_tables_per_set):
+  ''' Searches for a starter of Z_n.
+
+  Args:
+    n: Odd integer.
+    zero_is_table: Boolean. Whether hand set 0 of round 0 is played by a
+      table besides those of the starter.
+    max_tables_per_set: Integer. Maximum number of tables playing the same
+      hand set in a round.
+
+  Returns:
+    List of (a, b) tuples, or None if there is no such starter.
+  '''
+  key = (n, zero_is_table, max_tables_per_set)
+  if key in _STARTERS:
+    return _STARTERS[key]
+  inverse_of_two = (n + 1) / 2
+  used = [False] * n
+  used[0] = True
+  tables_per_set = [0] * n
+  if zero_is_table:
+    tables_per_set[0] = 1
+  starter = []
+
+  # Placing the largest differences first prunes the search early.
+  def Search(difference):
+    if difference == 0:
+      return True
+    for a in xrange(1, n):
+      b = (a + difference) % n
+      center = (a + b) * inverse_of_two % n
+      if (used[a] or used[b] or
+          tables_per_set[center] >= max_tables_per_set):
+        continue
+      used[a] = used[b] = True
+      tables_per_set[center] += 1
+      starter.append((a, b))
+      if Search(difference - 1):
+        return True
+      starter.pop()
+      tables_per_set[center] -= 1
+      used[a] = used[b] = False
+    return False
+
+  _STARTERS[key] = list(starter) if Search((n - 1) / 2) else None
+  return _STARTERS[key]
+
+
+def _CheckMovement(pair_dict):
+  ''' Checks that no pair meets another pair or plays a hand twice and that
+  every hand is played the same number of times.
+
+  Raises:
+    ValueError if the movement is inconsistent.
+  '''
+  times_played = {}
+  for pair_no, rounds in pair_dict.items():
+    opponents = set()
+    hands = set()
+    for round in rounds:
+      if not round[3]:
+        continue
+      if round[4] in opponents or hands.intersection(round[3]):
+        raise ValueError("Pair {} meets an opponent or plays a hand twice".format(
+            pair_no))
+      opponents.add(round[4])
+      hands.update(round[3])
+      for hand in round[3]:
+        times_played[hand] = times_played.get(hand, 0) + 1
+  if len(set(times_played.values())) != 1:
+    raise ValueError("Hands are not all played the same number of times")
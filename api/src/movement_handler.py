@@ -12,7 +12,7 @@ from handler_utils import SetErrorStatus
 from models import HandScore
 from models import PlayerPair
 from models import Tournament
-from movements import Movement
+from movements import SectionName
 
 
 class MovementHandler(GenericHandler):
@@ -44,23 +44,23 @@ class MovementHandler(GenericHandler):
         tourney, player_pair):
       return
 
-    no_hands_per_round, no_rounds = Movement.NumBoardsPerRoundFromTotal(
-        tourney.no_pairs, tourney.no_boards)
     try:
-      movement = Movement.CreateMovement(
-          tourney.no_pairs, no_hands_per_round, no_rounds,
-          tourney.legacy_version_id).GetMovement(int(pair_no))
+      full_movement = tourney.GetMovement()
     except ValueError:
       SetErrorStatus(self.response, 500, "Corrupted Data",
                      "No valid movement for this tourney's config")
       return
 
+    movement = full_movement.GetMovement(int(pair_no))
     movement_list = self._GetMovementHandsAsync(tourney, movement, int(pair_no))
+    section_index, section_pair_no = full_movement.GetSection(int(pair_no))
 
     combined_dict = {
       'name' : tourney.name,
       'players' : player_pair.player_list(),
       'allow_score_overwrites' : tourney.IsUnlocked(),
+      'section' : SectionName(section_index),
+      'section_pair_no' : section_pair_no,
       'movement': movement_list
     }
 
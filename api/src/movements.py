@@ -1,9 +1,137 @@
+import cPickle
+import collections
 import json
 import os
 
+import hand_prep
+import movement_generator
+
+_MOVEMENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'movement_files')
+# Lists the movement file used for every supported configuration.
+MANIFEST_PATH = os.path.join(_MOVEMENT_DIR, 'manifest.json')
+# Every movement of the manifest, already parsed. Rebuild it with
+# `python api/src/movements.py` after changing the manifest or a movement file.
+BUNDLE_PATH = os.path.join(_MOVEMENT_DIR, 'movements.bundle')
+
 # Dictionary of tuple (num pairs, num hands per round, num rounds) to the movement.
 _MOVEMENTS = {}
 
+# A way to play a tournament with a given number of pairs. generated is True if
+# the movement comes from movement_generator rather than a movement file.
+Configuration = collections.namedtuple(
+    "Configuration",
+    ["no_boards", "no_hands_per_round", "no_rounds", "generated"])
+
+# Dictionary from num pairs to the list of its Configurations.
+_CONFIGURATIONS = {}
+
+# Most sections a tournament can be split into, named A to Z.
+MAX_SECTIONS = 26
+
+
+def SectionSizes(no_pairs, no_sections):
+  ''' Splits no_pairs as evenly as possible into no_sections sections.
+
+  Returns:
+    List of the number of pairs in each section, larger sections first.
+  '''
+  section_size, larger_sections = divmod(no_pairs, no_sections)
+  return ([section_size + 1] * larger_sections +
+          [section_size] * (no_sections - larger_sections))
+
+
+def SectionName(section_index):
+  ''' Returns the letter naming the section with 0-based section_index. '''
+  return chr(ord('A') + section_index)
+
+
+def CompileBundle(manifest_path=MANIFEST_PATH):
+  ''' Parses every movement file listed in the manifest.
+
+  Args:
+    manifest_path: Path of the manifest. Movement files are relative to it.
+
+  Returns:
+    Dict with keys
+      "movements": Dict from (num pairs, num hands per round, num rounds,
+        legacy version id) to a dict from pair number to the list of the
+        MovementRound arguments of each of its rounds.
+      "boards_per_round": Dict from (num pairs, total boards) to (num hands per
+        round, num rounds) of every non-legacy movement.
+      "suggested_prep": Dict from the keys of "movements" to the suggested
+        hand preparation of the movement, as in Movement.suggested_prep.
+
+  Raises:
+    ValueError if two movements share a configuration.
+  '''
+  movement_dir = os.path.dirname(manifest_path)
+  with open(manifest_path) as f:
+    manifest = json.load(f)
+  movements = {}
+  boards_per_round = {}
+  suggested_prep = {}
+  for entry in manifest["movements"]:
+    key = (entry["pairs"], entry["hands_per_round"], entry["rounds"],
+           entry.get("legacy_version_id"))
+    if key in movements:
+      raise ValueError("Duplicate movement for {}".format(key))
+    with open(os.path.join(movement_dir, entry["file"])) as f:
+      movement = _ParseMovement(json.load(f))
+    movements[key] = movement
+    total_boards, unplayed_hands = hand_prep.UnplayedHands(dict(
+        (team, [hand for round in rounds for hand in round[3]])
+        for team, rounds in movement.items()))
+    suggested_prep[key] = hand_prep.BalancedHandPrep(unplayed_hands)
+    if key[3] is not None:
+      continue
+    if (key[0], total_boards) in boards_per_round:
+      raise ValueError("Duplicate movement for {} pairs and {} boards".format(
+          key[0], total_boards))
+    boards_per_round[(key[0], total_boards)] = key[1:3]
+  return {"movements": movements, "boards_per_round": boards_per_round,
+          "suggested_prep": suggested_prep}
+
+
+def WriteBundle(bundle_path=BUNDLE_PATH, manifest_path=MANIFEST_PATH):
+  ''' Compiles the manifest and stores the result in bundle_path. '''
+  bundle = CompileBundle(manifest_path)
+  with open(bundle_path, 'wb') as f:
+    cPickle.dump(bundle, f, cPickle.HIGHEST_PROTOCOL)
+
+
+def _ParseMovement(json_dict):
+  ''' Converts a movement file to a dict from pair number to the list of the
+  MovementRound arguments of each of its rounds.
+  '''
+  pair_dict = {}
+  for team, rounds in json_dict.items():
+    list_of_rounds = []
+    for round in rounds:
+      position_str = round.get("position")
+      list_of_rounds.append((
+          round["round"], 
+          int(position_str[0:(len(position_str) - 1)]) if position_str else None,
+          position_str[(len(position_str) - 1):len(position_str)] == "N" if position_str else None,
+          round.get("hands", []),
+          round.get("opponent"),
+          round.get("relay_table")))
+    pair_dict[int(team)] = list_of_rounds
+  return pair_dict
+
+
+def _LoadBundle():
+  ''' Reads the compiled bundle, compiling the manifest if it is missing. '''
+  try:
+    with open(BUNDLE_PATH, 'rb') as f:
+      return cPickle.load(f)
+  except IOError:
+    return CompileBundle()
+
+
+# Loaded once per instance so that no request pays for parsing movements.
+_BUNDLE = _LoadBundle()
+
 class MovementRound:
   '''Class that defines a single round in a movement within a tournament. 
 
@@ -66,107 +194,28 @@ class Movement:
         Raises:
           ValueError if we do not have a defined movement for this configuration.
     '''
-    if legacy_version_id == 1:
-      if no_hands_per_round == 2 and no_pairs == 7 and no_rounds == 7:
-        json_data=open(os.path.join(os.getcwd(), 
-                       'api/src/movement_files/7_pair_2_hands_7_rounds_legacy1.txt')).read()
-      elif no_hands_per_round == 3 and no_pairs == 10 and no_rounds == 7:
-        json_data=open(os.path.join(os.getcwd(), 
-                       'api/src/movement_files/10_pair_3_hands_legacy1.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 10 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/10_pair_3_hands.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 10 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/10_pair_2_hands.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 9 and no_rounds == 8:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/9_pair_3_hands_8_rounds.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 9 and no_rounds == 8:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/9_pair_2_hands.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 9 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/9_pair_2_hands_7_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 9 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/9_pair_3_hands_7_rounds.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 8 and no_rounds == 6:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/8_pair_2_hands_6_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 8 and no_rounds == 6:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/8_pair_3_hands_6_rounds.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 7 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/7_pair_2_hands_7_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 7 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/7_pair_3_hands_7_rounds.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 11 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/11_pair_2_hands_7_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 11 and no_rounds == 7:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/11_pair_3_hands_7_rounds.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 11 and no_rounds == 6:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/11_pair_2_hands_7_rounds_6_max.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 11 and no_rounds == 6:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/11_pair_3_hands_7_rounds_6_max.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 6 and no_rounds == 5:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/6_pair_3_hands_5_rounds.txt')).read()
-    elif no_hands_per_round == 4 and no_pairs == 6 and no_rounds == 5:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/6_pair_4_hands_5_rounds.txt')).read()
-    elif no_hands_per_round == 4 and no_pairs == 5 and no_rounds == 5:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/5_pair_4_hands_5_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 5 and no_rounds == 5:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/5_pair_3_hands_5_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 12 and no_rounds == 5:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/12_pair_3_hands_5_rounds.txt')).read()
-    elif no_hands_per_round == 3 and no_pairs == 12 and no_rounds == 6:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/12_pair_3_hands_6_rounds.txt')).read()
-    elif no_hands_per_round == 2 and no_pairs == 12 and no_rounds == 6:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/12_pair_2_hands_6_rounds.txt')).read()
-    elif no_hands_per_round == 5 and no_pairs == 4 and no_rounds == 3:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/4_pair_5_hands_3_rounds.txt')).read()
-    elif no_hands_per_round == 6 and no_pairs == 4 and no_rounds == 3:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/4_pair_6_hands_3_rounds.txt')).read()
-    elif no_hands_per_round == 7 and no_pairs == 4 and no_rounds == 3:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/4_pair_7_hands_3_rounds.txt')).read()
-    elif no_hands_per_round == 8 and no_pairs == 4 and no_rounds == 3:
-      json_data=open(os.path.join(os.getcwd(), 
-                     'api/src/movement_files/4_pair_8_hands_3_rounds.txt')).read()
-    else:
-      raise ValueError(("No movements available for the configuration {} " + 
-                           "pairs with {} hands per round").format(
-                               no_pairs, no_hands_per_round))
+    key = (no_pairs, no_hands_per_round, no_rounds, legacy_version_id)
+    if key not in _BUNDLE["movements"] and legacy_version_id is not None:
+      # Legacy versions only pin configurations whose movement changed.
+      key = (no_pairs, no_hands_per_round, no_rounds, None)
+    rounds_by_team = _BUNDLE["movements"].get(key)
+    if rounds_by_team is None:
+      try:
+        rounds_by_team = movement_generator.GenerateMovement(
+            no_pairs, no_hands_per_round, no_rounds)
+      except ValueError:
+        raise ValueError(("No movements available for the configuration {} " + 
+                             "pairs with {} hands per round").format(
+                                 no_pairs, no_hands_per_round))
     self.pair_dict = {}
-    for team, rounds in json.loads(json_data).items():
-      list_of_rounds = []
-      for round in rounds:
-        position_str = round.get("position")
-        list_of_rounds.append(MovementRound(
-            round["round"], 
-            int(position_str[0:(len(position_str) - 1)]) if position_str else None,
-            position_str[(len(position_str) - 1):len(position_str)] == "N" if position_str else None,
-            round.get("hands", []),
-            round.get("opponent"),
-            round.get("relay_table")))
-      self.pair_dict[int(team)] = list_of_rounds
+    for team, rounds in rounds_by_team.items():
+      self.pair_dict[team] = [MovementRound(*round) for round in rounds]
+    self.sections = [(1, len(self.pair_dict))]
     self._CalculateUnplayedHands()
-    self._CalculateSuggestedPrep()
+    self.suggested_prep = _BUNDLE["suggested_prep"].get(key)
+    if self.suggested_prep is None:
+      self._CalculateSuggestedPrep()
+    self._BuildIndexes()
 
   @classmethod
   def CreateMovement(cls, no_pairs, no_hands_per_round, no_rounds=None,
@@ -180,6 +229,53 @@ class Movement:
     _MOVEMENTS[key] = movement
     return movement
 
+  @classmethod
+  def CreateSectionedMovement(cls, no_pairs, no_sections, total_boards,
+                              legacy_version_id=None):
+    ''' Static factory method to create and cache the movement of a
+    tournament whose pairs are split into no_sections sections that all play
+    the same total_boards boards.
+
+    Args:
+      no_pairs: Integer. Number of pairs in the whole tournament.
+      no_sections: Integer. Number of sections. None or 1 for a tournament
+        without sections.
+      total_boards: Integer. Number of boards in the tournament.
+      legacy_version_id: Integer. Legacy version of the movement of every
+        section. Usually unset.
+
+    Raises:
+      ValueError if some section has no movement for total_boards or the
+        sections do not play the same number of rounds.
+    '''
+    if not no_sections or no_sections == 1:
+      no_hands_per_round, no_rounds = cls.NumBoardsPerRoundFromTotal(
+          no_pairs, total_boards)
+      return cls.CreateMovement(no_pairs, no_hands_per_round, no_rounds,
+                                legacy_version_id)
+    key = ("sections", no_pairs, no_sections, total_boards, legacy_version_id)
+    if _MOVEMENTS.get(key):
+      return _MOVEMENTS.get(key)
+    if no_sections < 1 or no_sections > MAX_SECTIONS:
+      raise ValueError("Cannot split a tournament into {} sections".format(
+          no_sections))
+    section_movements = []
+    for section_size in SectionSizes(no_pairs, no_sections):
+      no_hands_per_round, no_rounds = cls.NumBoardsPerRoundFromTotal(
+          section_size, total_boards)
+      section_movements.append(cls.CreateMovement(
+          section_size, no_hands_per_round, no_rounds, legacy_version_id))
+    movement = SectionedMovement(section_movements)
+    _MOVEMENTS[key] = movement
+    return movement
+
+  @staticmethod
+  def Configurations():
+    ''' Returns the list of (num pairs, num hands per round, num rounds,
+    legacy version id) tuples of every movement in the manifest.
+    '''
+    return sorted(_BUNDLE["movements"])
+
   def GetMovement(self, pair_no):
     ''' Construct a dictionary for this movement.
 
@@ -204,18 +300,34 @@ class Movement:
     '''
     return self.suggested_prep.get(pair_no, [])
 
+  def GetSection(self, pair_no):
+    ''' Returns the tuple (0-based section index, pair number within the
+    section) of pair_no.
+    '''
+    for section_index, (first_pair_no, no_pairs) in enumerate(self.sections):
+      if pair_no < first_pair_no + no_pairs:
+        return (section_index, pair_no - first_pair_no + 1)
+    raise KeyError(pair_no)
+
   def GetNumRounds(self):
     '''Returns the total number of rounds in this movement.'''
     return len(self.pair_dict[1])
 
   def GetListOfPlayersForHand(self, board_no):
     '''Returns a list of (ns_pair, ew_pair) tuples that play board_no.'''
-    pairs = []
-    for pair_no, rounds in self.pair_dict.items():
-      for round in rounds:
-        if board_no in round.hands and round.is_north:
-          pairs.append((pair_no, round.opponent))
-    return pairs
+    return list(self._board_matchups.get(board_no, []))
+
+  def GetRoundForMatchup(self, board_no, ns_pair, ew_pair):
+    '''Returns the MovementRound of ns_pair in which it plays board_no sitting
+    North/South against ew_pair, or None if there is no such round.
+    '''
+    return self._matchup_rounds.get((board_no, ns_pair, ew_pair))
+
+  def GetPairsAtTable(self, round_no, table):
+    '''Returns the (ns_pair, ew_pair) tuple sitting at table in round_no, or
+    None if the table is not used in that round.
+    '''
+    return self._table_pairs.get((round_no, table))
 
   @staticmethod
   def NumBoardsPerRoundFromTotal(no_pairs, total_boards):
@@ -223,109 +335,232 @@ class Movement:
         number of pairs and boards in a tournament.
 
     Returned value is not the only feasible value but the best one as 
-    determined by us.
+    determined by us. See FeasibleConfigurations for the alternatives.
 
     Returns:
       Tuple (number of boards per round, maximum number of rounds).
         (0, 0) if no movement configuration exists for this input.
     '''
-    if total_boards == 21 and no_pairs == 12:
-      return (3, 6)
-    if total_boards == 18 and no_pairs == 12:
-      return (3, 5)
-    if total_boards == 14 and no_pairs == 12:
-      return (2, 6)
-    if total_boards == 14 and no_pairs == 11:
-      return (2, 7)
-    if total_boards == 21 and no_pairs == 11:
-      return (3, 7)
-    if total_boards == 16 and no_pairs == 11:
-      return (2, 6)
-    if total_boards == 24 and no_pairs == 11:
-      return (3, 6)
-    if total_boards == 24 and no_pairs == 10:
-      return (3, 7)
-    elif total_boards == 16 and no_pairs == 10:
-      return (2, 7)
-    elif total_boards == 18 and no_pairs == 9:
-      return (2, 8)
-    elif total_boards == 27 and no_pairs == 9:
-      return (3, 8)
-    elif total_boards == 14 and no_pairs == 9:
-      return (2, 7)
-    elif total_boards == 21 and no_pairs == 9:
-      return (3, 7)
-    elif total_boards == 16 and no_pairs == 8:
-      return (2, 6)
-    elif total_boards == 24 and no_pairs == 8:
-      return (3, 6)
-    elif total_boards == 14 and no_pairs == 7:
-      return (2, 7)
-    elif total_boards == 21 and no_pairs == 7:
-      return (3, 7)
-    elif total_boards == 15 and no_pairs == 6:
-      return (3, 5)
-    elif total_boards == 20 and no_pairs == 6:
-      return (4, 5)
-    elif total_boards == 20 and no_pairs == 5:
-      return (4, 5)
-    elif total_boards == 15 and no_pairs == 5:
-      return (3, 5)
-    elif total_boards == 15 and no_pairs == 4:
-      return (5, 3)
-    elif total_boards == 18 and no_pairs == 4:
-      return (6, 3)
-    elif total_boards == 21 and no_pairs == 4:
-      return (7, 3)
-    elif total_boards == 24 and no_pairs == 4:
-      return (8, 3)
-    else:
-      return (0, 0)
-      
+    configurations = Movement.FeasibleConfigurations(no_pairs, total_boards)
+    if configurations and configurations[0].no_boards == total_boards:
+      return tuple(configurations[0][1:3])
+    return (0, 0)
+
+  @staticmethod
+  def FeasibleConfigurations(no_pairs, total_boards=None):
+    ''' Lists every configuration a tournament with no_pairs can be played in.
+
+    Configurations with a movement file rank before generated ones. If
+    total_boards is set, configurations with exactly that many boards come
+    first and the others follow by how close their number of boards is.
+
+    Returns:
+      List of Configurations, best first.
+    '''
+    configurations = _CONFIGURATIONS.get(no_pairs)
+    if configurations is None:
+      configurations = [
+          Configuration(boards, hands_per_round, rounds, False)
+          for (pairs, boards), (hands_per_round, rounds)
+          in _BUNDLE["boards_per_round"].items() if pairs == no_pairs]
+      from_files = set(c.no_boards for c in configurations)
+      configurations.extend(
+          Configuration(boards, hands_per_round, rounds, True)
+          for boards, hands_per_round, rounds
+          in movement_generator.Configurations(no_pairs)
+          if boards not in from_files)
+      configurations.sort(key=lambda c: (c.generated, c.no_boards))
+      _CONFIGURATIONS[no_pairs] = configurations
+    if total_boards is None:
+      return list(configurations)
+    return sorted(configurations,
+                  key=lambda c: (c.no_boards != total_boards,
+                                 abs(c.no_boards - total_boards), c.generated))
+
   def _CalculateUnplayedHands(self):
     ''' Get the list, for each pair, of hands that the pair does not play. 
 
     Side effects:
-     Sets attribute unplayed_hands. Dict from string representation of pair
-       number to the list of hands not played by that pair.
+     Sets attribute unplayed_hands. Dict from pair number to the list of hands
+       not played by that pair.
     '''
-    self.total_boards = 0
-    seen_hands = {}
-    self.unplayed_hands = {}
-    for team, rounds in self.pair_dict.items():
+    self.total_boards, self.unplayed_hands = hand_prep.UnplayedHands(dict(
+        (team, [hand for round in rounds if round.hands for hand in round.hands])
+        for team, rounds in self.pair_dict.items()))
+
+  def _BuildIndexes(self):
+    ''' Indexes the rounds of every North/South pair by matchup.
+
+    Side effects:
+     Sets attributes _matchup_rounds, dict from (board_no, ns_pair, ew_pair) to
+       the MovementRound of ns_pair, _board_matchups, dict from board_no to the
+       list of (ns_pair, ew_pair) tuples that play it, and _table_pairs, dict
+       from (round number, table) to the (ns_pair, ew_pair) tuple at the table.
+    '''
+    self._matchup_rounds = {}
+    self._board_matchups = {}
+    self._table_pairs = {}
+    for pair_no, rounds in self.pair_dict.items():
       for round in rounds:
-        if not round.hands:
+        if not round.hands or not round.is_north:
           continue
-        self.total_boards = max(max(round.hands), self.total_boards)
-        seen_hands[team] = seen_hands.get(team, set()).union(round.hands)
-    for team, hand_list in seen_hands.items():
-      for hand in range(1, self.total_boards + 1):
-        if hand not in hand_list:
-          self.unplayed_hands.setdefault(team, []).append(hand)
-          
+        self._table_pairs[(round.round, round.table)] = (pair_no,
+                                                         round.opponent)
+        for hand in round.hands:
+          self._matchup_rounds[(hand, pair_no, round.opponent)] = round
+          self._board_matchups.setdefault(hand, []).append(
+              (pair_no, round.opponent))
+
   def _CalculateSuggestedPrep(self):
     ''' Get the list, for each pair, of hands that we suggest the pair prepares. 
 
-    Not guaranteed to be optimal, but tries to spread out the burden as much
-    as possible. Each hand in the movement is guaranteed to be in someone's 
-    list.
+    Every hand some pair does not play is in exactly one list, and the lists
+    are as even in length as the movement allows. Movements from the bundle
+    have this precomputed.
 
     Side effects:
-     Sets attribute suggested_prep. Dict from string representation of pair
-       number to the list of hands the pair should prepare.
+     Sets attribute suggested_prep. Dict from pair number to the list of hands
+       the pair should prepare.
+    '''
+    self.suggested_prep = hand_prep.BalancedHandPrep(self.unplayed_hands)
+
+
+class SectionedMovement(Movement):
+  ''' Movement of a tournament split into sections that play their own
+  movements in parallel on the same boards.
+
+  Pairs and tables are numbered across the whole tournament, section after
+  section, so hands are keyed and scored exactly as in a single movement and
+  every board is matchpointed across the entire field.
+
+  Attributes:
+    pair_dict: Dictionary from pair number to movement pair movement
+      where pair movement is a list MovementRounds.
+    sections: List of (first pair number, number of pairs) tuples of every
+      section, in section order.
+  '''
+  def __init__(self, section_movements):
+    ''' Combines section_movements, one Movement per section.
+
+        Raises:
+          ValueError if the sections do not play the same number of rounds or
+            boards.
+    '''
+    if (len(set(m.GetNumRounds() for m in section_movements)) != 1 or
+        len(set(m.total_boards for m in section_movements)) != 1):
+      raise ValueError(
+          "Sections must play the same number of rounds and boards")
+    self.pair_dict = {}
+    self.sections = []
+    self.unplayed_hands = {}
+    self.suggested_prep = {}
+    pair_offset = 0
+    table_offset = 0
+    for movement in section_movements:
+      self.sections.append((pair_offset + 1, len(movement.pair_dict)))
+      for pair_no, rounds in movement.pair_dict.items():
+        self.pair_dict[pair_offset + pair_no] = [
+            MovementRound(round.round,
+                          round.table + table_offset if round.hands else None,
+                          round.is_north, round.hands,
+                          round.opponent + pair_offset if round.hands else None,
+                          round.relay_table)
+            for round in rounds]
+      # Every section needs its own copies of the boards, so hands are
+      # prepared per section.
+      for pair_no, hands in movement.unplayed_hands.items():
+        self.unplayed_hands[pair_offset + pair_no] = hands
+      for pair_no, hands in movement.suggested_prep.items():
+        self.suggested_prep[pair_offset + pair_no] = hands
+      pair_offset += len(movement.pair_dict)
+      table_offset += max(round.table for rounds in movement.pair_dict.values()
+                          for round in rounds if round.hands)
+    self.total_boards = section_movements[0].total_boards
+    self._BuildIndexes()
+
+
+class SwissMovement(Movement):
+  ''' Movement of a Swiss tournament, whose rounds are paired one at a time
+  from the standings rather than fixed in advance. Every table of a round
+  plays the same hands: round r plays hands (r - 1) * hands per round + 1 to
+  r * hands per round.
+
+  Attributes:
+    pair_dict: Dictionary from pair number to movement pair movement
+      where pair movement is a list MovementRounds. Only holds the rounds
+      paired so far.
+    max_rounds: Integer. Number of rounds of the tournament.
+  '''
+  def __init__(self, no_pairs, total_boards, no_hands_per_round, rounds):
+    ''' Initializes the movement from the rounds paired so far.
+
+        Args:
+          no_pairs: Integer. Number of pairs.
+          total_boards: Integer. Number of boards in the tournament.
+          no_hands_per_round: Integer. Number of hands played in each round.
+          rounds: List of (tables, bye) tuples of every paired round in round
+            order. tables is a list of (ns_pair, ew_pair) tuples in table
+            order, bye the pair number sitting out or None.
+
+        Raises:
+          ValueError if the tournament cannot be played as a Swiss tournament
+            or a round is not a valid pairing.
     '''
+    if (no_pairs < 2 or no_hands_per_round < 1 or
+        total_boards % no_hands_per_round != 0):
+      raise ValueError(("Cannot play a Swiss tournament of {} boards with {} " +
+                        "hands per round").format(total_boards,
+                                                  no_hands_per_round))
+    self.max_rounds = total_boards / no_hands_per_round
+    # Every pair needs a new opponent or a bye each round.
+    if self.max_rounds > no_pairs - 1 + no_pairs % 2:
+      raise ValueError(("{} pairs cannot play {} rounds without " +
+                        "rematches").format(no_pairs, self.max_rounds))
+    if len(rounds) > self.max_rounds:
+      raise ValueError("Too many Swiss rounds")
+    self.pair_dict = dict((pair_no, []) for pair_no in xrange(1, no_pairs + 1))
+    self.sections = [(1, no_pairs)]
+    relay_table = no_pairs > 3
+    for round_index, (tables, bye) in enumerate(rounds):
+      round_no = round_index + 1
+      hands = range(round_index * no_hands_per_round + 1,
+                    round_no * no_hands_per_round + 1)
+      for table_index, (ns_pair, ew_pair) in enumerate(tables):
+        self.pair_dict[ns_pair].append(MovementRound(
+            round_no, table_index + 1, True, hands, ew_pair, relay_table))
+        self.pair_dict[ew_pair].append(MovementRound(
+            round_no, table_index + 1, False, hands, ns_pair, relay_table))
+      if bye:
+        self.pair_dict[bye].append(
+            MovementRound(round_no, None, None, [], None, None))
+      if any(len(r) != round_no for r in self.pair_dict.values()):
+        raise ValueError("Round {} does not seat every pair once".format(
+            round_no))
+    self._CalculateUnplayedHands()
     self.suggested_prep = {}
-    if not self.unplayed_hands:
-      return
-    max_unplayed_hands =  max([len(x) for x in self.unplayed_hands.values()])
-    hands = set()
-    for i in range(max_unplayed_hands):
-      for team in range (1, len(self.pair_dict) + 1):
-        unplayed_hands = self.GetUnplayedHands(team)
-        for j in range (i, len(unplayed_hands)):
-          hand = unplayed_hands[j]
-          if not hand in hands:
-            hands.add(hand)
-            self.suggested_prep.setdefault(team, []).append(hand)
-            break
+    self._BuildIndexes()
+
+  def GetNumRounds(self):
+    '''Returns the number of rounds paired so far.'''
+    return len(self.pair_dict[1])
+
+
+def Preload():
+  ''' Builds and caches every movement of the bundle and the board
+  configurations of every field size a movement can be generated for.
+
+  Generated movements are still built on first use, since generating all of
+  them takes far longer than a warmup request should.
+
+  Returns:
+    Number of movements built.
+  '''
+  for key in _BUNDLE["movements"]:
+    Movement.CreateMovement(*key)
+  for no_pairs in xrange(2, movement_generator.MAX_PAIRS + 1):
+    Movement.FeasibleConfigurations(no_pairs)
+  return len(_BUNDLE["movements"])
+
 
+if __name__ == "__main__":
+  WriteBundle()
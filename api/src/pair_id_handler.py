@@ -3,16 +3,22 @@ import json
 
 from generic_handler import GenericHandler
 from google.appengine.api import users
-from google.appengine.ext import ndb
+from google.appengine.api import datastore_errors
+from google.appengine.datastore.datastore_query import Cursor
+from handler_utils import CheckUserLoggedInAndMaybeReturnStatus
 from handler_utils import CheckUserOwnsTournamentAndMaybeReturnStatus
 from handler_utils import GetTourneyWithIdAndMaybeReturnStatus
 from handler_utils import is_int
 from handler_utils import TourneyDoesNotExistStatus
 from handler_utils import SetErrorStatus
 from models import HandScore
+from models import PairCode
 from models import Tournament
 from models import PlayerPair
 
+# Number of PlayerPairs backfilled per request to /api/admin/paircodes.
+BACKFILL_BATCH_SIZE = 200
+
 class PairIdHandler(GenericHandler):
   ''' Handles requests to /api/tournament/pairno/:pair_id. Responsible for
       identifying the tournament/pair combination corresponding to an 
@@ -25,15 +31,15 @@ class PairIdHandler(GenericHandler):
         Args: 
           pair_id: Opaque secret ID used to look up information for the user.
     ''' 
-    player_pairs = PlayerPair._query(ndb.GenericProperty('id') == 
-        pair_id).fetch(projection=[PlayerPair.pair_no])
-    if not player_pairs:
+    pairs = PairCode.Resolve(pair_id)
+    if not pairs:
       SetErrorStatus(self.response, 404, "Invalid Id",
                      "Pair number with this ID does not exist")
       return
     info_dict = {
-      'tournament_infos' : [ {'pair_no' : p.pair_no,
-                              'tournament_id' : str(p.key.parent().id()) } for p in player_pairs ]
+      'tournament_infos' : [ {'pair_no' : pair_no,
+                              'tournament_id' : str(tourney_id) }
+                             for tourney_id, pair_no in pairs ]
     }
 
     self.response.headers['Content-Type'] = 'application/json'
@@ -65,16 +71,15 @@ class TourneyPairIdHandler(GenericHandler):
     if not CheckUserOwnsTournamentAndMaybeReturnStatus(self.response, 
         users.get_current_user(), tourney):
       return
-    player_pairs = PlayerPair._query(ndb.GenericProperty('pair_no') == 
-        int(pair_no), ancestor=tourney.key).fetch(1, projection=[PlayerPair.id])
-    if not player_pairs:
+    player_pair = PlayerPair.GetByPairNo(tourney, int(pair_no))
+    if not player_pair:
       SetErrorStatus(self.response, 404, "Invalid Id",
                      "Pair pair number {} does not exist in this " + 
                          "tournament".format(pair_no))
       return
     self.response.headers['Content-Type'] = 'application/json'
     self.response.set_status(200)
-    self.response.out.write(json.dumps({'pair_id' : player_pairs[0].id}, indent=2))
+    self.response.out.write(json.dumps({'pair_id' : player_pair.id}, indent=2))
 
 
 class TourneyPairIdsHandler(GenericHandler):
@@ -109,4 +114,48 @@ class TourneyPairIdsHandler(GenericHandler):
     self.response.headers['Content-Type'] = 'application/json'
     self.response.set_status(200)
     self.response.out.write(
-        json.dumps({"pair_ids" : [p.id for p in player_pairs]}, indent=2))
\ No newline at end of file
+        json.dumps({"pair_ids" : [p.id for p in player_pairs]}, indent=2))
+
+
+class PairCodeBackfillHandler(GenericHandler):
+  ''' Handles requests to /api/admin/paircodes. Responsible for the one-off
+      migration that indexes the codes handed out before PairCodes existed, so
+      that codes are only ever resolved and checked for uniqueness through
+      their PairCodes.
+  '''
+  def post(self):
+    ''' Indexes the codes of the next batch of PlayerPairs of all
+        tournaments.
+
+        See api for request and response documentation.
+    '''
+    user = users.get_current_user()
+    if not CheckUserLoggedInAndMaybeReturnStatus(self.response, user):
+      return
+    if not users.is_current_user_admin():
+      SetErrorStatus(self.response, 403, "Forbidden User",
+                     "Only administrators can backfill pair codes")
+      return
+    try:
+      request_dict = json.loads(self.request.body) if self.request.body else {}
+      cursor = request_dict.get('cursor')
+      cursor = Cursor(urlsafe=cursor) if cursor else None
+    except (ValueError, TypeError, AttributeError,
+            datastore_errors.BadValueError):
+      SetErrorStatus(self.response, 400, "Invalid Input",
+                     "cursor must be a cursor returned by an earlier request")
+      return
+
+    player_pairs, next_cursor, more = PlayerPair.query().fetch_page(
+        BACKFILL_BATCH_SIZE, start_cursor=cursor)
+    futures = [PairCode.AddLegacyPairAsync(p.id, p.key.parent().id(),
+                                           p.pair_no)
+               for p in player_pairs if p.id]
+    backfilled = len([f for f in futures if f.get_result()])
+
+    self.response.headers['Content-Type'] = 'application/json'
+    self.response.set_status(200)
+    self.response.out.write(json.dumps(
+        {'backfilled' : backfilled,
+         'cursor' : next_cursor.urlsafe() if more and next_cursor else None},
+        indent=2))
@@ -0,0 +1,89 @@
+import json
+
+from generic_handler import GenericHandler
+from google.appengine.api import users
+from handler_utils import GetPairIdFromRequest
+from handler_utils import GetTourneyMovementAndMaybeSetStatus
+from handler_utils import GetTourneyWithIdAndMaybeReturnStatus
+from handler_utils import is_int
+from handler_utils import SetErrorStatus
+from models import PairCode
+from python.projection import Projection
+
+DEFAULT_SIMULATIONS = 1000
+MAX_SIMULATIONS = 10000
+# Stop simulating well before the request deadline.
+SIMULATION_DEADLINE_SEC = 20
+
+
+class ProjectionHandler(GenericHandler):
+  ''' Handles requests to /api/tournaments/:id/projection '''
+
+  def get(self, id):
+    ''' Projects the final placings of an unfinished tournament.
+
+    Args:
+      id: String. Tournament id.
+
+    See api for request and response documentation.
+    '''
+    tourney = GetTourneyWithIdAndMaybeReturnStatus(self.response, id)
+    if not tourney:
+      return
+
+    if not self._CheckUserHasAccessMaybeSetStatus(tourney):
+      return
+
+    num_simulations = self.request.get("simulations", str(DEFAULT_SIMULATIONS))
+    if (not is_int(num_simulations) or int(num_simulations) < 1 or
+        int(num_simulations) > MAX_SIMULATIONS):
+      SetErrorStatus(self.response, 400, "Invalid Request",
+                     "simulations must be an integer between 1 and {}".format(
+                         MAX_SIMULATIONS))
+      return
+
+    movement = GetTourneyMovementAndMaybeSetStatus(self.response, tourney)
+    if not movement:
+      return
+
+    hand_list = tourney.GetStandings().HandList()
+    scored_hands = set((h["board_no"], h["ns_pair"], h["ew_pair"])
+                       for h in hand_list)
+    unplayed_hands = []
+    for board_no in xrange(1, movement.total_boards + 1):
+      for ns_pair, ew_pair in movement.GetListOfPlayersForHand(board_no):
+        if (board_no, ns_pair, ew_pair) not in scored_hands:
+          unplayed_hands.append((board_no, ns_pair, ew_pair))
+
+    try:
+      projection = Projection(hand_list, unplayed_hands)
+    except ValueError:
+      SetErrorStatus(self.response, 400, "Cannot Project Results",
+                     "No hands have been scored yet.")
+      return
+    result = projection.Run(int(num_simulations), SIMULATION_DEADLINE_SEC)
+    self.response.headers['Content-Type'] = 'application/json'
+    self.response.set_status(200)
+    self.response.out.write(json.dumps(result, indent=2))
+
+  def _CheckUserHasAccessMaybeSetStatus(self, tourney):
+    ''' Tests if the current user may see projections for this tournament.
+
+    Directors always have access. Players have access if the request carries
+    the pair code of a pair in this tournament.
+
+    Args:
+      tourney: Tournament. Current tournament.
+
+    Returns:
+      True iff the user has access. Sets a 403 status otherwise.
+    '''
+    user = users.get_current_user()
+    if user and tourney.owner_id == user.user_id():
+      return True
+    if PairCode.ResolveInTourney(tourney, GetPairIdFromRequest(self.request)):
+      return True
+    SetErrorStatus(self.response, 403, "Forbidden User",
+                   "User does not own tournament and is not authenticated " +
+                   "with a pair code of this tournament.")
+    return False
@@ -2,17 +2,15 @@ import webapp2
 import json
 
 from generic_handler import GenericHandler
-from python.calculator import Calculate
-from python.calculator import GetMaxRounds
 from google.appengine.api import users
-from handler_utils import BuildMovementAndMaybeSetStatus
 from handler_utils import CheckUserOwnsTournamentAndMaybeReturnStatus
+from handler_utils import GetTourneyMovementAndMaybeSetStatus
 from handler_utils import GetTourneyWithIdAndMaybeReturnStatus
 from handler_utils import SetErrorStatus
-from python.jsonio import ReadJSONInput
-from python.jsonio import OutputJSON
+from python.jsonio import OutputJSONChunks
 from python.xlsxio import WriteResultsToXlsx
 from python.xlsxio import OutputWorkbookAsBytesIO
+from models import HandScore
 from models import PlayerPair
 from models import Tournament
 
@@ -46,9 +44,7 @@ class CompleteScoringHandler(GenericHandler):
         users.get_current_user(), tourney):
       return
     
-    movement = BuildMovementAndMaybeSetStatus(
-        self.response, tourney.no_pairs, tourney.no_boards,
-        tourney.legacy_version_id)
+    movement = GetTourneyMovementAndMaybeSetStatus(self.response, tourney)
     if not movement:
       return
 
@@ -111,12 +107,19 @@ class ResultHandler(GenericHandler):
     if not CheckUserOwnsTournamentAndMaybeReturnStatus(self.response,
         users.get_current_user(), tourney):
       return
-    hand_list = tourney.GetScoredHandList()
-    boards = ReadJSONInput(hand_list)
-    summaries = Calculate(boards, GetMaxRounds(boards))
+    standings = tourney.GetStandings()
+    hand_list = sorted(standings.HandList(),
+                       key=lambda h: HandScore.CreateKeyId(
+                           h["board_no"], h["ns_pair"], h["ew_pair"]))
+    summaries = standings.Results().team_summaries()
+    sections = tourney.GetSections()
     self.response.headers['Content-Type'] = 'application/json'
     self.response.set_status(200)
-    self.response.out.write(OutputJSON(hand_list, summaries))
+    # The response buffers every chunk and sends the body at once, but the
+    # results are never joined into one more string on the way.
+    for chunk in OutputJSONChunks(hand_list, summaries,
+                                  sections if len(sections) > 1 else None):
+      self.response.out.write(chunk)
 
 
 class XlxsResultHandler(GenericHandler):
@@ -128,14 +131,13 @@ class XlxsResultHandler(GenericHandler):
     if not CheckUserOwnsTournamentAndMaybeReturnStatus(self.response,
         users.get_current_user(), tourney):
       return
-    boards = ReadJSONInput(tourney.GetScoredHandList())
-    max_rounds = GetMaxRounds(boards)
-    summaries = Calculate(boards, max_rounds)
-    mp_summaries = summaries
-    ap_summaries = summaries
-    boards.sort(key=lambda bs : bs._board_no, reverse = False)
-    wb = WriteResultsToXlsx(max_rounds, mp_summaries, ap_summaries, boards,
-                            name_list=GetPlayerListForTourney(tourney))
+    results = tourney.GetStandings().Results()
+    mp_summaries = results.rankings().Ordered("MP")
+    ap_summaries = results.rankings().Ordered("AP")
+    wb = WriteResultsToXlsx(results.max_rounds(), mp_summaries, ap_summaries,
+                            results.boards(),
+                            name_list=GetPlayerListForTourney(tourney),
+                            sections=tourney.GetSections())
     self.response.out.write(OutputWorkbookAsBytesIO(wb).getvalue())
     self.response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     self.response.headers['Content-disposition'] = str('attachment; filename=' + 
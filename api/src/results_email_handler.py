@@ -1,6 +1,5 @@
 import StringIO
 import json
-from collections import defaultdict
 
 from google.appengine.api import mail
 from google.appengine.api import users
@@ -8,17 +7,12 @@ from google.appengine.api.app_identity import get_application_id
 from google.appengine.ext import ndb
 
 from generic_handler import GenericHandler
-from handler_utils import BuildMovementAndMaybeSetStatus
 from handler_utils import CheckUserOwnsTournamentAndMaybeReturnStatus
+from handler_utils import GetTourneyMovementAndMaybeSetStatus
 from handler_utils import GetTourneyWithIdAndMaybeReturnStatus
 from handler_utils import SetErrorStatus
 from model_utils import ListOfModelBoardsToListOfBoards
-from model_utils import ListOfScoredHandsToListOfDicts
 from python import pdfrenderer
-from python.calculator import Calculate
-from python.calculator import GetMaxRounds
-from python.calculator import OrderBy
-from python.jsonio import ReadJSONInput
 from python.teams import ExtractTeamNames
 from python.xlsxio import OutputWorkbookAsBytesIO
 from python.xlsxio import WriteResultsToXlsx
@@ -51,75 +45,73 @@ class ResultsEmailHandler(GenericHandler):
     if not request_dict:
       return
 
-    scored_hands_future = tourney.GetScoredHandListAsync()
     player_futures = tourney.GetAllPlayerPairsAsync()
     boards_future = tourney.GetBoardsAsync()
+    standings = tourney.GetStandings()
 
-    if not self._CheckIfAllHandsScoredAndMaybeSetStatus(tourney, scored_hands_future):
+    if not self._CheckIfAllHandsScoredAndMaybeSetStatus(tourney, standings):
       return
 
-    hand_list = ListOfScoredHandsToListOfDicts(scored_hands_future.get_result())
-    hand_results = ReadJSONInput(hand_list)
-    max_rounds = GetMaxRounds(hand_results)
-    summaries = Calculate(hand_results, max_rounds)
+    results = standings.Results()
+    hand_results = results.boards()
+    mp_summaries = results.rankings().Ordered("MP")
 
     # TODO: Generate results asynchronously in parallel.
-    xls_results = self._GenerateXlsxResults(hand_results, max_rounds, player_futures, summaries,
-                                            tourney)
+    xls_results = self._GenerateXlsxResults(results, player_futures, tourney)
 
     boards = ListOfModelBoardsToListOfBoards(boards_future.get_result())
-    pdf_results = self._GeneratePdfResults(boards, hand_results, player_futures, summaries, tourney)
+    pdf_results = self._GeneratePdfResults(boards, hand_results, player_futures, mp_summaries,
+                                           tourney)
 
     payloads = [xls_results, pdf_results]
 
-    self._SendEmails(request_dict, user, tourney, player_futures, summaries, payloads)
+    self._SendEmails(request_dict, user, tourney, player_futures, mp_summaries, payloads)
     self.response.headers['Content-Type'] = 'application/json'
     self.response.set_status(201)
 
   def _GeneratePdfResults(self, boards, hand_results, player_futures, summaries, tourney):
     outputStream = StringIO.StringIO()
     pdfrenderer.RenderResultsToIo(tourney.name, boards, hand_results, summaries, player_futures,
-                                  outputStream)
+                                  outputStream, sections=tourney.GetSections())
     pdf_results = outputStream.getvalue()
     return pdf_results
 
-  def _GenerateXlsxResults(self, boards, max_rounds, player_futures, summaries, tourney):
+  def _GenerateXlsxResults(self, results, player_futures, tourney):
     pair_list = _GetNamePairList(tourney, player_futures)
+    rankings = results.rankings()
     return OutputWorkbookAsBytesIO(
-      WriteResultsToXlsx(max_rounds, summaries, summaries, boards, name_list=pair_list)).getvalue()
+      WriteResultsToXlsx(results.max_rounds(), rankings.Ordered("MP"), rankings.Ordered("AP"),
+                         results.boards(), name_list=pair_list,
+                         sections=tourney.GetSections())).getvalue()
 
-  def _CheckIfAllHandsScoredAndMaybeSetStatus(self, tourney, scored_hands_future):
+  def _CheckIfAllHandsScoredAndMaybeSetStatus(self, tourney, standings):
     """ Checks if all the hands in the tournament have been scored. If not, sets
     the appropriate status.
     
     Args:
       tourney: Tournament object.
-      scored_hands_future: Future of a list of ScoredHand obects.
+      standings: Standings of the tournament.
 
     Returns: True iff all hands are scored for this tournament.
     """
-    movement = BuildMovementAndMaybeSetStatus(
-      self.response, tourney.no_pairs, tourney.no_boards,
-      tourney.legacy_version_id)
+    movement = GetTourneyMovementAndMaybeSetStatus(self.response, tourney)
     if not movement:
       SetErrorStatus(self.response, 400, "Invalid Tournament",
                      "Cannot build movement for this tournament.")
       return False
-    scored_hands = ListOfScoredHandsToListOfDicts(scored_hands_future.get_result())
-    north_team_to_scored_hands = defaultdict(list)
-    for hand in scored_hands:
-      north_team_to_scored_hands[hand["ns_pair"]].append(hand["board_no"])
-    for round_no in xrange(1, movement.GetNumRounds() + 1):
-      for team_no in xrange(1, tourney.no_pairs + 1):
-        round = movement.GetMovement(team_no)[round_no - 1]
-        hands = round.hands
-        if not hands or not round.is_north:
-          continue
-        for hand in hands:
-          if hand not in north_team_to_scored_hands.get(team_no, []):
-            SetErrorStatus(self.response, 400, "Cannot Compute Results",
-                           "Not all hands are scored yet.")
-            return False
+    if (tourney.swiss_hands_per_round and
+        movement.GetNumRounds() < movement.max_rounds):
+      SetErrorStatus(self.response, 400, "Cannot Compute Results",
+                     "Not all Swiss rounds are paired yet.")
+      return False
+    scored_hands = set((h["board_no"], h["ns_pair"], h["ew_pair"])
+                       for h in standings.HandList())
+    for board_no in xrange(1, movement.total_boards + 1):
+      for ns_pair, ew_pair in movement.GetListOfPlayersForHand(board_no):
+        if (board_no, ns_pair, ew_pair) not in scored_hands:
+          SetErrorStatus(self.response, 400, "Cannot Compute Results",
+                         "Not all hands are scored yet.")
+          return False
     return True
 
   def _SendEmails(self, request_dict, user, tourney, tourney_player_pair_futures,
@@ -131,10 +123,10 @@ class ResultsEmailHandler(GenericHandler):
       request_dict: Parsed JSON dict.
       user: The ndb.User owning this tournament.
       tourney: The tournament model object. 
+      summaries: TeamSummaries in descending MP order.
     """
     assert len(summaries) > 3
     requested_emails = request_dict["emails"]
-    OrderBy(summaries, "MP")
 
     found_tournament_director = False
     winner = ExtractTeamNames(summaries[0].team_no, tourney_player_pair_futures, "Team ")
@@ -0,0 +1,116 @@
+import json
+
+from generic_handler import GenericHandler
+from google.appengine.api import users
+from handler_utils import CheckUserOwnsTournamentAndMaybeReturnStatus
+from handler_utils import GetTourneyMovementAndMaybeSetStatus
+from handler_utils import GetTourneyWithIdAndMaybeReturnStatus
+from handler_utils import SetErrorStatus
+from models import SwissRound
+from swiss_pairing import PairNextRound
+
+
+class SwissRoundHandler(GenericHandler):
+  ''' Handles requests to /api/tournaments/:id/swiss '''
+
+  def get(self, id):
+    ''' Lists the paired rounds of a Swiss tournament.
+
+    See api for request and response documentation.
+    '''
+    tourney = GetTourneyWithIdAndMaybeReturnStatus(self.response, id)
+    if not tourney:
+      return
+
+    if not CheckUserOwnsTournamentAndMaybeReturnStatus(self.response,
+        users.get_current_user(), tourney):
+      return
+
+    if not self._CheckSwissTourneyAndMaybeSetStatus(tourney):
+      return
+
+    movement = GetTourneyMovementAndMaybeSetStatus(self.response, tourney)
+    if not movement:
+      return
+    self._WriteRounds(200, movement, SwissRound.GetAll(tourney))
+
+  def post(self, id):
+    ''' Pairs the next round of a Swiss tournament from the current standings.
+
+    See api for request and response documentation.
+    '''
+    tourney = GetTourneyWithIdAndMaybeReturnStatus(self.response, id)
+    if not tourney:
+      return
+
+    if not CheckUserOwnsTournamentAndMaybeReturnStatus(self.response,
+        users.get_current_user(), tourney):
+      return
+
+    if not self._CheckSwissTourneyAndMaybeSetStatus(tourney):
+      return
+
+    movement = GetTourneyMovementAndMaybeSetStatus(self.response, tourney)
+    if not movement:
+      return
+    round_no = movement.GetNumRounds() + 1
+    if round_no > movement.max_rounds:
+      SetErrorStatus(self.response, 400, "Invalid Request",
+                     "All {} rounds have already been paired".format(
+                         movement.max_rounds))
+      return
+
+    standings = tourney.GetStandings()
+    scored_hands = len(standings.HandList())
+    expected_hands = sum(len(r.hands) for rounds in movement.pair_dict.values()
+                         for r in rounds if r.is_north)
+    if scored_hands < expected_hands:
+      SetErrorStatus(self.response, 400, "Invalid Request",
+                     ("{} hands of the previous rounds have not been " +
+                      "scored").format(expected_hands - scored_hands))
+      return
+
+    ranking = [ts.team_no for ts in
+               standings.Results().rankings().Ordered("MP")]
+    ranking += [pair_no for pair_no in xrange(1, tourney.no_pairs + 1)
+                if pair_no not in ranking]
+    tables, bye = PairNextRound(movement, ranking)
+    SwissRound.Create(tourney, round_no, tables, bye)
+    movement = GetTourneyMovementAndMaybeSetStatus(self.response, tourney)
+    if not movement:
+      return
+    self._WriteRounds(201, movement, SwissRound.GetAll(tourney))
+
+  def _CheckSwissTourneyAndMaybeSetStatus(self, tourney):
+    ''' Checks that tourney is a Swiss tournament.
+
+    Side effects:
+      Sets the response status to 400 if it is not.
+    '''
+    if not tourney.swiss_hands_per_round:
+      SetErrorStatus(self.response, 400, "Invalid Request",
+                     "Tournament is not a Swiss tournament")
+      return False
+    return True
+
+  def _WriteRounds(self, status, movement, swiss_rounds):
+    ''' Writes the tables of every paired round to the response.
+
+    Args:
+      status: Integer. Response status.
+      movement: SwissMovement of the paired rounds.
+      swiss_rounds: List of SwissRounds in round order.
+    '''
+    round_list = []
+    for swiss_round in swiss_rounds:
+      tables, bye = swiss_round.Pairings()
+      round_list.append({
+          "round": swiss_round.key.id(),
+          "tables": [{"table": i + 1, "ns_pair": ns_pair, "ew_pair": ew_pair}
+                     for i, (ns_pair, ew_pair) in enumerate(tables)],
+          "bye": bye})
+    self.response.headers['Content-Type'] = 'application/json'
+    self.response.set_status(status)
+    self.response.out.write(json.dumps({"rounds": round_list,
+                                        "max_rounds": movement.max_rounds},
+                                       indent=2))
@@ -0,0 +1,208 @@
+''' Pairs the rounds of a Swiss tournament.
+
+Every round is paired from the current standings: the best ranked pair plays
+the best ranked pair it has not met yet, and so on down the field, so pairs
+meet opponents with scores as close to theirs as possible and never twice.
+When an odd field needs a bye, it goes to the lowest ranked pair with the
+fewest byes.
+
+Pairs that have not met are the edges of a graph, and a round without
+rematches is a perfect matching of it. One is found with Edmonds' blossom
+algorithm, then tables are fixed from the top of the ranking down, each pair
+with the closest ranked opponent that still leaves a perfect matching of the
+rest. Checking that takes a single augmenting path search, so even the last
+rounds of large fields pair in polynomial time, and a round has rematches
+only if no round without them exists, as few as a maximum matching allows.
+'''
+
+def PairNextRound(movement, ranking):
+  ''' Pairs the round after the last round of movement.
+
+  Args:
+    movement: SwissMovement of the rounds paired so far.
+    ranking: List of all pair numbers, best first.
+
+  Returns:
+    Tuple (tables, bye). tables is a list of (ns_pair, ew_pair) tuples, best
+    ranked table first. bye is the pair number sitting out, or None.
+  '''
+  opponents = {}
+  byes = {}
+  ns_rounds = {}
+  for pair_no, rounds in movement.pair_dict.items():
+    opponents[pair_no] = set(r.opponent for r in rounds if r.hands)
+    byes[pair_no] = len([r for r in rounds if not r.hands])
+    ns_rounds[pair_no] = len([r for r in rounds if r.hands and r.is_north])
+  return PairRound(ranking, opponents, byes, ns_rounds)
+
+
+def PairRound(ranking, opponents, byes, ns_rounds):
+  ''' Pairs a round of a Swiss tournament.
+
+  Args:
+    ranking: List of all pair numbers, best first.
+    opponents: Dict from pair number to the set of pairs it has played.
+    byes: Dict from pair number to the number of byes it has had.
+    ns_rounds: Dict from pair number to the number of rounds it has played
+      North/South.
+
+  Returns:
+    Tuple (tables, bye) as in PairNextRound.
+  '''
+  ranking = list(ranking)
+  bye = None
+  if len(ranking) % 2 == 1:
+    fewest_byes = min(byes.get(p, 0) for p in ranking)
+    bye = [p for p in ranking if byes.get(p, 0) == fewest_byes][-1]
+    ranking.remove(bye)
+
+  matches = _Match(ranking, opponents)
+
+  tables = []
+  for higher, lower in matches:
+    # Seat the pair that has sat North/South less often there, the better
+    # ranked one on ties.
+    if ns_rounds.get(lower, 0) < ns_rounds.get(higher, 0):
+      tables.append((lower, higher))
+    else:
+      tables.append((higher, lower))
+  return (tables, bye)
+
+
+def _Match(ranking, opponents):
+  ''' Pairs ranking, each pair with the closest ranked opponent it has not
+  played that still lets the rest of the field be paired without rematches.
+  If the field cannot be paired without rematches at all, the pairs a maximum
+  matching leaves over play each other first.
+
+  Returns:
+    List of (higher ranked pair, lower ranked pair) tuples in ranking order.
+  '''
+  n = len(ranking)
+  # Indices into ranking of the pairs each pair has not played, closest
+  # ranked first.
+  adjacent = []
+  for i in xrange(n):
+    played = opponents.get(ranking[i], ())
+    adjacent.append(sorted(
+        (j for j in xrange(n) if j != i and ranking[j] not in played),
+        key=lambda j: abs(j - i)))
+  match = [-1] * n
+  fixed = [False] * n
+  for i in xrange(n):
+    if match[i] == -1:
+      j = next((j for j in adjacent[i] if match[j] == -1), -1)
+      if j != -1:
+        match[i], match[j] = j, i
+  for i in xrange(n):
+    if match[i] == -1:
+      end, parent = _FindAugmentingPath(adjacent, match, fixed, i)
+      if end != -1:
+        _Augment(match, parent, end)
+
+  tables = []
+  # Pairs left over by a maximum matching have all played each other.
+  left_over = [i for i in xrange(n) if match[i] == -1]
+  for k in xrange(0, len(left_over), 2):
+    tables.append((left_over[k], left_over[k + 1]))
+    fixed[left_over[k]] = fixed[left_over[k + 1]] = True
+
+  for i in xrange(n):
+    if fixed[i]:
+      continue
+    for j in adjacent[i]:
+      if fixed[j]:
+        continue
+      if match[i] != j:
+        # Pair i with j and rematch their partners with each other's.
+        saved = list(match)
+        a, b = match[i], match[j]
+        match[i], match[j], match[a], match[b] = j, i, -1, -1
+        fixed[i] = fixed[j] = True
+        end, parent = _FindAugmentingPath(adjacent, match, fixed, a)
+        if end == -1:
+          match[:] = saved
+          fixed[i] = fixed[j] = False
+          continue
+        _Augment(match, parent, end)
+      fixed[i] = fixed[j] = True
+      tables.append((i, j))
+      break
+  tables.sort()
+  return [(ranking[i], ranking[j]) for i, j in tables]
+
+
+def _FindAugmentingPath(adjacent, match, fixed, root):
+  ''' Searches for an augmenting path of match from the unmatched root,
+  ignoring fixed vertices, with Edmonds' blossom algorithm.
+
+  Returns:
+    Tuple (end, parent). end is the unmatched vertex the path ends in, or -1 if
+    there is none. parent leads back from end to root as _Augment expects.
+  '''
+  n = len(adjacent)
+  parent = [-1] * n
+  base = range(n)
+  used = [False] * n
+  used[root] = True
+  queue = [root]
+
+  def Lca(a, b):
+    seen = [False] * n
+    while True:
+      a = base[a]
+      seen[a] = True
+      if match[a] == -1:
+        break
+      a = parent[match[a]]
+    while True:
+      b = base[b]
+      if seen[b]:
+        return b
+      b = parent[match[b]]
+
+  def MarkPath(v, lca, child, blossom):
+    while base[v] != lca:
+      blossom[base[v]] = blossom[base[match[v]]] = True
+      parent[v] = child
+      child = match[v]
+      v = parent[match[v]]
+
+  head = 0
+  while head < len(queue):
+    v = queue[head]
+    head += 1
+    for to in adjacent[v]:
+      if fixed[to] or base[v] == base[to] or match[v] == to:
+        continue
+      if to == root or (match[to] != -1 and parent[match[to]] != -1):
+        # Contract the odd cycle through v and to into a blossom.
+        lca = Lca(v, to)
+        blossom = [False] * n
+        MarkPath(v, lca, to, blossom)
+        MarkPath(to, lca, v, blossom)
+        for i in xrange(n):
+          if blossom[base[i]]:
+            base[i] = lca
+            if not used[i]:
+              used[i] = True
+              queue.append(i)
+      elif parent[to] == -1:
+        parent[to] = v
+        if match[to] == -1:
+          return (to, parent)
+        used[match[to]] = True
+        queue.append(match[to])
+  return (-1, parent)
+
+
+def _Augment(match, parent, end):
+  ''' Flips the augmenting path ending in end, found by _FindAugmentingPath,
+  so that it matches one more vertex.
+  '''
+  v = end
+  while v != -1:
+    previous = parent[v]
+    next_v = match[previous]
+    match[v], match[previous] = previous, v
+    v = next_v
@@ -8,11 +8,16 @@ from handler_utils import BuildMovementAndMaybeSetStatus
 from handler_utils import CheckUserOwnsTournamentAndMaybeReturnStatus
 from handler_utils import GetTourneyWithIdAndMaybeReturnStatus
 from handler_utils import is_int
+from handler_utils import is_optional_positive_int
+from handler_utils import is_positive_int
 from handler_utils import TourneyDoesNotExistStatus
 from handler_utils import SetErrorStatus
 from models import HandScore
 from models import Tournament
 from models import PlayerPair
+from models import SwissRound
+from movements import MAX_SECTIONS
+from python import board
 
 class TourneyHandler(GenericHandler):
   ''' Handles reuqests to /api/tournament/:id. Responsible for all things
@@ -36,6 +41,8 @@ class TourneyHandler(GenericHandler):
       return
     combined_dict = {'no_pairs' : tourney.no_pairs,
                      'no_boards' :tourney.no_boards,
+                     'no_sections' : tourney.no_sections or 1,
+                     'swiss_hands_per_round' : tourney.swiss_hands_per_round,
                      'name' : tourney.name,
                      'allow_score_overwrites' : tourney.IsUnlocked(),
                      'hands' : tourney.GetScoredHandList()}
@@ -70,22 +77,41 @@ class TourneyHandler(GenericHandler):
     name = request_dict['name']
     no_pairs = request_dict['no_pairs']
     no_boards = request_dict['no_boards']
+    # Clients that predate sections do not send no_sections. Keep the current
+    # setting rather than dropping the tournament back to one section.
+    no_sections = request_dict.get('no_sections', tourney.no_sections or 1)
+    # An explicit null turns a Swiss tournament into one with a fixed movement.
+    swiss_hands_per_round = request_dict.get('swiss_hands_per_round',
+                                             tourney.swiss_hands_per_round)
     player_list = request_dict.get('players')
     allow_score_overwrites = request_dict.get('allow_score_overwrites', False)
     if not self._CheckValidTournamentInfoAndMaybeSetStatus(name, no_pairs,
                                                            no_boards,
                                                            player_list,
-                                                           tourney.legacy_version_id):
+                                                           tourney.legacy_version_id,
+                                                           no_sections,
+                                                           swiss_hands_per_round):
       return
-    if ((tourney.no_pairs != no_pairs or tourney.no_boards != no_boards) and
-         len(tourney.GetScoredHandList()) != 0):
+    config_changed = (tourney.no_pairs != no_pairs or
+                      tourney.no_boards != no_boards or
+                      (tourney.no_sections or 1) != no_sections or
+                      tourney.swiss_hands_per_round != swiss_hands_per_round)
+    if config_changed and len(tourney.GetScoredHandList()) != 0:
       SetErrorStatus(self.response, 400, "Invalid Request",
                      "Tournament already has registered hands")
       return
+    if config_changed and tourney.swiss_hands_per_round:
+      # Swiss rounds were paired for the old configuration.
+      ndb.delete_multi_async(
+          SwissRound.query(ancestor=tourney.key).fetch(keys_only=True))
    
+    if no_boards > tourney.no_boards:
+      tourney.PutMissingBoards(board.GenerateBoards(no_boards))
     old_no_pairs = tourney.no_pairs   
     tourney.no_pairs = no_pairs
     tourney.no_boards = no_boards
+    tourney.no_sections = no_sections
+    tourney.swiss_hands_per_round = swiss_hands_per_round
     tourney.name = name
     if allow_score_overwrites:
       tourney.Unlock()
@@ -107,6 +133,9 @@ class TourneyHandler(GenericHandler):
       return
 
     self.response.set_status(204)
+    # Pair codes are not children of the tournament.
+    ndb.Future.wait_all(tourney.ReleasePairCodesAsync(
+        PlayerPair.query(ancestor=tourney.key).fetch()))
     ndb.delete_multi(ndb.Query(ancestor=tourney.key).iter(keys_only = True))
 
 
@@ -130,6 +159,15 @@ class TourneyHandler(GenericHandler):
       SetErrorStatus(self.response, 400, "Invalid Input",
                      "no_boards must be an integer")
       return None
+    elif not is_positive_int(request_dict.get('no_sections', 1)):
+      SetErrorStatus(self.response, 400, "Invalid Input",
+                     "no_sections must be a positive integer")
+      return None
+    elif not is_optional_positive_int(
+        request_dict.get('swiss_hands_per_round')):
+      SetErrorStatus(self.response, 400, "Invalid Input",
+                     "swiss_hands_per_round must be null or a positive integer")
+      return None
     elif request_dict.get('players'):
       player_list = request_dict.get('players')
       for player in player_list:
@@ -147,7 +185,9 @@ class TourneyHandler(GenericHandler):
 
   def _CheckValidTournamentInfoAndMaybeSetStatus(self, name, no_pairs,
                                                  no_boards, players=None, 
-                                                 legacy_version_id=None):
+                                                 legacy_version_id=None,
+                                                 no_sections=1,
+                                                 swiss_hands_per_round=None):
     ''' Checks if the input is valid and sane. 
         If not sets the response with the appropriate status and error message.
         Assumes no_pairs and no_boards are integers.
@@ -164,6 +204,11 @@ class TourneyHandler(GenericHandler):
       SetErrorStatus(self.response, 400, "Invalid Input",
                      "Number of boards must be > 0, was {}".format(no_boards))
       return False
+    elif no_sections < 1 or no_sections > MAX_SECTIONS:
+      SetErrorStatus(self.response, 400, "Invalid Input",
+                     "Number of sections must be between 1 and {}, was {}".format(
+                         MAX_SECTIONS, no_sections))
+      return False
     elif players:
       for player in players:
         if player['pair_no'] < 1 or player['pair_no'] > no_pairs:
@@ -172,4 +217,5 @@ class TourneyHandler(GenericHandler):
                              player['pair_no']))
           return False
     return BuildMovementAndMaybeSetStatus(
-        self.response, no_pairs, no_boards, legacy_version_id) is not None
+        self.response, no_pairs, no_boards, legacy_version_id,
+        no_sections, swiss_hands_per_round) is not None
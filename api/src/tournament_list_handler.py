@@ -9,10 +9,14 @@ from handler_utils import BuildMovementAndMaybeSetStatus
 from handler_utils import CheckUserLoggedInAndMaybeReturnStatus
 from handler_utils import CheckValidHandPlayersCombinationAndMaybeSetStatus
 from handler_utils import is_int
+from handler_utils import is_optional_positive_int
+from handler_utils import is_positive_int
 from handler_utils import SetErrorStatus
 from handler_utils import ValidateHandResultMaybeSetStatus
+from models import MIN_GENERATED_BOARDS
 from models import Tournament
 from models import PlayerPair
+from movements import MAX_SECTIONS
 from python import board
 
 
@@ -40,6 +44,8 @@ class TourneyListHandler(GenericHandler):
     name = request_dict['name']
     no_pairs = request_dict['no_pairs']
     no_boards = request_dict['no_boards']
+    no_sections = request_dict.get('no_sections', 1)
+    swiss_hands_per_round = request_dict.get('swiss_hands_per_round')
     player_list = request_dict.get('players')
     allow_score_overwrites = request_dict.get('allow_score_overwrites', False)
 
@@ -47,7 +53,10 @@ class TourneyListHandler(GenericHandler):
                                           name=name,
                                           no_pairs=no_pairs,
                                           no_boards=no_boards,
-                                          boards=board.GenerateBoards(35))
+                                          no_sections=no_sections,
+                                          swiss_hands_per_round=swiss_hands_per_round,
+                                          boards=board.GenerateBoards(
+                                              max(no_boards, MIN_GENERATED_BOARDS)))
     tourney.PutPlayers(player_list, 0)
 
     if allow_score_overwrites:
@@ -72,6 +81,8 @@ class TourneyListHandler(GenericHandler):
     name = new_tournament_dict['name']
     no_pairs = new_tournament_dict['no_pairs']
     no_boards = new_tournament_dict['no_boards']
+    no_sections = new_tournament_dict.get('no_sections', 1)
+    swiss_hands_per_round = new_tournament_dict.get('swiss_hands_per_round')
     player_list = new_tournament_dict.get('players')
     allow_score_overwrites = new_tournament_dict.get('allow_score_overwrites',
                                                      False)
@@ -80,7 +91,10 @@ class TourneyListHandler(GenericHandler):
                                           name = name,
                                           no_pairs=no_pairs,
                                           no_boards=no_boards,
-                                          boards=board.GenerateBoards(35))
+                                          no_sections=no_sections,
+                                          swiss_hands_per_round=swiss_hands_per_round,
+                                          boards=board.GenerateBoards(
+                                              max(no_boards, MIN_GENERATED_BOARDS)))
     tourney.PutPlayers(player_list, 0)
 
     if allow_score_overwrites:
@@ -139,6 +153,15 @@ class TourneyListHandler(GenericHandler):
       SetErrorStatus(self.response, 400, "Invalid Input",
                      "no_boards must be an integer")
       return None
+    elif not is_positive_int(request_dict.get('no_sections', 1)):
+      SetErrorStatus(self.response, 400, "Invalid Input",
+                     "no_sections must be a positive integer")
+      return None
+    elif not is_optional_positive_int(
+        request_dict.get('swiss_hands_per_round')):
+      SetErrorStatus(self.response, 400, "Invalid Input",
+                     "swiss_hands_per_round must be null or a positive integer")
+      return None
     elif request_dict.get('players'):
       player_list = request_dict.get('players')
       for player in player_list:
@@ -208,7 +231,9 @@ class TourneyListHandler(GenericHandler):
 
 
   def _CheckValidTournamentInfoAndMaybeSetStatus(self, name, no_pairs,
-                                                 no_boards, players=None):
+                                                 no_boards, players=None,
+                                                 no_sections=1,
+                                                 swiss_hands_per_round=None):
     ''' Checks if the input is valid and sane. 
         If not sets the response with the appropriate status and error message.
         Assumes no_pairs and no_boards are integers.
@@ -225,6 +250,11 @@ class TourneyListHandler(GenericHandler):
       SetErrorStatus(self.response, 400, "Invalid input",
                      "Number of boards must be > 0, was {}".format(no_boards))
       return False
+    elif no_sections < 1 or no_sections > MAX_SECTIONS:
+      SetErrorStatus(self.response, 400, "Invalid input",
+                     "Number of sections must be between 1 and {}, was {}".format(
+                         MAX_SECTIONS, no_sections))
+      return False
     elif players:
       for player in players:
         if player['pair_no'] < 1 or player['pair_no'] > no_pairs:
@@ -233,7 +263,8 @@ class TourneyListHandler(GenericHandler):
                              player['pair_no']))
           return False
     return BuildMovementAndMaybeSetStatus(
-        self.response, no_pairs, no_boards) is not None
+        self.response, no_pairs, no_boards, no_sections=no_sections,
+        swiss_hands_per_round=swiss_hands_per_round) is not None
 
 
   def _ValidateNewTournamentInfoAndMaybeSetStatus(self, user):
@@ -253,6 +284,8 @@ class TourneyListHandler(GenericHandler):
 
     if not self._CheckValidTournamentInfoAndMaybeSetStatus(
         request_dict['name'], request_dict['no_pairs'],
-        request_dict['no_boards'], request_dict.get('players')):
+        request_dict['no_boards'], request_dict.get('players'),
+        request_dict.get('no_sections', 1),
+        request_dict.get('swiss_hands_per_round')):
       return None
     return request_dict
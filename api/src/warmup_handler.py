@@ -0,0 +1,34 @@
+import json
+import logging
+import time
+
+from generic_handler import GenericHandler
+from python import pdfrenderer
+from python import xlsxio
+import movements
+
+
+class WarmupHandler(GenericHandler):
+  ''' Handles warmup requests to /_ah/warmup, sent by App Engine to a new
+  instance before it serves any traffic.
+  '''
+
+  # List of (stage name, function) tuples run in order.
+  _STAGES = [("movements", movements.Preload),
+             ("pdf", pdfrenderer.Preload),
+             ("xlsx", xlsxio.Preload)]
+
+  def get(self):
+    ''' Loads everything requests would otherwise load lazily into the module
+    level caches, and reports how long each stage took in milliseconds.
+    '''
+    stages = []
+    for name, preload in self._STAGES:
+      start = time.time()
+      preload()
+      millis = int((time.time() - start) * 1000)
+      logging.info("Warmup stage %s took %d ms", name, millis)
+      stages.append({"stage": name, "ms": millis})
+    self.response.headers['Content-Type'] = 'application/json'
+    self.response.set_status(200)
+    self.response.out.write(json.dumps({"stages": stages}, indent=2))
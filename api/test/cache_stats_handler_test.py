@@ -0,0 +1,89 @@
+import json
+import unittest
+import webtest
+import os
+
+from google.appengine.ext import testbed
+
+from api.src import main
+
+class AppTest(unittest.TestCase):
+  def setUp(self):
+    os.environ['AUTH_DOMAIN'] = 'testbed'
+
+    self.testbed = testbed.Testbed()
+    self.testbed.activate()
+
+    self.testbed.init_datastore_v3_stub()
+    self.testbed.init_memcache_stub()
+
+    self.testapp = webtest.TestApp(main.app)
+
+  def tearDown(self):
+    self.testbed.deactivate()
+
+  def testGetCacheStats_not_logged_in(self):
+    response = self.testapp.get("/api/cachestats", expect_errors=True)
+    self.assertEqual(response.status_int, 401)
+
+  def testGetCacheStats_not_admin(self):
+    self.loginUser()
+    response = self.testapp.get("/api/cachestats", expect_errors=True)
+    self.assertEqual(response.status_int, 403)
+
+  def testGetCacheStats(self):
+    self.loginUser()
+    params = {'name': 'name', 'no_pairs': 7, 'no_boards': 14}
+    id = json.loads(
+        self.testapp.post_json("/api/tournaments", params).body)['id']
+    self.testapp.get("/api/tournaments/{}".format(id))
+    self.testapp.get("/api/tournaments/{}".format(id))
+    self.loginUser(is_admin=True)
+    response_dict = json.loads(self.testapp.get("/api/cachestats").body)
+    kinds = response_dict["kinds"]
+    self.assertEqual(["LockStatus", "PlayerPair", "Tournament"],
+                     sorted(kinds))
+    # The first read of the tournament misses, the second one hits.
+    self.assertEqual(1, kinds["Tournament"]["misses"])
+    self.assertEqual(1, kinds["Tournament"]["hits"])
+    self.assertEqual(0.5, kinds["Tournament"]["hit_ratio"])
+    self.assertIn("hits", response_dict["memcache"])
+
+  def testPlayers_visible_after_change(self):
+    self.loginUser()
+    params = {'name': 'name', 'no_pairs': 7, 'no_boards': 14,
+              'players': [{'pair_no': 2, 'name': 'Old name'}]}
+    id = json.loads(
+        self.testapp.post_json("/api/tournaments", params).body)['id']
+    self.assertEqual(
+        'Old name', self.GetPlayerName(id, 2))
+    params['players'] = [{'pair_no': 2, 'name': 'New name'}]
+    self.testapp.put_json("/api/tournaments/{}".format(id), params)
+    self.assertEqual('New name', self.GetPlayerName(id, 2))
+
+  def testLockStatus_visible_after_change(self):
+    self.loginUser()
+    params = {'name': 'name', 'no_pairs': 7, 'no_boards': 14,
+              'allow_score_overwrites': True}
+    id = json.loads(
+        self.testapp.post_json("/api/tournaments", params).body)['id']
+    response_dict = json.loads(
+        self.testapp.get("/api/tournaments/{}".format(id)).body)
+    self.assertTrue(response_dict['allow_score_overwrites'])
+    params['allow_score_overwrites'] = False
+    self.testapp.put_json("/api/tournaments/{}".format(id), params)
+    response_dict = json.loads(
+        self.testapp.get("/api/tournaments/{}".format(id)).body)
+    self.assertFalse(response_dict['allow_score_overwrites'])
+
+  def GetPlayerName(self, id, pair_no):
+    players = json.loads(
+        self.testapp.get("/api/tournaments/{}".format(id)).body)['players']
+    return [p for p in players if p['pair_no'] == pair_no][0]['name']
+
+  def loginUser(self, email='user@example.com', id='123', is_admin=False):
+    self.testbed.setup_env(
+      user_email=email,
+      user_id=id,
+      user_is_admin='1' if is_admin else '0',
+      overwrite=True)
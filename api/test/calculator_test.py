@@ -9,6 +9,9 @@ from calculator import OrderBy
 from calculator import Board
 from calculator import HandResult
 from calculator import Calls
+from calculator import GetMaxRounds
+from calculator import InvalidScoreError
+from calculator import Results
 from calculator import OrderBy
 
 class CalculatorTest(unittest.TestCase):
@@ -104,6 +107,85 @@ class CalculatorTest(unittest.TestCase):
     self.compareStats(team_summaries[4], 5, 5, 1, 0, 0, 0)
     self.compareStats(team_summaries[5], 6, 6, 1, 0, 0, 0)
 
+  def testScoreBoard_ties_and_avg(self):
+    hand_results = []
+    hand_results.append(HandResult(3, 1, 2, 100, 0, Calls("", "", "", "")))
+    hand_results.append(HandResult(3, 3, 4, 100, 0, Calls("", "", "", "")))
+    hand_results.append(HandResult(3, 5, 6, 50, 50, Calls("", "", "", "")))
+    hand_results.append(HandResult(3, 7, 8, 'AVG', 'AVG',
+      Calls("", "", "", "")))
+    board_score = Board(3, hand_results).ScoreBoard()
+    mps = dict([(bsl.hr().ns_pair_no(), (bsl.ns_mps, bsl.ew_mps))
+                for bsl in board_score])
+    self.assertEqual((2.0, 1.0), mps[1])
+    self.assertEqual((2.0, 1.0), mps[3])
+    self.assertEqual((0.5, 2.5), mps[5])
+    self.assertEqual((1.5, 1.5), mps[7])
+    self.assertEqual([1, 3, 7, 5],
+                     [bsl.hr().ns_pair_no() for bsl in board_score])
+
+  def testResults_single_pass(self):
+    hand_results = []
+    hand_results.append(HandResult(2, 1, 3, 400, 0, Calls("GT", "", "", "")))
+    hand_results.append(HandResult(2, 2, 4, 120, 80, Calls("T", "", "", "")))
+    boards = [Board(2, hand_results)]
+    hand_results = []
+    hand_results.append(HandResult(1, 1, 2, 100, 0, Calls("", "", "", "")))
+    hand_results.append(HandResult(1, 3, 4, 'AVG', 'AVG',
+      Calls("", "", "", "")))
+    boards.append(Board(1, hand_results))
+    hand_results = []
+    hand_results.append(HandResult(3, 1, 4, 50, 50, Calls("", "", "", "")))
+    boards.append(Board(3, hand_results))
+    self.assertEqual(3, GetMaxRounds(boards))
+    results = Results(boards)
+    self.assertEqual(3, results.max_rounds())
+    self.assertEqual([1, 2, 3],
+                     [bs._board_no for bs in results.boards()])
+    expected = Calculate(boards, 3)
+    self.assertEqual([ts.team_no for ts in expected],
+                     [ts.team_no for ts in results.team_summaries()])
+    for e, a in zip(expected, results.team_summaries()):
+      self.assertEqual((e.mps, e.rps, e.lps, e.aps, e.mp_rank, e.ap_rank),
+                       (a.mps, a.rps, a.lps, a.aps, a.mp_rank, a.ap_rank))
+
+  def testRankings(self):
+    hand_results = []
+    hand_results.append(HandResult(1, 1, 2, 100, 0, Calls("", "", "", "")))
+    hand_results.append(HandResult(1, 3, 4, 400, 0, Calls("GT", "", "", "")))
+    hand_results.append(HandResult(1, 5, 6, 125, -25, Calls("", "", "", "")))
+    rankings = Results([Board(1, hand_results)]).rankings()
+    self.assertEqual((3, 2, 6, 5, 1, 4),
+                     tuple(ts.team_no for ts in rankings.Ordered("MP")))
+    self.assertEqual((3, 2, 6, 5, 1, 4),
+                     tuple(ts.team_no for ts in rankings.Ordered("LP")))
+    # Only 3 scores APs, MPs break the tie between everyone else.
+    self.assertEqual((3, 2, 6, 5, 1, 4),
+                     tuple(ts.team_no for ts in rankings.Ordered("AP")))
+    for ts in rankings.Ordered("MP"):
+      self.assertEqual(rankings.Rank("MP", ts.team_no), ts.mp_rank)
+      self.assertEqual(rankings.Rank("RP", ts.team_no), ts.rp_rank)
+      self.assertEqual(rankings.Rank("LP", ts.team_no), ts.lp_rank)
+      self.assertEqual(rankings.Rank("AP", ts.team_no), ts.ap_rank)
+    self.assertEqual(6, rankings.Rank("LP", 4))
+
+  def testHandResult_score_validity(self):
+    # 1-2 by North/South with a made Grand Tichu.
+    HandResult(1, 1, 2, 400, 0, Calls("GT", "", "", ""))
+    # East makes a Tichu, South fails one.
+    HandResult(1, 1, 2, -100, 200, Calls("", "T", "T", ""))
+    # North and East both fail their Tichus.
+    HandResult(1, 1, 2, -50, -50, Calls("T", "", "T", ""))
+    # Card points out of range.
+    self.assertRaises(InvalidScoreError, HandResult, 1, 1, 2, 150, -50,
+                      Calls("", "", "", ""))
+    # 1-2 can't leave the other team with card points.
+    self.assertRaises(InvalidScoreError, HandResult, 1, 1, 2, 300, 0,
+                      Calls("", "", "T", ""))
+    # Two made Tichus.
+    self.assertRaises(InvalidScoreError, HandResult, 1, 1, 2, 150, 150,
+                      Calls("T", "", "T", ""))
+
   def compareStats(self, ts, place, team_no, mps, rps, lps, aps):
     self.assertEqual(place, ts.mp_rank)
     self.assertEqual(team_no, ts.team_no)
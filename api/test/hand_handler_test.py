@@ -3,10 +3,15 @@ import unittest
 import webtest
 import os
 
+from google.appengine.api import datastore_errors
+from google.appengine.ext import ndb
 from google.appengine.ext import testbed
 
 
+from api.src import hand_handler
 from api.src import main
+from api.src import models
+from python.standings import Standings
 
 
 class AppTest(unittest.TestCase):
@@ -258,6 +263,28 @@ class AppTest(unittest.TestCase):
                                      expect_errors=True)
     self.assertEqual(response.status_int, 403)
 
+  def testPut_code_of_other_tourney(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    id2 = self.AddBasicTournament()
+    response = self.testapp.get("/api/tournaments/{}/pairids/2".format(id2))
+    opaque_id = json.loads(response.body)['pair_id']
+    self.logoutUser()
+    params = {'calls': {}, 'ns_score': 75, 'ew_score': 25}
+    hand_headers = {'X-tichu-pair-code' : str(opaque_id)}
+    response = self.testapp.put_json("/api/tournaments/{}/hands/1/2/3".format(id),
+                                     params, headers=hand_headers,
+                                     expect_errors=True)
+    self.assertEqual(response.status_int, 403)
+    response = self.testapp.put_json("/api/tournaments/{}/hands".format(id),
+                                     {'hands': [dict(params, board_no=1,
+                                                     ns_pair=2, ew_pair=3)]},
+                                     headers=hand_headers, expect_errors=True)
+    self.assertEqual(response.status_int, 403)
+    response = self.testapp.put_json("/api/tournaments/{}/hands/1/2/3".format(id2),
+                                     params, headers=hand_headers)
+    self.assertEqual(response.status_int, 204)
+
   def testPut_invalid_config(self):
     self.loginUser()
     id = self.AddBasicTournament()
@@ -378,6 +405,26 @@ class AppTest(unittest.TestCase):
                       'notes': 'I am a note'},
                      response_dict)
 
+  def testPutLockable_non_director_deleted_hand(self):
+    self.loginUser()
+    params = {'name': 'name', 'no_pairs': 8, 'no_boards': 24,
+              'players': [{'pair_no': 2, 'name': "My name", 'email': "My email"},
+                          {'pair_no': 7}],
+              'allow_score_overwrites': False}
+    response = self.testapp.post_json("/api/tournaments", params)
+    id = json.loads(response.body)['id']
+    response = self.testapp.get("/api/tournaments/{}/pairids/3".format(id))
+    opaque_id = json.loads(response.body)['pair_id']
+    self.AddBasicHand(id)
+    response = self.testapp.delete("/api/tournaments/{}/hands/1/2/3".format(id))
+    self.assertEqual(response.status_int, 204)
+    self.logoutUser()
+    params = {'calls': {}, 'ns_score': 20, 'ew_score': 80}
+    hand_headers = {'X-tichu-pair-code' : str(opaque_id)}
+    response = self.testapp.put_json("/api/tournaments/{}/hands/1/2/3".format(id),
+                                     params, headers=hand_headers)
+    self.assertEqual(response.status_int, 204)
+
   def testPut(self):
     self.loginUser()
     id = self.AddBasicTournament()
@@ -401,6 +448,43 @@ class AppTest(unittest.TestCase):
     self.assertEqual(2, hand_list[0]['ns_pair']) 
     self.assertEqual(3, hand_list[0]['ew_pair']) 
 
+  def testDelete_scored_hand_list(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    self.AddBasicHand(id)
+    params = {'calls': {}, 'ns_score': 25, 'ew_score': 75}
+    self.testapp.put_json("/api/tournaments/{}/hands/2/2/3".format(id), params)
+    response = self.testapp.delete("/api/tournaments/{}/hands/2/2/3".format(id))
+    self.assertEqual(response.status_int, 204)
+    tourney = ndb.Key("Tournament", int(id)).get()
+    self.assertEqual([(1, 2, 3)],
+                     [(h["board_no"], h["ns_pair"], h["ew_pair"])
+                      for h in tourney.GetScoredHandList()])
+    self.assertEqual([(1, 2, 3)], tourney.ScoredHands())
+    self.assertEqual(
+        [], models.BoardStandings.CreateKey(tourney.key, 2).get().Load()
+                .HandList())
+
+  def testDelete_standings_transaction_fails(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    self.AddBasicHand(id)
+    def FailTransaction(cls, parent_tourney_key, hand_scores, overwrite):
+      raise datastore_errors.TransactionFailedError()
+    self.addCleanup(
+        setattr, models.TournamentStandings, "_PutHandScoresAndStandings",
+        models.TournamentStandings.__dict__["_PutHandScoresAndStandings"])
+    models.TournamentStandings._PutHandScoresAndStandings = classmethod(
+        FailTransaction)
+    tourney = ndb.Key("Tournament", int(id)).get()
+    hand_score = models.HandScore.GetByHandParams(tourney, 1, 2, 3)
+    self.assertRaises(datastore_errors.TransactionFailedError,
+                      hand_score.Delete)
+    # Neither the hand nor the standings have changed.
+    ndb.get_context().clear_cache()
+    self.assertIsNotNone(models.HandScore.GetByHandParams(tourney, 1, 2, 3))
+    self.assertEqual([(1, 2, 3)], tourney.ScoredHands())
+
     # Override the hand.
     params = {'calls': {}, 'ns_score': 20, 'ew_score': 80}
     response = self.testapp.put_json("/api/tournaments/{}/hands/1/2/3".format(id),
@@ -441,6 +525,43 @@ class AppTest(unittest.TestCase):
     self.assertEqual(2, hand_list[0]['ns_pair']) 
     self.assertEqual(3, hand_list[0]['ew_pair']) 
 
+  def testDelete_scored_hand_list(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    self.AddBasicHand(id)
+    params = {'calls': {}, 'ns_score': 25, 'ew_score': 75}
+    self.testapp.put_json("/api/tournaments/{}/hands/2/2/3".format(id), params)
+    response = self.testapp.delete("/api/tournaments/{}/hands/2/2/3".format(id))
+    self.assertEqual(response.status_int, 204)
+    tourney = ndb.Key("Tournament", int(id)).get()
+    self.assertEqual([(1, 2, 3)],
+                     [(h["board_no"], h["ns_pair"], h["ew_pair"])
+                      for h in tourney.GetScoredHandList()])
+    self.assertEqual([(1, 2, 3)], tourney.ScoredHands())
+    self.assertEqual(
+        [], models.BoardStandings.CreateKey(tourney.key, 2).get().Load()
+                .HandList())
+
+  def testDelete_standings_transaction_fails(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    self.AddBasicHand(id)
+    def FailTransaction(cls, parent_tourney_key, hand_scores, overwrite):
+      raise datastore_errors.TransactionFailedError()
+    self.addCleanup(
+        setattr, models.TournamentStandings, "_PutHandScoresAndStandings",
+        models.TournamentStandings.__dict__["_PutHandScoresAndStandings"])
+    models.TournamentStandings._PutHandScoresAndStandings = classmethod(
+        FailTransaction)
+    tourney = ndb.Key("Tournament", int(id)).get()
+    hand_score = models.HandScore.GetByHandParams(tourney, 1, 2, 3)
+    self.assertRaises(datastore_errors.TransactionFailedError,
+                      hand_score.Delete)
+    # Neither the hand nor the standings have changed.
+    ndb.get_context().clear_cache()
+    self.assertIsNotNone(models.HandScore.GetByHandParams(tourney, 1, 2, 3))
+    self.assertEqual([(1, 2, 3)], tourney.ScoredHands())
+
     # Add a second hand, check that both hands are set correctly.
     params = {'calls': {'south': "T", 'east': "", 'west': "GT", 'north': ""},
               'ns_score': -75,
@@ -472,6 +593,241 @@ class AppTest(unittest.TestCase):
     self.assertEqual(6, second_hand['ew_pair']) 
 
 
+  def testPutHands(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    params = {'hands': [
+        {'board_no': 1, 'ns_pair': 2, 'ew_pair': 3, 'calls': {'north': "T"},
+         'ns_score': 175, 'ew_score': 25, 'notes': 'I am a note'},
+        {'board_no': 2, 'ns_pair': 2, 'ew_pair': 3, 'ns_score': 20,
+         'ew_score': 80},
+        {'board_no': 3, 'ns_pair': 2, 'ew_pair': 3, 'calls': {},
+         'ns_score': 'avg+', 'ew_score': 'AVG-'}]}
+    response = self.testapp.put_json("/api/tournaments/{}/hands".format(id),
+                                     params)
+    self.assertEqual(response.status_int, 200)
+    self.assertEqual([204, 204, 204],
+                     [h['status'] for h in json.loads(response.body)['hands']])
+
+    response = self.testapp.get("/api/tournaments/{}".format(id))
+    self.CheckBasicTournamentMetadataUnchanged(json.loads(response.body))
+    hand_list = json.loads(response.body)['hands']
+    self.assertEqual(3, len(hand_list))
+    first_hand = self.GetHandFromList(hand_list, 1)
+    self.assertEqual({'north': "T"}, first_hand['calls'])
+    self.assertEqual(175, first_hand['ns_score'])
+    self.assertEqual(25, first_hand['ew_score'])
+    self.assertEqual('I am a note', first_hand['notes'])
+    self.assertEqual(20, self.GetHandFromList(hand_list, 2)['ns_score'])
+    self.assertEqual('AVG+', self.GetHandFromList(hand_list, 3)['ns_score'])
+
+    response = self.testapp.get(
+        "/api/tournaments/{}/hands/changelog/2/2/3".format(id))
+    self.assertEqual(1, len(json.loads(response.body)['changes']))
+
+  def testPutHands_per_hand_errors(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    params = {'hands': [
+        {'board_no': 1, 'ns_pair': 2, 'ew_pair': 3, 'ns_score': 75,
+         'ew_score': 25},
+        {'board_no': 1, 'ns_pair': 2, 'ew_pair': 4, 'ns_score': 75,
+         'ew_score': 25},
+        {'board_no': 25, 'ns_pair': 2, 'ew_pair': 3, 'ns_score': 75,
+         'ew_score': 25},
+        {'board_no': '2', 'ns_pair': 2, 'ew_pair': 3, 'ns_score': 75,
+         'ew_score': 25},
+        {'board_no': 2, 'ns_pair': 2, 'ew_pair': 3, 'ns_score': 75,
+         'ew_score': 35},
+        {'board_no': 1, 'ns_pair': 2, 'ew_pair': 3, 'ns_score': 50,
+         'ew_score': 50},
+        'not a hand']}
+    response = self.testapp.put_json("/api/tournaments/{}/hands".format(id),
+                                     params)
+    self.assertEqual(response.status_int, 200)
+    results = json.loads(response.body)['hands']
+    self.assertEqual([204, 400, 404, 400, 400, 400, 400],
+                     [h['status'] for h in results])
+    self.assertEqual({'board_no': 1, 'ns_pair': 2, 'ew_pair': 4},
+                     dict((k, results[1][k])
+                          for k in ('board_no', 'ns_pair', 'ew_pair')))
+    self.assertIn('detail', results[1])
+
+    response = self.testapp.get("/api/tournaments/{}".format(id))
+    hand_list = json.loads(response.body)['hands']
+    self.assertEqual(1, len(hand_list))
+    self.assertEqual(75, hand_list[0]['ns_score'])
+
+  def testPutHands_bad_request(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    response = self.testapp.put_json("/api/tournaments/{}/hands".format(id),
+                                     {'hands': {}}, expect_errors=True)
+    self.assertEqual(response.status_int, 400)
+    response = self.testapp.put_json("/api/tournaments/{}a/hands".format(id),
+                                     {'hands': []}, expect_errors=True)
+    self.assertEqual(response.status_int, 404)
+    self.logoutUser()
+    response = self.testapp.put_json("/api/tournaments/{}/hands".format(id),
+                                     {'hands': []}, expect_errors=True)
+    self.assertEqual(response.status_int, 403)
+
+  def testPutHandsLockable_non_director(self):
+    self.loginUser()
+    params = {'name': 'name', 'no_pairs': 8, 'no_boards': 24,
+              'players': [{'pair_no': 2, 'name': "My name", 'email': "My email"},
+                          {'pair_no': 7}],
+              'allow_score_overwrites': False}
+    response = self.testapp.post_json("/api/tournaments", params)
+    id = json.loads(response.body)['id']
+    response = self.testapp.get("/api/tournaments/{}/pairids/2".format(id))
+    opaque_id = json.loads(response.body)['pair_id']
+    self.AddBasicHand(id)
+    self.logoutUser()
+    hand_headers = {'X-tichu-pair-code' : str(opaque_id)}
+    params = {'hands': [
+        {'board_no': 1, 'ns_pair': 2, 'ew_pair': 3, 'ns_score': 20,
+         'ew_score': 80},
+        {'board_no': 2, 'ns_pair': 2, 'ew_pair': 3, 'ns_score': 20,
+         'ew_score': 80},
+        {'board_no': 10, 'ns_pair': 5, 'ew_pair': 6, 'ns_score': 20,
+         'ew_score': 80}]}
+    response = self.testapp.put_json("/api/tournaments/{}/hands".format(id),
+                                     params, headers=hand_headers)
+    self.assertEqual(response.status_int, 200)
+    results = json.loads(response.body)['hands']
+    self.assertEqual([405, 204, 403], [h['status'] for h in results])
+    self.assertEqual(75, results[0]['score']['ns_score'])
+
+    self.loginUser()
+    response = self.testapp.get("/api/tournaments/{}".format(id))
+    hand_list = json.loads(response.body)['hands']
+    self.assertEqual(2, len(hand_list))
+    self.assertEqual(75, self.GetHandFromList(hand_list, 1)['ns_score'])
+    self.assertEqual(20, self.GetHandFromList(hand_list, 2)['ns_score'])
+
+  def testPutLockable_non_director_scored_concurrently(self):
+    self.loginUser()
+    id = self.AddLockableTournament()
+    response = self.testapp.get("/api/tournaments/{}/pairids/2".format(id))
+    opaque_id = json.loads(response.body)['pair_id']
+    self.logoutUser()
+    # Pair 3 scores the hand after this request checked that it is unscored.
+    can_put_hand = hand_handler.HandHandler.__dict__[
+        "_CanPutHandAndMaybeSetResponse"]
+    self.addCleanup(setattr, hand_handler.HandHandler,
+                    "_CanPutHandAndMaybeSetResponse", can_put_hand)
+    def ScoreConcurrently(handler, tourney, is_director, hand_score):
+      tourney.PutHandScore(1, 2, 3, {}, 75, 25, None, 3)
+      return can_put_hand(handler, tourney, is_director, hand_score)
+    hand_handler.HandHandler._CanPutHandAndMaybeSetResponse = ScoreConcurrently
+
+    params = {'calls': {}, 'ns_score': 20, 'ew_score': 80}
+    hand_headers = {'X-tichu-pair-code' : str(opaque_id)}
+    response = self.testapp.put_json("/api/tournaments/{}/hands/1/2/3".format(id),
+                                     params, headers=hand_headers,
+                                     expect_errors=True)
+    self.assertEqual(response.status_int, 405)
+    self.assertEqual(75, json.loads(response.body)['ns_score'])
+    self.loginUser()
+    response = self.testapp.get("/api/tournaments/{}/hands/1/2/3".format(id))
+    self.assertEqual(75, json.loads(response.body)['ns_score'])
+
+  def testPutHandsLockable_standings_transaction_fails(self):
+    self.loginUser()
+    id = self.AddLockableTournament()
+    response = self.testapp.get("/api/tournaments/{}/pairids/2".format(id))
+    opaque_id = json.loads(response.body)['pair_id']
+    self.AddBasicHand(id)
+    self.logoutUser()
+    def FailTransaction(cls, parent_tourney_key, hand_scores, overwrite):
+      raise datastore_errors.TransactionFailedError()
+    self.addCleanup(
+        setattr, models.TournamentStandings, "_PutHandScoresAndStandings",
+        models.TournamentStandings.__dict__["_PutHandScoresAndStandings"])
+    models.TournamentStandings._PutHandScoresAndStandings = classmethod(
+        FailTransaction)
+
+    hand_headers = {'X-tichu-pair-code' : str(opaque_id)}
+    params = {'hands': [
+        {'board_no': 1, 'ns_pair': 2, 'ew_pair': 3, 'ns_score': 20,
+         'ew_score': 80},
+        {'board_no': 2, 'ns_pair': 2, 'ew_pair': 3, 'ns_score': 20,
+         'ew_score': 80}]}
+    response = self.testapp.put_json("/api/tournaments/{}/hands".format(id),
+                                     params, headers=hand_headers)
+    results = json.loads(response.body)['hands']
+    self.assertEqual([405, 204], [h['status'] for h in results])
+
+    self.loginUser()
+    response = self.testapp.get("/api/tournaments/{}".format(id))
+    hand_list = json.loads(response.body)['hands']
+    self.assertEqual(75, self.GetHandFromList(hand_list, 1)['ns_score'])
+    self.assertEqual(20, self.GetHandFromList(hand_list, 2)['ns_score'])
+
+  def testPut_legacy_standings(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    self.AddBasicHand(id)
+    # Tournaments scored before standings were kept have none stored.
+    tourney_key = ndb.Key("Tournament", int(id))
+    ndb.delete_multi(
+        [models.TournamentStandings.CreateKey(tourney_key),
+         models.BoardStandings.CreateKey(tourney_key, 1)])
+    params = {'calls': {}, 'ns_score': 20, 'ew_score': 80}
+    response = self.testapp.put_json("/api/tournaments/{}/hands/2/2/3".format(id),
+                                     params)
+    self.assertEqual(response.status_int, 204)
+    response = self.testapp.get("/api/tournaments/{}".format(id))
+    hand_list = json.loads(response.body)['hands']
+    self.assertEqual(2, len(hand_list))
+    self.assertEqual(75, self.GetHandFromList(hand_list, 1)['ns_score'])
+    self.assertEqual(20, self.GetHandFromList(hand_list, 2)['ns_score'])
+    self.assertIsNotNone(
+        models.TournamentStandings.CreateKey(tourney_key).get())
+
+  def testPut_standings_transaction_fails(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    self.AddBasicHand(id)
+    tourney_key = ndb.Key("Tournament", int(id))
+    def FailTransaction(cls, parent_tourney_key, hand_scores, overwrite):
+      raise datastore_errors.TransactionFailedError()
+    self.addCleanup(
+        setattr, models.TournamentStandings, "_PutHandScoresAndStandings",
+        models.TournamentStandings.__dict__["_PutHandScoresAndStandings"])
+    models.TournamentStandings._PutHandScoresAndStandings = classmethod(
+        FailTransaction)
+
+    params = {'calls': {}, 'ns_score': 20, 'ew_score': 80}
+    response = self.testapp.put_json("/api/tournaments/{}/hands/2/2/3".format(id),
+                                     params)
+    self.assertEqual(response.status_int, 204)
+    params = {'calls': {}, 'ns_score': 50, 'ew_score': 50}
+    response = self.testapp.put_json("/api/tournaments/{}/hands/1/2/3".format(id),
+                                     params)
+    self.assertEqual(response.status_int, 204)
+    # The hands are written and only the standings of their boards are
+    # marked stale.
+    self.assertEqual(20, models.HandScore.CreateKey(
+        tourney_key.get(), 2, 2, 3).get().ns_score)
+    for board_no in [1, 2]:
+      self.assertTrue(
+          models.BoardStandings.CreateKey(tourney_key, board_no).get().stale)
+
+    response = self.testapp.get("/api/tournaments/{}".format(id))
+    hand_list = json.loads(response.body)['hands']
+    self.assertEqual(2, len(hand_list))
+    self.assertEqual(50, self.GetHandFromList(hand_list, 1)['ns_score'])
+    self.assertEqual(20, self.GetHandFromList(hand_list, 2)['ns_score'])
+    for board_no in [1, 2]:
+      self.assertFalse(
+          models.BoardStandings.CreateKey(tourney_key, board_no).get().stale)
+    standings = models.TournamentStandings.Get(tourney_key)
+    expected = Standings.FromHandList(standings.HandList())
+    self.assertEqual(expected._pair_boards, standings._pair_boards)
+    self.assertEqual(expected._pair_totals, standings._pair_totals)
+
   def testDelete_not_logged_in(self):
     self.loginUser()
     id = self.AddBasicTournament()
@@ -551,6 +907,43 @@ class AppTest(unittest.TestCase):
     self.assertEqual(2, hand_list[0]['ns_pair']) 
     self.assertEqual(3, hand_list[0]['ew_pair']) 
 
+  def testDelete_scored_hand_list(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    self.AddBasicHand(id)
+    params = {'calls': {}, 'ns_score': 25, 'ew_score': 75}
+    self.testapp.put_json("/api/tournaments/{}/hands/2/2/3".format(id), params)
+    response = self.testapp.delete("/api/tournaments/{}/hands/2/2/3".format(id))
+    self.assertEqual(response.status_int, 204)
+    tourney = ndb.Key("Tournament", int(id)).get()
+    self.assertEqual([(1, 2, 3)],
+                     [(h["board_no"], h["ns_pair"], h["ew_pair"])
+                      for h in tourney.GetScoredHandList()])
+    self.assertEqual([(1, 2, 3)], tourney.ScoredHands())
+    self.assertEqual(
+        [], models.BoardStandings.CreateKey(tourney.key, 2).get().Load()
+                .HandList())
+
+  def testDelete_standings_transaction_fails(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    self.AddBasicHand(id)
+    def FailTransaction(cls, parent_tourney_key, hand_scores, overwrite):
+      raise datastore_errors.TransactionFailedError()
+    self.addCleanup(
+        setattr, models.TournamentStandings, "_PutHandScoresAndStandings",
+        models.TournamentStandings.__dict__["_PutHandScoresAndStandings"])
+    models.TournamentStandings._PutHandScoresAndStandings = classmethod(
+        FailTransaction)
+    tourney = ndb.Key("Tournament", int(id)).get()
+    hand_score = models.HandScore.GetByHandParams(tourney, 1, 2, 3)
+    self.assertRaises(datastore_errors.TransactionFailedError,
+                      hand_score.Delete)
+    # Neither the hand nor the standings have changed.
+    ndb.get_context().clear_cache()
+    self.assertIsNotNone(models.HandScore.GetByHandParams(tourney, 1, 2, 3))
+    self.assertEqual([(1, 2, 3)], tourney.ScoredHands())
+
 
   def loginUser(self, email='user@example.com', id='123', is_admin=False):
     self.testbed.setup_env(
@@ -566,6 +959,12 @@ class AppTest(unittest.TestCase):
       user_is_admin='',
       overwrite=True)
       
+  def AddLockableTournament(self):
+    params = {'name': 'name', 'no_pairs': 8, 'no_boards': 24,
+              'allow_score_overwrites': False}
+    response = self.testapp.post_json("/api/tournaments", params)
+    return json.loads(response.body)['id']
+
   def AddBasicTournament(self):
     params = {'name': 'name', 'no_pairs': 8, 'no_boards': 24,
               'players': [{'pair_no': 2, 'name': "My name", 'email': "My email"},
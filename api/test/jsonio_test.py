@@ -0,0 +1,46 @@
+import json
+import os
+import unittest
+
+from calculator import Results
+from jsonio import OutputJSON
+from jsonio import OutputJSONChunks
+from jsonio import ReadJSONInput
+import synthetic
+
+class JsonioTest(unittest.TestCase):
+  def testOutputJSON_example_tournament(self):
+    hand_list = json.loads(open(os.path.join(os.getcwd(),
+        'api/test/example_tournament.txt')).read())["hands"]
+    for hand in hand_list:
+      hand.setdefault("notes", None)
+    # Results are listed in the order of the hands' datastore keys.
+    hand_list.sort(key=lambda h: "{}:{}:{}".format(
+        h["board_no"], h["ns_pair"], h["ew_pair"]))
+    summaries = Results(ReadJSONInput(hand_list)).team_summaries()
+    expected = json.loads(open(os.path.join(os.getcwd(),
+        'api/test/example_tournament_results.txt')).read())
+    self.assertEqual(expected, json.loads(OutputJSON(hand_list, summaries)))
+
+  def testOutputJSONChunks_many_hands(self):
+    hand_list = synthetic.BarometerHandList(60, 5, 3, seed=2)
+    summaries = Results(ReadJSONInput(hand_list)).team_summaries()
+    chunks = list(OutputJSONChunks(hand_list, summaries))
+    self.assertTrue(len(chunks) > 3)
+    output = json.loads("".join(chunks))
+    self.assertEqual(len(hand_list), len(output["hands"]))
+    self.assertEqual(60, len(output["pair_summaries"]))
+
+  def testOutputJSON_sections(self):
+    hand_list = synthetic.BarometerHandList(8, 3, 2, seed=4)
+    results = Results(ReadJSONInput(hand_list))
+    sections = [("A", [1, 2, 3, 4]), ("B", [5, 6, 7, 8])]
+    output = json.loads(OutputJSON(hand_list, results.team_summaries(),
+                                   sections))
+    mp_order = [ts.team_no for ts in results.rankings().Ordered("MP")]
+    self.assertEqual(["A", "B"], [s["name"] for s in output["sections"]])
+    for section, (_, pair_nos) in zip(output["sections"], sections):
+      self.assertEqual([p for p in mp_order if p in pair_nos],
+                       section["pair_nos"])
+    self.assertNotIn("sections", json.loads(
+        OutputJSON(hand_list, results.team_summaries())))
@@ -1,8 +1,11 @@
+import cPickle
 import json
 import unittest
 import webtest
 import os
 
+from api.src import hand_prep
+from api.src import movement_fairness
 from api.src import movements
 
 class MovementTest(unittest.TestCase):
@@ -243,6 +246,167 @@ class MovementTest(unittest.TestCase):
     self.checkTableConsistency(movement, 4, 8)
     self.checkNumRounds(movement, 4, 3)
 
+  def testBundle_matches_manifest(self):
+    with open(movements.BUNDLE_PATH, 'rb') as f:
+      bundle = cPickle.load(f)
+    self.assertEqual(movements.CompileBundle(), bundle,
+                     msg="Run `python api/src/movements.py` to rebuild the bundle")
+
+  def testNumBoardsPerRoundFromTotal(self):
+    self.assertEqual((3, 7), movements.Movement.NumBoardsPerRoundFromTotal(10, 24))
+    self.assertEqual((2, 6), movements.Movement.NumBoardsPerRoundFromTotal(11, 16))
+    self.assertEqual((0, 0), movements.Movement.NumBoardsPerRoundFromTotal(10, 23))
+    self.assertRaises(ValueError, movements.Movement, 10, 4, 6)
+
+  def testFeasibleConfigurations(self):
+    configurations = movements.Movement.FeasibleConfigurations(10)
+    self.assertEqual(sorted(set(c.no_boards for c in configurations)),
+                     sorted(c.no_boards for c in configurations))
+    for c in configurations:
+      self.assertEqual((c.no_hands_per_round, c.no_rounds),
+                       movements.Movement.NumBoardsPerRoundFromTotal(
+                           10, c.no_boards))
+    files = [c for c in configurations if not c.generated]
+    self.assertEqual(files, configurations[:len(files)])
+    self.assertIn(movements.Configuration(24, 3, 7, False), files)
+
+    best = movements.Movement.FeasibleConfigurations(10, 23)
+    self.assertEqual(sorted(configurations), sorted(best))
+    self.assertEqual(1, abs(best[0].no_boards - 23))
+    self.assertEqual(
+        movements.Configuration(27, 3, 9, True),
+        movements.Movement.FeasibleConfigurations(10, 27)[0])
+    self.assertEqual([], movements.Movement.FeasibleConfigurations(1))
+
+  def testGeneratedMovements(self):
+    for num_pairs in [3, 6, 13, 14, 17, 20]:
+      num_rounds = num_pairs - 1 + num_pairs % 2
+      self.assertEqual((2, num_rounds),
+                       movements.Movement.NumBoardsPerRoundFromTotal(
+                           num_pairs, 2 * num_rounds))
+      movement = movements.Movement.CreateMovement(num_pairs, 2, num_rounds)
+      self.checkConsistentSchedule(movement, num_pairs, 2)
+      self.checkConsistentOpponents(movement, num_pairs, 2)
+      self.checkHandsPlayedRightNumberOfTimes(movement, num_pairs, 2)
+      self.checkTableConsistency(movement, num_pairs, 2)
+      self.checkNumRounds(movement, num_pairs, num_rounds)
+      if num_pairs % 2:
+        self.checkPrepareHands(movement, num_pairs, 2 * num_rounds)
+    self.assertEqual((0, 0), movements.Movement.NumBoardsPerRoundFromTotal(14, 27))
+    self.assertRaises(ValueError, movements.Movement, 14, 2, 12)
+
+  def testFairness_all_movements(self):
+    configs = movements.Movement.Configurations()
+    for num_pairs in [13, 14, 17, 20]:
+      configs.append((num_pairs, 2, num_pairs - 1 + num_pairs % 2, None))
+    for config in configs:
+      movement = movements.Movement.CreateMovement(*config)
+      report = movement_fairness.AnalyzeMovement(movement.pair_dict)
+      stats = report["pairs"].values()
+      sit_outs = [s["sit_outs"] for s in stats]
+      self.assertTrue(max(sit_outs) - min(sit_outs) <= 1,
+                      msg="Uneven sit-outs in {}".format(config))
+      for s in stats:
+        self.assertEqual(movement.GetNumRounds(),
+                         s["north"] + s["east"] + s["sit_outs"])
+        if config[0] > 12:
+          self.assertTrue(abs(s["north"] - s["east"]) <= 1,
+                          msg="Unbalanced directions in {}".format(config))
+      self.assertEqual(
+          report["objective"],
+          sum(s["imbalance"] for s in stats))
+
+  def testAnalyzeMovement(self):
+    report = movement_fairness.AnalyzeMovement(
+        movements.Movement.CreateMovement(10, 3, 7).pair_dict)
+    self.assertEqual(238, report["objective"])
+    self.assertEqual({"imbalance": 0, "min_comparisons": 2,
+                      "max_comparisons": 2, "north": 3, "east": 3,
+                      "sit_outs": 1}, report["pairs"][3])
+
+  def testIndexes(self):
+    movement = movements.Movement.CreateMovement(10, 3, 7)
+    for pair_no in range(1, 11):
+      for round in movement.GetMovement(pair_no):
+        if not round.hands:
+          continue
+        ns_pair, ew_pair = ((pair_no, round.opponent) if round.is_north
+                            else (round.opponent, pair_no))
+        self.assertEqual((ns_pair, ew_pair),
+                         movement.GetPairsAtTable(round.round, round.table))
+        for hand in round.hands:
+          self.assertIn((ns_pair, ew_pair),
+                        movement.GetListOfPlayersForHand(hand))
+          self.assertEqual(round.round, movement.GetRoundForMatchup(
+              hand, ns_pair, ew_pair).round)
+          self.assertIsNone(movement.GetRoundForMatchup(hand, ew_pair, ns_pair))
+    self.assertEqual([], movement.GetListOfPlayersForHand(25))
+    self.assertIsNone(movement.GetPairsAtTable(8, 1))
+
+  def testSectionedMovement(self):
+    self.assertEqual([14, 13], movements.SectionSizes(27, 2))
+    movement = movements.Movement.CreateSectionedMovement(27, 2, 26)
+    self.assertEqual([(1, 14), (15, 13)], movement.sections)
+    self.checkConsistentSchedule(movement, 27, 2)
+    self.checkConsistentOpponents(movement, 27, 2)
+    self.checkNumRounds(movement, 27, 13)
+    section = movements.Movement.CreateMovement(13, 2, 13)
+    for pair_no in range(1, 28):
+      section_index, section_pair_no = movement.GetSection(pair_no)
+      self.assertEqual(pair_no > 14, section_index == 1)
+      self.assertEqual(
+          pair_no, movement.sections[section_index][0] + section_pair_no - 1)
+      for round in movement.GetMovement(pair_no):
+        if round.hands:
+          self.assertEqual(section_index,
+                           movement.GetSection(round.opponent)[0])
+      if section_index == 1:
+        self.assertEqual(section.GetSuggestedHandPrep(section_pair_no),
+                         movement.GetSuggestedHandPrep(pair_no))
+    for hand in range(1, 27):
+      self.assertEqual(13, len(movement.GetListOfPlayersForHand(hand)))
+    self.assertIs(movement,
+                  movements.Movement.CreateSectionedMovement(27, 2, 26))
+    self.assertIs(movements.Movement.CreateMovement(10, 3, 7),
+                  movements.Movement.CreateSectionedMovement(10, 1, 24))
+    self.assertRaises(ValueError,
+                      movements.Movement.CreateSectionedMovement, 20, 2, 14)
+
+  def testSuggestedPrep_balanced(self):
+    # The first pairs could prepare every hand, but the last ones only one.
+    unplayed_hands = {1: [1, 2, 3, 4], 2: [1, 2, 3, 4], 3: [3], 4: [4]}
+    self.assertEqual({1: [1], 2: [2], 3: [3], 4: [4]},
+                     hand_prep.BalancedHandPrep(unplayed_hands))
+    for key in movements._BUNDLE["movements"]:
+      movement = movements.Movement(*key)
+      self.assertEqual(movement.suggested_prep,
+                       hand_prep.BalancedHandPrep(movement.unplayed_hands))
+      if movement.unplayed_hands:
+        self.checkPrepareHands(movement, key[0], movement.total_boards)
+    movement = movements.Movement.CreateMovement(13, 2, 13)
+    self.assertEqual([2] * 13, [len(movement.GetSuggestedHandPrep(pair_no))
+                                for pair_no in range(1, 14)])
+
+  def testSwissMovement(self):
+    rounds = [([(1, 2), (3, 4)], 5), ([(5, 1), (4, 2)], 3)]
+    movement = movements.SwissMovement(5, 6, 2, rounds)
+    self.assertEqual(3, movement.max_rounds)
+    self.assertEqual(2, movement.GetNumRounds())
+    self.checkConsistentSchedule(movement, 5, 2)
+    self.checkConsistentOpponents(movement, 5, 2)
+    self.checkNumRounds(movement, 5, 2)
+    self.assertEqual([(4, 2), (5, 1)],
+                     sorted(movement.GetListOfPlayersForHand(3)))
+    self.assertEqual([], movement.GetMovement(3)[1].hands)
+    self.assertEqual((3, 4), movement.GetPairsAtTable(1, 2))
+    self.assertEqual(3, movements.SwissMovement(5, 6, 2, []).max_rounds)
+    # Boards not a multiple of the round, too many rounds for the field and
+    # a pair seated twice.
+    self.assertRaises(ValueError, movements.SwissMovement, 5, 7, 2, [])
+    self.assertRaises(ValueError, movements.SwissMovement, 4, 8, 2, [])
+    self.assertRaises(ValueError, movements.SwissMovement, 5, 6, 2,
+                      [([(1, 2), (1, 4)], 5)])
+
   def checkConsistentSchedule(self, movement, num_pairs, num_hands_per_round):
     for i in range(num_pairs):
       opponents_played = set()
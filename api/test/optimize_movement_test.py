@@ -0,0 +1,46 @@
+import json
+import os
+import random
+import unittest
+
+from api.src import movement_fairness
+from api.src import movements
+from python.movement_generation import optimize_movement
+
+_MOVEMENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.pardir, 'src', 'movement_files')
+
+class OptimizeMovementTest(unittest.TestCase):
+  def testOptimize_objective_matches_fairness_report(self):
+    report = movement_fairness.AnalyzeMovement(
+        movements.Movement.CreateMovement(10, 3, 7).pair_dict)
+    movement = self.loadMovement('10_pair_3_hands.txt')
+    initial, best, optimized = optimize_movement.Optimize(movement, 0)
+    self.assertEqual(report["objective"], initial)
+    self.assertEqual(report["objective"], best)
+    self.assertEqual(movement, optimized)
+
+  def testOptimize_scrambled_movement(self):
+    movement = self.loadMovement('8_pair_3_hands_6_rounds.txt')
+    matchups = optimize_movement.GetMatchups(movement)
+    shipped, _, _ = optimize_movement.Optimize(movement, 0)
+    rng = random.Random(0)
+    scrambled = optimize_movement.ApplySeating(
+        movement, matchups, [rng.random() < 0.5 for _ in matchups])
+    initial, best, optimized = optimize_movement.Optimize(
+        scrambled, 20000, seed=0)
+    self.assertTrue(initial > shipped)
+    self.assertTrue(best <= shipped)
+    self.assertEqual(best,
+                     optimize_movement.Optimize(optimized, 0)[0])
+    # Only the seats change.
+    for pair, rounds in optimized.items():
+      for round, original in zip(rounds, scrambled[pair]):
+        self.assertEqual(original.get('opponent'), round.get('opponent'))
+        self.assertEqual(original.get('hands'), round.get('hands'))
+        if original.get('position'):
+          self.assertEqual(original['position'][:-1], round['position'][:-1])
+
+  def loadMovement(self, file_name):
+    with open(os.path.join(_MOVEMENT_DIR, file_name)) as f:
+      return json.load(f)
@@ -1,12 +1,15 @@
 import json
+import random
 import unittest
 import webtest
 import os
 
+from google.appengine.ext import ndb
 from google.appengine.ext import testbed
 
 
 from api.src import main
+from api.src import pair_id_handler
 
 
 class PairIdHandlerTest(unittest.TestCase):
@@ -164,6 +167,134 @@ class PairIdHandlerTest(unittest.TestCase):
     self.assertEqual(5, response_dict["tournament_infos"][0]["pair_no"])
     self.assertEqual(id2, response_dict["tournament_infos"][0]["tournament_id"])
 
+  def testGetTourneyInfo_removed_pairs(self):
+    self.loginUser()
+    id = str(self.AddBasicTournament())
+    response = self.testapp.get("/api/tournaments/{}/pairids/{}".format(id, 10))
+    pair10_id = json.loads(response.body)["pair_id"]
+    response = self.testapp.get("/api/tournaments/{}/pairids/{}".format(id, 1))
+    pair1_id = json.loads(response.body)["pair_id"]
+    params = {'name': 'name', 'no_pairs': 8, 'no_boards': 24}
+    self.testapp.put_json("/api/tournaments/{}".format(id), params)
+    response = self.testapp.get("/api/tournaments/pairno/{}".format(pair10_id),
+                                expect_errors=True)
+    self.assertEqual(response.status_int, 404)
+    response = self.testapp.get("/api/tournaments/pairno/{}".format(pair1_id))
+    self.assertEqual(response.status_int, 200)
+
+    self.testapp.delete("/api/tournaments/{}".format(id))
+    response = self.testapp.get("/api/tournaments/pairno/{}".format(pair1_id),
+                                expect_errors=True)
+    self.assertEqual(response.status_int, 404)
+
+  def testClaimRandomIds_skips_legacy_codes(self):
+    self.loginUser()
+    id = str(self.AddBasicTournament())
+    tourney = ndb.Key("Tournament", int(id)).get()
+    random.seed(42)
+    code = ''.join(
+        random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for j in range(4))
+    self.SetLegacyCode(tourney, 1, code)
+    self.loginUser(is_admin=True)
+    self.BackfillPairCodes()
+
+    random.seed(42)
+    self.assertNotIn(code, tourney._ClaimRandomIds(11, 1))
+    response = self.testapp.get("/api/tournaments/pairno/{}".format(code))
+    response_dict = json.loads(response.body)
+    self.assertEqual(1, len(response_dict["tournament_infos"]))
+    self.assertEqual(1, response_dict["tournament_infos"][0]["pair_no"])
+    self.assertEqual(id, response_dict["tournament_infos"][0]["tournament_id"])
+
+  def testGetTourneyInfo_legacy_code_not_backfilled(self):
+    self.loginUser()
+    id = str(self.AddBasicTournament())
+    tourney = ndb.Key("Tournament", int(id)).get()
+    self.SetLegacyCode(tourney, 1, "ZZZZ")
+    response = self.testapp.get("/api/tournaments/pairno/ZZZZ",
+                                expect_errors=True)
+    self.assertEqual(response.status_int, 404)
+
+  def testGetTourneyInfo_legacy_code_in_two_tourneys(self):
+    self.loginUser()
+    id = str(self.AddBasicTournament())
+    id2 = str(self.AddBasicTournament())
+    tourney = ndb.Key("Tournament", int(id)).get()
+    tourney2 = ndb.Key("Tournament", int(id2)).get()
+    self.SetLegacyCode(tourney, 3, "ZZZZ")
+    self.SetLegacyCode(tourney2, 7, "ZZZZ")
+    self.loginUser(is_admin=True)
+    self.BackfillPairCodes()
+    # Backfilling again does not add the pairs twice.
+    self.BackfillPairCodes()
+
+    response = self.testapp.get("/api/tournaments/pairno/ZZZZ")
+    response_dict = json.loads(response.body)
+    self.assertEqual(
+        [{"pair_no": 3, "tournament_id": id},
+         {"pair_no": 7, "tournament_id": id2}],
+        sorted(response_dict["tournament_infos"],
+               key=lambda info: info["pair_no"]))
+
+    self.testapp.delete("/api/tournaments/{}".format(id2))
+    response = self.testapp.get("/api/tournaments/pairno/ZZZZ")
+    response_dict = json.loads(response.body)
+    self.assertEqual([{"pair_no": 3, "tournament_id": id}],
+                     response_dict["tournament_infos"])
+
+  def testBackfillPairCodes_pages(self):
+    self.loginUser()
+    self.AddBasicTournament()
+    self.loginUser(is_admin=True)
+    backfill_batch_size = pair_id_handler.BACKFILL_BATCH_SIZE
+    self.addCleanup(setattr, pair_id_handler, "BACKFILL_BATCH_SIZE",
+                    backfill_batch_size)
+    pair_id_handler.BACKFILL_BATCH_SIZE = 4
+    requests = self.BackfillPairCodes()
+    # 10 pairs, all of them already indexed.
+    self.assertEqual(3, requests)
+
+  def testBackfillPairCodes_not_admin(self):
+    self.loginUser()
+    response = self.testapp.post_json("/api/admin/paircodes", {},
+                                      expect_errors=True)
+    self.assertEqual(response.status_int, 403)
+    self.logoutUser()
+    response = self.testapp.post_json("/api/admin/paircodes", {},
+                                      expect_errors=True)
+    self.assertEqual(response.status_int, 401)
+
+  def testBackfillPairCodes_bad_cursor(self):
+    self.loginUser(is_admin=True)
+    response = self.testapp.post_json("/api/admin/paircodes",
+                                      {"cursor": "not a cursor"},
+                                      expect_errors=True)
+    self.assertEqual(response.status_int, 400)
+
+  def SetLegacyCode(self, tourney, pair_no, code):
+    ''' Gives a pair a code the way it was handed out before PairCodes
+    existed.
+    '''
+    player_pair = ndb.Key("PlayerPair", pair_no, parent=tourney.key).get()
+    ndb.Key("PairCode", player_pair.id).delete()
+    player_pair.id = code
+    player_pair.put()
+
+  def BackfillPairCodes(self):
+    ''' Runs the pair code backfill to completion and returns the number of
+    requests it took.
+    '''
+    params = {}
+    requests = 0
+    while True:
+      response = self.testapp.post_json("/api/admin/paircodes", params)
+      self.assertEqual(response.status_int, 200)
+      requests += 1
+      cursor = json.loads(response.body)["cursor"]
+      if not cursor:
+        return requests
+      params = {"cursor": cursor}
+
   def logoutUser(self):
     self.testbed.setup_env(
       user_email='',
@@ -0,0 +1,78 @@
+import numpy
+import unittest
+
+from calculator import Board
+from calculator import Calls
+from calculator import HandResult
+from calculator import Results
+from jsonio import ReadJSONInput
+from projection import Projection
+import synthetic
+
+class ProjectionTest(unittest.TestCase):
+  def testRun_complete_tournament(self):
+    hand_list = synthetic.BarometerHandList(8, 3, 2, seed=4)
+    mp_order = Results(ReadJSONInput(hand_list)).rankings().Ordered("MP")
+    result = Projection(hand_list, [], seed=1).Run(10)
+    self.assertEqual(10, result["simulations"])
+    pairs = dict((p["pair_no"], p) for p in result["pairs"])
+    for place, ts in enumerate(mp_order):
+      self.assertEqual(1.0, pairs[ts.team_no]["place_probabilities"][place])
+      self.assertAlmostEqual(ts.mps, pairs[ts.team_no]["mean_mps"])
+
+  def testRun_unplayed_hands(self):
+    hand_list = synthetic.BarometerHandList(8, 3, 2, seed=4)
+    unplayed = [(h["board_no"], h["ns_pair"], h["ew_pair"])
+                for h in hand_list[-8:]]
+    result = Projection(hand_list[:-8], unplayed, seed=1).Run(200)
+    self.assertEqual(200, result["simulations"])
+    self.assertEqual(range(1, 9), [p["pair_no"] for p in result["pairs"]])
+    for pair in result["pairs"]:
+      self.assertAlmostEqual(1.0, sum(pair["place_probabilities"]))
+    for place in xrange(8):
+      self.assertAlmostEqual(1.0, sum(p["place_probabilities"][place]
+                                      for p in result["pairs"]))
+    self.assertEqual(result, Projection(hand_list[:-8], unplayed,
+                                        seed=1).Run(200))
+
+  def testSimulateBatch_matches_calculator(self):
+    hand_list = synthetic.BarometerHandList(8, 3, 2, seed=4)
+    unplayed_hands = hand_list[::3]
+    scored = [h for i, h in enumerate(hand_list) if i % 3]
+    scored[0] = dict(scored[0], ns_score="AVG+", ew_score="AVG-")
+    unplayed = [(h["board_no"], h["ns_pair"], h["ew_pair"])
+                for h in unplayed_hands]
+    mps, rps = Projection(scored, unplayed, seed=3)._SimulateBatch(1)
+
+    # Replay the draws of the simulation to complete the tournament.
+    rng = numpy.random.RandomState(3)
+    completed = list(scored)
+    real_scores = [h for h in scored if isinstance(h["ns_score"], int)]
+    for board_no in sorted(set(b for b, _, _ in unplayed)):
+      samples = ([h for h in real_scores if h["board_no"] == board_no] or
+                 real_scores)
+      matchups = [(ns, ew) for b, ns, ew in unplayed if b == board_no]
+      draws = rng.randint(0, len(samples), (1, len(matchups)))[0]
+      for (ns_pair, ew_pair), i in zip(matchups, draws):
+        completed.append(dict(samples[i], board_no=board_no, ns_pair=ns_pair,
+                              ew_pair=ew_pair))
+
+    boards = {}
+    for h in completed:
+      boards.setdefault(h["board_no"], []).append(HandResult(
+          h["board_no"], h["ns_pair"], h["ew_pair"], h["ns_score"],
+          h["ew_score"], Calls.FromDict(h["calls"])))
+    expected_mps = [0] * 8
+    expected_rps = [0] * 8
+    for board_no, hand_results in boards.items():
+      for bsl in Board(board_no, hand_results).ScoreBoard():
+        expected_mps[bsl.hr().ns_pair_no() - 1] += bsl.ns_mps
+        expected_rps[bsl.hr().ns_pair_no() - 1] += bsl.ns_rps
+        expected_mps[bsl.hr().ew_pair_no() - 1] += bsl.ew_mps
+        expected_rps[bsl.hr().ew_pair_no() - 1] += bsl.ew_rps
+    for i in xrange(8):
+      self.assertAlmostEqual(expected_mps[i], mps[0][i])
+      self.assertAlmostEqual(expected_rps[i], rps[0][i])
+
+  def testProjection_nothing_scored(self):
+    self.assertRaises(ValueError, Projection, [], [(1, 1, 2)])
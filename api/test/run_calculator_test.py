@@ -0,0 +1,51 @@
+import csv
+import imp
+import os
+import shutil
+import tempfile
+import unittest
+
+from openpyxl import Workbook
+
+run_calculator = imp.load_source(
+    'run_calculator', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   os.pardir, os.pardir, 'python',
+                                   'run-calculator.py'))
+
+class RunCalculatorTest(unittest.TestCase):
+  def setUp(self):
+    self.dir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.dir)
+
+  def testRunBatch_same_name_in_two_directories(self):
+    self.writeWorkbook(os.path.join(self.dir, 'monday', 'round.xlsx'), 75)
+    self.writeWorkbook(os.path.join(self.dir, 'tuesday', 'round.xlsx'), 25)
+    outputdir = os.path.join(self.dir, 'out')
+    failures = run_calculator.RunBatch(os.path.join(self.dir, '*', '*.xlsx'),
+                                       outputdir, processes=1)
+    self.assertEqual(0, failures)
+    for day in ['monday', 'tuesday']:
+      self.assertTrue(os.path.isfile(
+          os.path.join(outputdir, day, 'round_results.xlsx')))
+    with open(os.path.join(outputdir, 'summary.csv')) as f:
+      names = set(row[0] for row in list(csv.reader(f))[1:])
+    self.assertEqual(set([os.path.join('monday', 'round'),
+                          os.path.join('tuesday', 'round')]), names)
+
+  def writeWorkbook(self, filename, ns_score):
+    ''' Writes a workbook with two tables playing board 1, the first scoring
+    ns_score for North/South.
+    '''
+    wb = Workbook()
+    teams = wb.active
+    teams.title = "Team Names"
+    teams.append(["Team", "Name"])
+    for team_no in range(1, 5):
+      teams.append([team_no, "Team {}".format(team_no)])
+    hands = wb.create_sheet("Raw Hand Scores")
+    hands.append(["Board", "NS", "EW", "N", "S", "E", "W", "NS Score",
+                  "EW Score"])
+    hands.append([1, 1, 2, None, None, None, None, ns_score, 100 - ns_score])
+    hands.append([1, 3, 4, None, None, None, None, 50, 50])
+    os.makedirs(os.path.dirname(filename))
+    wb.save(filename)
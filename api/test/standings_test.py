@@ -0,0 +1,131 @@
+import json
+import os
+import random
+import unittest
+
+from calculator import Calculate
+from calculator import GetMaxRounds
+from jsonio import ReadJSONInput
+from standings import Standings
+
+class StandingsTest(unittest.TestCase):
+  def setUp(self):
+    self.hand_list = json.loads(open(os.path.join(os.getcwd(),
+        'api/test/example_tournament.txt')).read())["hands"]
+
+  def testFromHandList_matches_calculate(self):
+    boards = ReadJSONInput(self.hand_list)
+    expected = Calculate(boards, GetMaxRounds(boards))
+    standings = Standings.FromHandList(self.hand_list)
+    self.assertSummariesEqual(expected, standings.Results().team_summaries())
+
+  def testSetHand_incremental(self):
+    hands = list(self.hand_list)
+    random.Random(7).shuffle(hands)
+    standings = Standings()
+    # Score a hand wrongly first, then fix it.
+    wrong_hand = dict(hands[0])
+    wrong_hand["ns_score"], wrong_hand["ew_score"] = "AVG+", "AVG-"
+    wrong_hand["calls"] = {}
+    standings.SetHand(wrong_hand)
+    for hand in hands:
+      standings.SetHand(hand)
+    self.assertSummariesEqual(
+        Standings.FromHandList(self.hand_list).Results().team_summaries(),
+        standings.Results().team_summaries())
+    self.assertEqual(len(self.hand_list), len(standings.HandList()))
+
+  def testRemoveHand(self):
+    standings = Standings.FromHandList(self.hand_list)
+    removed = self.hand_list[3]
+    standings.RemoveHand(removed["board_no"], removed["ns_pair"],
+                         removed["ew_pair"])
+    remaining = [h for h in self.hand_list if h is not removed]
+    self.assertSummariesEqual(
+        Standings.FromHandList(remaining).Results().team_summaries(),
+        standings.Results().team_summaries())
+    # Removing a hand that does not exist is a no-op.
+    standings.RemoveHand(removed["board_no"], removed["ns_pair"],
+                         removed["ew_pair"])
+    self.assertEqual(len(remaining), len(standings.HandList()))
+
+  def testJsonRoundTrip(self):
+    standings = Standings.FromHandList(self.hand_list)
+    loaded = Standings.FromJson(standings.ToJson())
+    self.assertSummariesEqual(standings.Results().team_summaries(),
+                              loaded.Results().team_summaries())
+    self.assertEqual(standings.Results().max_rounds(),
+                     loaded.Results().max_rounds())
+
+  def testJsonRoundTrip_hand_list(self):
+    standings = Standings.FromHandList(self.hand_list)
+    loaded = Standings.FromJson(standings.ToJson())
+    self.assertEqual(standings.HandList(), loaded.HandList())
+    self.assertEqual(standings._pair_boards, loaded._pair_boards)
+
+  def testFromJson_unpacked(self):
+    standings = Standings.FromHandList(self.hand_list)
+    unpacked = json.dumps({"hands": standings._hands,
+                           "pair_boards": standings._pair_boards})
+    loaded = Standings.FromJson(unpacked)
+    self.assertEqual(standings.HandList(), loaded.HandList())
+    self.assertSummariesEqual(standings.Results().team_summaries(),
+                              loaded.Results().team_summaries())
+
+  def testResults_reuses_totals(self):
+    loaded = Standings.FromJson(
+        Standings.FromHandList(self.hand_list).ToJson())
+    def FailToHandResult(hand):
+      self.fail("Rebuilt a hand result")
+    loaded._ToHandResult = FailToHandResult
+    self.assertSummariesEqual(
+        Standings.FromHandList(self.hand_list).Results().team_summaries(),
+        loaded.Results().team_summaries())
+
+  def testFromJson_without_totals(self):
+    standings = Standings.FromHandList(self.hand_list)
+    standings_dict = json.loads(standings.ToJson())
+    del standings_dict["packed"]["pair_totals"]
+    loaded = Standings.FromJson(json.dumps(standings_dict))
+    self.assertEqual(standings._pair_totals, loaded._pair_totals)
+
+  def testHandListFromJson(self):
+    standings = Standings.FromHandList(self.hand_list)
+    self.assertEqual(standings.HandList(),
+                     Standings.HandListFromJson(standings.ToJson()))
+
+  def testMerge(self):
+    boards = {}
+    for hand in self.hand_list:
+      boards.setdefault(hand["board_no"], []).append(hand)
+    merged = Standings.Merge(
+        [Standings.FromHandList(hands) for hands in boards.values()])
+    standings = Standings.FromHandList(self.hand_list)
+    self.assertEqual(standings.HandList(), merged.HandList())
+    self.assertEqual(standings._pair_totals, merged._pair_totals)
+    self.assertSummariesEqual(standings.Results().team_summaries(),
+                              merged.Results().team_summaries())
+
+  def testBoards_matches_score_board(self):
+    boards = sorted(ReadJSONInput(self.hand_list), key=lambda b: b._board_no)
+    restored = Standings.FromHandList(self.hand_list).Boards()
+    self.assertEqual(len(boards), len(restored))
+    for board, restored_board in zip(boards, restored):
+      expected_lines = board.ScoreBoard()
+      restored_lines = restored_board.board_score()
+      self.assertEqual(len(expected_lines), len(restored_lines))
+      for expected, actual in zip(expected_lines, restored_lines):
+        self.assertEqual(expected.hr().ns_pair_no(), actual.hr().ns_pair_no())
+        self.assertEqual(expected.hr().ew_pair_no(), actual.hr().ew_pair_no())
+        for field in ["ns_mps", "ew_mps", "ns_rps", "ew_rps", "ns_lps",
+                      "ew_lps", "ns_aps", "ew_aps"]:
+          self.assertEqual(getattr(expected, field), getattr(actual, field))
+
+  def assertSummariesEqual(self, expected, actual):
+    self.assertEqual([ts.team_no for ts in expected],
+                     [ts.team_no for ts in actual])
+    for e, a in zip(expected, actual):
+      self.assertEqual((e.mps, e.rps, e.lps, e.aps), (a.mps, a.rps, a.lps, a.aps))
+      self.assertEqual((e.mp_rank, e.rp_rank, e.ap_rank),
+                       (a.mp_rank, a.rp_rank, a.ap_rank))
+      self.assertEqual(e.board_points, a.board_points)
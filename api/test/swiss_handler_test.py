@@ -0,0 +1,169 @@
+import json
+import unittest
+import webtest
+import os
+
+from google.appengine.ext import testbed
+
+from api.src import main
+
+class AppTest(unittest.TestCase):
+  def setUp(self):
+    os.environ['AUTH_DOMAIN'] = 'testbed'
+
+    self.testbed = testbed.Testbed()
+    self.testbed.activate()
+
+    self.testbed.init_datastore_v3_stub()
+    self.testbed.init_memcache_stub()
+
+    self.testapp = webtest.TestApp(main.app)
+
+  def tearDown(self):
+    self.testbed.deactivate()
+
+  def testGetRounds_not_logged_in(self):
+    self.loginUser()
+    id = self.AddSwissTournament()
+    self.logoutUser()
+    response = self.testapp.get("/api/tournaments/{}/swiss".format(id),
+                                expect_errors=True)
+    self.assertEqual(response.status_int, 401)
+
+  def testGetRounds_does_not_own(self):
+    self.loginUser()
+    id = self.AddSwissTournament()
+    self.loginUser('user2@example.com', '345')
+    response = self.testapp.post("/api/tournaments/{}/swiss".format(id),
+                                 expect_errors=True)
+    self.assertEqual(response.status_int, 403)
+
+  def testGetRounds_not_swiss(self):
+    self.loginUser()
+    params = {'name': 'name', 'no_pairs': 7, 'no_boards': 14}
+    id = json.loads(
+        self.testapp.post_json("/api/tournaments", params).body)['id']
+    response = self.testapp.get("/api/tournaments/{}/swiss".format(id),
+                                expect_errors=True)
+    self.assertEqual(response.status_int, 400)
+    response = self.testapp.post("/api/tournaments/{}/swiss".format(id),
+                                 expect_errors=True)
+    self.assertEqual(response.status_int, 400)
+
+  def testPairRounds(self):
+    self.loginUser()
+    id = self.AddSwissTournament()
+    response_dict = json.loads(
+        self.testapp.get("/api/tournaments/{}/swiss".format(id)).body)
+    self.assertEqual({"rounds": [], "max_rounds": 3}, response_dict)
+
+    response = self.testapp.post("/api/tournaments/{}/swiss".format(id))
+    self.assertEqual(response.status_int, 201)
+    first_round = json.loads(response.body)["rounds"][0]
+    self.assertEqual(1, first_round["round"])
+    self.assertEqual(5, first_round["bye"])
+    self.assertEqual([{"table": 1, "ns_pair": 1, "ew_pair": 2},
+                      {"table": 2, "ns_pair": 3, "ew_pair": 4}],
+                     first_round["tables"])
+
+    # Hands of the first round are not scored yet.
+    response = self.testapp.post("/api/tournaments/{}/swiss".format(id),
+                                 expect_errors=True)
+    self.assertEqual(response.status_int, 400)
+
+    for board_no in [1, 2]:
+      self.testapp.put_json(
+          "/api/tournaments/{}/hands/{}/1/2".format(id, board_no),
+          {'ns_score': 25, 'ew_score': 75})
+      self.testapp.put_json(
+          "/api/tournaments/{}/hands/{}/3/4".format(id, board_no),
+          {'ns_score': 100, 'ew_score': 0})
+    response_dict = json.loads(
+        self.testapp.post("/api/tournaments/{}/swiss".format(id)).body)
+    self.assertEqual(2, len(response_dict["rounds"]))
+    second_round = response_dict["rounds"][1]
+    # Pairs 1 and 4 share the bottom of the standings, pair 5 had a bye.
+    self.assertIn(second_round["bye"], [1, 4])
+    for table in second_round["tables"]:
+      self.assertNotIn((table["ns_pair"], table["ew_pair"]),
+                       [(1, 2), (2, 1), (3, 4), (4, 3)])
+
+    response = self.testapp.get(
+        "/api/tournaments/{}/movement/5".format(id))
+    movement = json.loads(response.body)["movement"]
+    self.assertEqual(2, len(movement))
+    self.assertEqual([], movement[0]["hands"])
+    self.assertEqual([3, 4], [h["hand_no"] for h in movement[1]["hands"]])
+
+  def testCreateTournament_swiss_bad_config(self):
+    self.loginUser()
+    params = {'name': 'name', 'no_pairs': 4, 'no_boards': 8,
+              'swiss_hands_per_round': 2}
+    response = self.testapp.post_json("/api/tournaments", params,
+                                      expect_errors=True)
+    self.assertEqual(response.status_int, 400)
+    params['no_boards'] = 5
+    response = self.testapp.post_json("/api/tournaments", params,
+                                      expect_errors=True)
+    self.assertEqual(response.status_int, 400)
+
+  def testPutTournament_keeps_rounds(self):
+    self.loginUser()
+    id = self.AddSwissTournament()
+    self.testapp.post("/api/tournaments/{}/swiss".format(id))
+    params = {'name': 'name2', 'no_pairs': 5, 'no_boards': 6}
+    self.testapp.put_json("/api/tournaments/{}".format(id), params)
+    response_dict = json.loads(
+        self.testapp.get("/api/tournaments/{}".format(id)).body)
+    self.assertEqual(2, response_dict['swiss_hands_per_round'])
+    response_dict = json.loads(
+        self.testapp.get("/api/tournaments/{}/swiss".format(id)).body)
+    self.assertEqual(1, len(response_dict["rounds"]))
+
+    # A tournament read back as is can be put unchanged.
+    response_dict = json.loads(
+        self.testapp.get("/api/tournaments/{}".format(id)).body)
+    self.testapp.put_json("/api/tournaments/{}".format(id), response_dict)
+    response_dict = json.loads(
+        self.testapp.get("/api/tournaments/{}/swiss".format(id)).body)
+    self.assertEqual(1, len(response_dict["rounds"]))
+
+    params['swiss_hands_per_round'] = None
+    self.testapp.put_json("/api/tournaments/{}".format(id), params)
+    response_dict = json.loads(
+        self.testapp.get("/api/tournaments/{}".format(id)).body)
+    self.assertIsNone(response_dict['swiss_hands_per_round'])
+
+  def testCreateTournament_swiss_hands_per_round(self):
+    self.loginUser()
+    params = {'name': 'name', 'no_pairs': 5, 'no_boards': 6,
+              'swiss_hands_per_round': None}
+    response = self.testapp.post_json("/api/tournaments", params)
+    self.assertEqual(response.status_int, 201)
+    for value in [True, 0, -2, "2"]:
+      params['swiss_hands_per_round'] = value
+      response = self.testapp.post_json("/api/tournaments", params,
+                                        expect_errors=True)
+      self.assertEqual(response.status_int, 400)
+
+  def loginUser(self, email='user@example.com', id='123', is_admin=False):
+    self.testbed.setup_env(
+      user_email=email,
+      user_id=id,
+      user_is_admin='1' if is_admin else '0',
+      overwrite=True)
+
+  def logoutUser(self):
+    self.testbed.setup_env(
+      user_email='',
+      user_id='',
+      user_is_admin='',
+      overwrite=True)
+
+  def AddSwissTournament(self):
+    params = {'name': 'name', 'no_pairs': 5, 'no_boards': 6,
+              'swiss_hands_per_round': 2}
+    response = self.testapp.post_json("/api/tournaments", params)
+    id = json.loads(response.body)['id']
+    self.assertIsNotNone(id)
+    return id
@@ -0,0 +1,131 @@
+import random
+import time
+import unittest
+
+from api.src import movements
+from api.src import swiss_pairing
+
+class SwissPairingTest(unittest.TestCase):
+  def testPairRound_first_round(self):
+    tables, bye = swiss_pairing.PairRound([1, 2, 3, 4, 5], {}, {}, {})
+    self.assertEqual([(1, 2), (3, 4)], tables)
+    self.assertEqual(5, bye)
+
+  def testPairRound_avoids_rematches(self):
+    opponents = {1: set([2]), 2: set([1]), 3: set([4]), 4: set([3])}
+    tables, bye = swiss_pairing.PairRound([1, 2, 3, 4], opponents, {}, {})
+    self.assertEqual([(1, 3), (2, 4)], tables)
+    self.assertIsNone(bye)
+
+  def testPairRound_backtracks(self):
+    # Pairing 1 with 3 would leave 2 and 4, who have already met.
+    opponents = {1: set([2]), 2: set([1, 4]), 3: set(), 4: set([2])}
+    tables, _ = swiss_pairing.PairRound([1, 2, 3, 4], opponents, {}, {})
+    self.assertEqual([(1, 4), (2, 3)], tables)
+
+  def testPairRound_bye_and_direction(self):
+    tables, bye = swiss_pairing.PairRound([1, 2, 3, 4, 5], {},
+                                          {5: 1, 4: 1}, {1: 2, 2: 1})
+    self.assertEqual(3, bye)
+    self.assertEqual([(2, 1), (4, 5)], tables)
+
+  def testPairNextRound_full_tournament(self):
+    random.seed(7)
+    no_pairs = 11
+    no_rounds = 7
+    rounds = []
+    for _ in range(no_rounds):
+      movement = movements.SwissMovement(no_pairs, no_rounds * 2, 2, rounds)
+      ranking = range(1, no_pairs + 1)
+      random.shuffle(ranking)
+      rounds.append(swiss_pairing.PairNextRound(movement, ranking))
+    movement = movements.SwissMovement(no_pairs, no_rounds * 2, 2, rounds)
+    byes = set()
+    for pair_no in range(1, no_pairs + 1):
+      opponents = [r.opponent for r in movement.GetMovement(pair_no)
+                   if r.hands]
+      self.assertEqual(len(opponents), len(set(opponents)))
+      byes.update(r.round for r in movement.GetMovement(pair_no)
+                  if not r.hands)
+      north = len([r for r in movement.GetMovement(pair_no) if r.is_north])
+      self.assertTrue(3 <= north <= 4,
+                      msg="Pair {} sat North/South {} times".format(
+                          pair_no, north))
+    self.assertEqual(no_rounds, len(byes))
+
+  def testPairNextRound_large_field(self):
+    random.seed(3)
+    no_pairs = 301
+    rounds = []
+    start = time.time()
+    for _ in range(8):
+      movement = movements.SwissMovement(no_pairs, 24, 3, rounds)
+      ranking = range(1, no_pairs + 1)
+      random.shuffle(ranking)
+      rounds.append(swiss_pairing.PairNextRound(movement, ranking))
+    self.assertLess(time.time() - start, 2)
+    movement = movements.SwissMovement(no_pairs, 24, 3, rounds)
+    for pair_no in range(1, no_pairs + 1):
+      opponents = [r.opponent for r in movement.GetMovement(pair_no)
+                   if r.hands]
+      self.assertEqual(len(opponents), len(set(opponents)))
+
+  def testPairRound_late_round_single_pairing(self):
+    # Every pair has played all but two others, and the only rounds without
+    # rematches are two perfect matchings of a shuffled field.
+    random.seed(5)
+    ranking = range(1, 201)
+    unplayed = {}
+    for _ in range(2):
+      shuffled = list(ranking)
+      random.shuffle(shuffled)
+      for a, b in zip(shuffled[::2], shuffled[1::2]):
+        unplayed.setdefault(a, set()).add(b)
+        unplayed.setdefault(b, set()).add(a)
+    opponents = dict((p, set(ranking) - unplayed[p] - set([p]))
+                     for p in ranking)
+    start = time.time()
+    tables, bye = swiss_pairing.PairRound(ranking, opponents, {}, {})
+    self.assertLess(time.time() - start, 2)
+    self.assertIsNone(bye)
+    self.assertEqual(100, len(tables))
+    self.assertEqual(set(ranking), set(p for t in tables for p in t))
+    for ns_pair, ew_pair in tables:
+      self.assertNotIn(ew_pair, opponents[ns_pair])
+
+  def testPairRound_fewest_rematches(self):
+    # 1, 2 and 3 have all played each other, so one of them must rematch.
+    opponents = {1: set([2, 3]), 2: set([1, 3]), 3: set([1, 2]), 4: set()}
+    tables, _ = swiss_pairing.PairRound([1, 2, 3, 4], opponents, {}, {})
+    rematches = [t for t in tables if t[1] in opponents[t[0]]]
+    self.assertEqual(1, len(rematches))
+    self.assertEqual(set([1, 2, 3, 4]), set(p for t in tables for p in t))
+
+  def testPairNextRound_no_rematch_when_avoidable(self):
+    random.seed(11)
+    no_pairs = 10
+    rounds = []
+    for _ in range(no_pairs - 1):
+      movement = movements.SwissMovement(no_pairs, (no_pairs - 1) * 2, 2,
+                                         rounds)
+      opponents = dict((p, set(r.opponent for r in movement.GetMovement(p)
+                               if r.hands))
+                       for p in range(1, no_pairs + 1))
+      ranking = range(1, no_pairs + 1)
+      random.shuffle(ranking)
+      tables, bye = swiss_pairing.PairNextRound(movement, ranking)
+      rematches = len([t for t in tables if t[1] in opponents[t[0]]])
+      self.assertEqual(self.FewestRematches(ranking, opponents), rematches)
+      rounds.append((tables, bye))
+
+  def FewestRematches(self, pairs, opponents):
+    ''' Returns the fewest rematches any pairing of pairs needs, trying every
+    pairing.
+    '''
+    if not pairs:
+      return 0
+    first, rest = pairs[0], pairs[1:]
+    return min(int(second in opponents[first]) +
+               self.FewestRematches([p for p in rest if p != second],
+                                    opponents)
+               for second in rest)
@@ -0,0 +1,29 @@
+import os
+import unittest
+
+from calculator import Results
+from jsonio import ReadJSONInput
+import synthetic
+
+class SyntheticTest(unittest.TestCase):
+  def testHandListFromMovementFile_all_movements(self):
+    movement_dir = os.path.join(os.getcwd(), 'api/src/movement_files')
+    for path in synthetic.MovementFiles(movement_dir):
+      hand_list = synthetic.HandListFromMovementFile(path, seed=3)
+      self.assertTrue(hand_list, msg=path)
+      # Raises if any of the generated scores is invalid.
+      results = Results(ReadJSONInput(hand_list))
+      self.assertTrue(results.team_summaries(), msg=path)
+
+  def testBarometerHandList(self):
+    hand_list = synthetic.BarometerHandList(20, 4, 3, seed=5)
+    self.assertEqual(10 * 4 * 3, len(hand_list))
+    self.assertEqual(hand_list, synthetic.BarometerHandList(20, 4, 3, seed=5))
+    played = set()
+    for hand in hand_list:
+      for pair_no in [hand["ns_pair"], hand["ew_pair"]]:
+        self.assertNotIn((pair_no, hand["board_no"]), played)
+        played.add((pair_no, hand["board_no"]))
+    results = Results(ReadJSONInput(hand_list))
+    self.assertEqual(20, len(results.team_summaries()))
+    self.assertEqual(12, results.max_rounds())
@@ -2,6 +2,7 @@ import os, sys
 
 sys.path.append(os.path.join(os.getcwd(), 'api/src'))
 from models import Tournament
+from google.appengine.ext import ndb
 
 def loginUser(self, email='user@example.com', id='123', is_admin=False):
   self.testbed.setup_env(
@@ -13,4 +14,16 @@ def loginUser(self, email='user@example.com', id='123', is_admin=False):
 def setLegacyId(self, id='123', version=1):
   tourney = Tournament.get_by_id(int(id));
   tourney.legacy_version_id = version
-  tourney.put()
\ No newline at end of file
+  tourney.put()
+
+def missingMovementBoards(id):
+  ''' Returns the sorted board numbers the movement of tournament id plays
+  that have no Board record.
+  '''
+  tourney = ndb.Key("Tournament", int(id)).get()
+  movement = tourney.GetMovement()
+  board_nos = set(b.board_number for b in
+                  ndb.Query(kind="Board", ancestor=tourney.key).fetch())
+  return sorted(set(hand for pair_no in xrange(1, tourney.no_pairs + 1)
+                    for round in movement.GetMovement(pair_no)
+                    for hand in round.hands) - board_nos)
@@ -281,6 +281,22 @@ class AppTest(unittest.TestCase):
                                      expect_errors=True)
     self.assertEqual(response.status_int, 400)
 
+  def testPutTournament_boolean_config(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    for field in ['no_sections', 'swiss_hands_per_round']:
+      params = {'name': 'name2', 'no_pairs': 8, 'no_boards': 24, field: True}
+      response = self.testapp.put_json("/api/tournaments/{}".format(id),
+                                       params, expect_errors=True)
+      self.assertEqual(response.status_int, 400)
+
+  def testPutTournament_more_boards(self):
+    self.loginUser()
+    id = self.AddBasicTournament()
+    params = {'name': 'name2', 'no_pairs': 10, 'no_boards': 45}
+    self.testapp.put_json("/api/tournaments/{}".format(id), params)
+    self.assertEqual([], test_utils.missingMovementBoards(id))
+
   def testPutTournament(self):
     self.loginUser()
     id = self.AddBasicTournament()
@@ -299,6 +315,17 @@ class AppTest(unittest.TestCase):
     self.assertEqual(9, len(json.loads(self.testapp.get(
         "/api/tournaments/{}/pairids".format(id)).body)["pair_ids"]))
         
+  def testPutTournament_keeps_sections(self):
+    self.loginUser()
+    params = {'name': 'name1', 'no_pairs': 27, 'no_boards': 26,
+              'no_sections': 2}
+    response = self.testapp.post_json("/api/tournaments", params)
+    id = json.loads(response.body)['id']
+    self.testapp.put_json("/api/tournaments/{}".format(id),
+                          {'name': 'name2', 'no_pairs': 27, 'no_boards': 26})
+    response = self.testapp.get("/api/tournaments/{}".format(id))
+    self.assertEqual(2, json.loads(response.body)['no_sections'])
+
   def testPutTournament_legacy(self):
     self.loginUser()
     params = {'name': 'name', 'no_pairs': 7, 'no_boards': 14,
@@ -3,6 +3,8 @@ import unittest
 import webtest
 import os
 
+import test_utils
+
 from google.appengine.ext import testbed
 
 
@@ -75,10 +77,45 @@ class AppTest(unittest.TestCase):
 
   def testCreateTournament_invalid_movement_config(self):
     self.loginUser()
-    params = {'name': 'name1', 'no_pairs': 8, 'no_boards': 21}
+    params = {'name': 'name1', 'no_pairs': 8, 'no_boards': 23}
     response = self.testapp.post_json("/api/tournaments", params, expect_errors=True)
     self.assertEqual(response.status_int, 400)
 
+  def testCreateTournament_sections(self):
+    self.loginUser()
+    params = {'name': 'name1', 'no_pairs': 27, 'no_boards': 26,
+              'no_sections': 2}
+    response = self.testapp.post_json("/api/tournaments", params)
+    id = json.loads(response.body)['id']
+    response = self.testapp.get("/api/tournaments/{}".format(id))
+    self.assertEqual(2, json.loads(response.body)['no_sections'])
+    response = self.testapp.get("/api/tournaments/{}/movement/15".format(id))
+    response_dict = json.loads(response.body)
+    self.assertEqual("B", response_dict['section'])
+    self.assertEqual(1, response_dict['section_pair_no'])
+
+    for value in [0, True, "2"]:
+      params['no_sections'] = value
+      response = self.testapp.post_json("/api/tournaments", params,
+                                        expect_errors=True)
+      self.assertEqual(response.status_int, 400)
+    params = {'name': 'name1', 'no_pairs': 20, 'no_boards': 14,
+              'no_sections': 2}
+    response = self.testapp.post_json("/api/tournaments", params,
+                                      expect_errors=True)
+    self.assertEqual(response.status_int, 400)
+
+  def testCreateTournament_generated_movement_boards(self):
+    self.loginUser()
+    params = {'name': 'name1', 'no_pairs': 10, 'no_boards': 45}
+    response = self.testapp.post_json("/api/tournaments", params)
+    id = json.loads(response.body)['id']
+    self.assertEqual([], test_utils.missingMovementBoards(id))
+    response = self.testapp.put_json("/api/tournaments",
+                                     dict(params, hands=[]))
+    id = json.loads(response.body)['id']
+    self.assertEqual([], test_utils.missingMovementBoards(id))
+
   def testCreateTournament_lock_state_lockable(self):
     self.loginUser()
     params = {'name': 'name', 'no_pairs': 8, 'no_boards': 24, 
@@ -186,7 +223,7 @@ class AppTest(unittest.TestCase):
     self.loginUser()
     params = {'name': "Name", 
               'no_pairs': 8,
-              'no_boards': 21, 
+              'no_boards': 23, 
               'allow_score_overwrites': True}
     response = self.testapp.put_json("/api/tournaments", params,
                                      expect_errors=True)
@@ -0,0 +1,32 @@
+import json
+import unittest
+import webtest
+import os
+
+from google.appengine.ext import testbed
+
+from api.src import main
+
+class AppTest(unittest.TestCase):
+  def setUp(self):
+    os.environ['AUTH_DOMAIN'] = 'testbed'
+
+    self.testbed = testbed.Testbed()
+    self.testbed.activate()
+
+    self.testbed.init_datastore_v3_stub()
+    self.testbed.init_memcache_stub()
+
+    self.testapp = webtest.TestApp(main.app)
+
+  def tearDown(self):
+    self.testbed.deactivate()
+
+  def testWarmup(self):
+    response = self.testapp.get("/_ah/warmup")
+    self.assertEqual(response.status_int, 200)
+    stages = json.loads(response.body)["stages"]
+    self.assertEqual(["movements", "pdf", "xlsx"],
+                     [stage["stage"] for stage in stages])
+    for stage in stages:
+      self.assertGreaterEqual(stage["ms"], 0)
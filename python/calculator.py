@@ -1,4 +1,4 @@
-import itertools
+import collections
 import json
 import math
 
@@ -15,8 +15,9 @@ class InvalidScoreError(Exception):
     def __str__(self):
         return repr(self.value)
 
-class Calls:
+class Calls(object):
     """ Summaries of all calls in the hand. """
+    __slots__ = ("_call_dict",)
 
     def __init__(self, n_call = "", s_call = "", e_call = "", w_call = ""):
         """ Raises an exception if any of the calls are invalid """
@@ -93,8 +94,10 @@ class Calls:
         return cls(dict.get("north", ""), dict.get("south", ""), 
                    dict.get("east", ""), dict.get("west", "")) if dict else cls('', '', '', '')
 
-class HandResult:
+class HandResult(object):
     """ Contains all information about a single hand between two teams. """
+    __slots__ = ("_ns_pair_no", "_ew_pair_no", "_calls", "_board_no",
+                 "_ns_score", "_ew_score", "_diff")
     
     def __init__(self, board_no, ns_pair_no, ew_pair_no, ns_score, ew_score,
                  calls):
@@ -146,14 +149,33 @@ class HandResult:
                         "E": self._calls.e_call(), "W": self._calls.w_call()}
         return (1 if first_out == player else -1) * \
                HandResult._TichuScore(team_to_call[player])
+
+    # Maps a (N, S, E, W) calls tuple to the Tichu factors of every possible
+    # first out player. There are only 81 call patterns so this stays small.
+    _tichu_factors_cache = {}
+
+    def _TichuFactors(self):
+        """ Returns a list of tuples (ns_tichu_factor, ew_tichu_factor,
+            first_out_is_ns), one for each player that may have gone out first.
+        """
+        calls = (self._calls.n_call(), self._calls.s_call(),
+                 self._calls.e_call(), self._calls.w_call())
+        factors = HandResult._tichu_factors_cache.get(calls)
+        if factors is None:
+            factors = []
+            for first_out in ["N", "S", "E", "W"]:
+                factors.append(
+                    (self._TichuBonus(first_out, "N") +
+                         self._TichuBonus(first_out, "S"),
+                     self._TichuBonus(first_out, "E") +
+                         self._TichuBonus(first_out, "W"),
+                     first_out in ("N", "S")))
+            HandResult._tichu_factors_cache[calls] = factors
+        return factors
     
     def _ValidateScore(self):
-        if self._IsValidAvgScore():
+        if self._IsValidAvgScore() or self._IsScoreValid():
           return
-        permutations = itertools.permutations(["N", "W", "S", "E"])
-        for permutation in permutations:
-            if self._IsScoreValid(permutation):
-                return
         raise InvalidScoreError(self._board_no, self._ns_pair_no,
                                 self._ew_pair_no)
 
@@ -166,16 +188,15 @@ class HandResult:
               self._calls.w_call() == "" and 
               self._calls.s_call() == "")
 
-    def _TeamBounds(self, team1, team2, first_two):
-        if (first_two == team1 or first_two == tuple(reversed(team1))):
-            return ([200, 200], [0, 0])
-        elif (first_two == team2 or first_two == tuple(reversed(team2))):
-            return ([0, 0], [200, 200])
-        return ([-25, 125], [-25, 125])
-        
-      
-    def _IsScoreValid(self, out_order):
-        assert len(out_order) == 4
+    def _IsScoreValid(self):
+        """ Checks whether the score can be the result of some order in which
+            players went out.
+
+        Only the first player out and whether their partner went out second
+        matter. Without a 1-2 finish card points range from -25 to 125 for
+        each team and add up to 100. With a 1-2 finish the finishing team
+        gets 200 and the other team 0. Tichu bonuses are added on top.
+        """
         if (not (isinstance(self._ns_score, int) and 
                  isinstance(self._ew_score, int))):
           return False
@@ -185,35 +206,33 @@ class HandResult:
               self._ew_score % 5 != 0):
             return False
 
-        ns_tichu_factor, ew_tichu_factor = 0, 0
-        first_out = out_order[0]
-        ns_team, ew_team = ("N", "S"), ("E", "W")
-
-        # Add on factors for making/not making Tichu.
-        for player in ns_team:
-            ns_tichu_factor += self._TichuBonus(first_out, player) 
-        for player in ew_team:
-            ew_tichu_factor += self._TichuBonus(first_out, player)
-        
-        # Get bounds for legal scores of each team.
-        ns_bounds, ew_bounds = \
-            self._TeamBounds(ns_team, ew_team, out_order[0:2])
-        one_two = sum(ns_bounds) == 400 or sum(ew_bounds) == 400
-        ns_bounds = [x + ns_tichu_factor for x in ns_bounds]
-        ew_bounds = [x + ew_tichu_factor for x in ew_bounds]
-        
-        if (self._ns_score not in range(ns_bounds[0], ns_bounds[1] + 1) or
-            self._ew_score not in range(ew_bounds[0], ew_bounds[1] + 1)):
-            return False
-        elif ((not one_two) and 
-              (self._ew_score + self._ns_score - 
-                   ns_tichu_factor - ew_tichu_factor != 100)):
-          return False
-        return True
+        for ns_tichu_factor, ew_tichu_factor, first_out_is_ns in \
+            self._TichuFactors():
+            ns_points = self._ns_score - ns_tichu_factor
+            ew_points = self._ew_score - ew_tichu_factor
+            if (-25 <= ns_points <= 125 and -25 <= ew_points <= 125 and
+                ns_points + ew_points == 100):
+                return True
+            if first_out_is_ns and ns_points == 200 and ew_points == 0:
+                return True
+            if not first_out_is_ns and ns_points == 0 and ew_points == 200:
+                return True
+        return False
+
+class BoardScoreLine(object):
+    __slots__ = ("_hr", "ns_mps", "ew_mps", "ns_rps", "ew_rps", "ns_lps",
+                 "ew_lps", "ns_aps", "ew_aps")
 
-class BoardScoreLine:
     def __init__(self, hr):
         self._hr = hr
+        self.ns_mps = 0
+        self.ew_mps = 0
+        self.ns_rps = 0
+        self.ew_rps = 0
+        self.ns_lps = 0
+        self.ew_lps = 0
+        self.ns_aps = 0
+        self.ew_aps = 0
     
     def hr(self):
         return self._hr
@@ -284,6 +303,11 @@ class Board:
     def board_score(self):
         return self._board_score
 
+    def SetBoardScore(self, board_score):
+        """ Restores score lines computed by an earlier ScoreBoard call. """
+        self._board_score = sorted(board_score, key=lambda bsl: bsl.ns_mps,
+                                   reverse=True)
+
     def _get_avg_score_diff(self):
         non_avg_hr = [hr for hr in self._hand_results if hr.diff() != "AVG"]
         if len(non_avg_hr) == 0:
@@ -296,15 +320,6 @@ class Board:
         else: 
             return -math.log1p(-rps)
 
-    def _mp_comp(self, current, other):
-        if other == "AVG":
-          return 0.5
-        if current < other:
-            return 0
-        if current == other:
-            return 0.5
-        return 1
-
     def _get_max_lps(self):
       max_lps = -1
       for bsl in self._board_score:
@@ -319,13 +334,48 @@ class Board:
         max_rps = max(max_rps, bsl.ns_rps)
       return max_rps
 
-    def _called_t(self, hand_result, position, call_to_check):
+    @staticmethod
+    def _side_calls(hand_result):
+      """ Returns a tuple of booleans (ns called GT, ns called T, ew called GT,
+          ew called T) for the hand.
+      """
       calls = hand_result.calls()
-      call_fetcher = {"ns": (calls.n_call(), calls.s_call()), "ew": (calls.e_call(), calls.w_call())}
-      calls_made = call_fetcher[position]
-      if calls_made[0] == call_to_check or calls_made[1] == call_to_check:
-        return 1
-      return 0
+      n_call, s_call = calls.n_call(), calls.s_call()
+      e_call, w_call = calls.e_call(), calls.w_call()
+      return (n_call == "GT" or s_call == "GT", n_call == "T" or s_call == "T",
+              e_call == "GT" or w_call == "GT", e_call == "T" or w_call == "T")
+
+    @staticmethod
+    def _mp_ranks(diffs, num_avg):
+      """ Computes NS and EW matchpoints for every diff in a single sort and
+          rank pass.
+
+      A result scores 1 MP against each lower diff, 0.5 against each equal
+      diff (including itself) and each AVG result, and 0 against each higher
+      diff. The 0.5 scored against itself is then taken back.
+
+      Args:
+        diffs: list of integer NS - EW score differences of all non-AVG hands.
+        num_avg: number of AVG hands on the board.
+
+      Returns:
+        A pair of lists (ns_mps, ew_mps) in the same order as diffs.
+      """
+      n = len(diffs)
+      ns_mps = [0] * n
+      ew_mps = [0] * n
+      order = sorted(xrange(n), key=lambda i: diffs[i])
+      lower = 0
+      while lower < n:
+        upper = lower + 1
+        while upper < n and diffs[order[upper]] == diffs[order[lower]]:
+          upper += 1
+        ties = 0.5 * (upper - lower + num_avg) - 0.5
+        for j in xrange(lower, upper):
+          ns_mps[order[j]] = lower + ties
+          ew_mps[order[j]] = (n - upper) + ties
+        lower = upper
+      return ns_mps, ew_mps
 
     def _set_avg_mps_rps(self, side, avg_type, avg_mps, max_rps, max_lps, board_score_line):
       if avg_type == "AVG":
@@ -360,39 +410,38 @@ class Board:
     def ScoreBoard(self): 
         self._board_score = []
         avg_score = self._get_avg_score_diff()
-        # This is n^2. You can do it in O(n) but will be uglier. Since
-        # we will have 4/5 entries each time, this is OK.
         hand_results = self._hand_results
-        gt_calls_ns = sum([self._called_t(x, "ns", "GT") for x in hand_results])
-        t_calls_ns = sum([self._called_t(x, "ns", "T") for x in hand_results])
-        gt_calls_ew = sum([self._called_t(x, "ew", "GT") for x in hand_results])
-        t_calls_ew = sum([self._called_t(x, "ew", "T") for x in hand_results])
-        num_non_avg = len([x for x in hand_results if x.diff() != "AVG" ])
-        for hr in hand_results:
-            if (hr.diff() == "AVG"):
-              continue
+        non_avg_hr = [hr for hr in hand_results if hr.diff() != "AVG"]
+        num_non_avg = len(non_avg_hr)
+        ns_mps, ew_mps = self._mp_ranks([hr.diff() for hr in non_avg_hr],
+                                        len(hand_results) - num_non_avg)
+
+        # Aggressiveness needs call totals across the board, gather them in
+        # the same pass that records each hand's calls.
+        side_calls = [self._side_calls(hr) for hr in non_avg_hr]
+        gt_calls_ns = sum([x[0] for x in side_calls])
+        t_calls_ns = sum([x[1] for x in side_calls])
+        gt_calls_ew = sum([x[2] for x in side_calls])
+        t_calls_ew = sum([x[3] for x in side_calls])
+        for i, hr in enumerate(non_avg_hr):
             bs = BoardScoreLine(hr)
-            bs.ns_mps, bs.ew_mps, bs.ns_rps, bs.ew_rps, bs.ns_lps, bs.ew_lps = 0, 0, 0, 0, 0, 0;
-            bs.ns_mps = sum(
-                [self._mp_comp(hr.diff(), x.diff())
-                    for x in self._hand_results]) - 0.5
-            bs.ew_mps = sum(
-                [1 - self._mp_comp(hr.diff(), x.diff()) 
-                    for x in self._hand_results]) - 0.5
+            bs.ns_mps = ns_mps[i]
+            bs.ew_mps = ew_mps[i]
             bs.ns_rps = self._log_rps(hr.diff() - avg_score)
             bs.ew_rps = self._log_rps(avg_score - hr.diff())
             bs.ns_lps = hr.diff() - avg_score
             bs.ew_lps = avg_score - hr.diff()
             # Now to calculate aggressiveness
-            if self._called_t(hr, "ns", "GT"):
+            ns_gt, ns_t, ew_gt, ew_t = side_calls[i]
+            if ns_gt:
               bs.ns_aps = (num_non_avg - gt_calls_ns) * 2 - t_calls_ns
-            elif self._called_t(hr, "ns", "T"):
+            elif ns_t:
               bs.ns_aps = (num_non_avg - gt_calls_ns - t_calls_ns)
             else:
               bs.ns_aps = 0
-            if self._called_t(hr, "ew", "GT"):
+            if ew_gt:
               bs.ew_aps = (num_non_avg - gt_calls_ew) * 2 - t_calls_ew
-            elif self._called_t(hr, "ew", "T"):
+            elif ew_t:
               bs.ew_aps = (num_non_avg - gt_calls_ew - t_calls_ew)
             else:
               bs.ew_aps = 0
@@ -449,27 +498,34 @@ class Board:
             return "Score has not been calculated for board " + \
                    str(self._board_no) + " or no hands are involved"
 
-class TeamSummary:
+# Points scored by a single team on a single board.
+BoardPoints = collections.namedtuple("BoardPoints", ["mps", "rps", "lps", "aps"])
+
+class TeamSummary(object):
+    __slots__ = ("mps", "rps", "lps", "aps", "team_no", "board_points",
+                 "mp_rank", "agg_rank", "rp_rank", "lp_rank", "ap_rank")
+
     def __init__(self, team_no):
         self.mps = 0
         self.rps = 0
         self.lps = 0
         self.aps = 0
         self.team_no = team_no
-        self.board_mps = {}
-        self.board_rps = {}
-        self.board_lps = {}
-        self.board_aps = {}
+        # Board number to the BoardPoints scored by the team on that board.
+        self.board_points = {}
         self.mp_rank = 0
         self.agg_rank = 0
         self.rp_rank = 0
+        self.lp_rank = 0
+        self.ap_rank = 0
 
     def UpdateSitOutBonuses(self, num_rounds):
-        if len(self.board_mps) < num_rounds:
-          self.mps = self.mps * float(num_rounds) / len(self.board_mps)
-          self.aps = self.aps * float(num_rounds) / len(self.board_mps)
-          self.rps = self.rps * float(num_rounds) / len(self.board_mps)
-          self.lps = self.lps * float(num_rounds) / len(self.board_mps)
+        num_boards = len(self.board_points)
+        if num_boards < num_rounds:
+          self.mps = self.mps * float(num_rounds) / num_boards
+          self.aps = self.aps * float(num_rounds) / num_boards
+          self.rps = self.rps * float(num_rounds) / num_boards
+          self.lps = self.lps * float(num_rounds) / num_boards
 
     def csv_rows(self, num_rounds):
         board_no = "Board No"
@@ -479,24 +535,22 @@ class TeamSummary:
         ret = []
         ret.append({board_no:
             """Place {1}. Team {0}: MPs {2:.1f} RPs {3:.2f} LPs {4:.2f}""".format(self.team_no, self.mp_rank, self.mps, self.rps, self.lps)})
-        keys = sorted(self.board_mps.keys())
+        keys = sorted(self.board_points.keys())
         for key in keys:
-          ret.append({board_no : key, mps: self.board_mps[key], rps : self.board_rps[key], lps : self.board_lps[key]})
-        if len(self.board_mps) < num_rounds:
+          points = self.board_points[key]
+          ret.append({board_no : key, mps: points.mps, rps : points.rps, lps : points.lps})
+        if len(keys) < num_rounds:
           ret.append({board_no : "Sit-out Bonus",
-                      mps: self.mps - self.mps * len(self.board_mps) / num_rounds,
-                      rps: self.rps - self.rps * len(self.board_mps) / num_rounds,
-                      lps: self.lps - self.lps * len(self.board_mps) / num_rounds})
+                      mps: self.mps - self.mps * len(keys) / num_rounds,
+                      rps: self.rps - self.rps * len(keys) / num_rounds,
+                      lps: self.lps - self.lps * len(keys) / num_rounds})
         return ret
         
 
 def UpdateTeamSummary(team_summaries, board_no, pair_no, position,
                       board_score_line):
     ts = team_summaries.setdefault(pair_no, TeamSummary(pair_no))
-    assert(board_no not in ts.board_mps)
-    assert(board_no not in ts.board_rps)
-    assert(board_no not in ts.board_lps)
-    assert(board_no not in ts.board_aps)
+    assert(board_no not in ts.board_points)
     if position is "ns": 
       mps = board_score_line.ns_mps
       rps = board_score_line.ns_rps
@@ -511,10 +565,7 @@ def UpdateTeamSummary(team_summaries, board_no, pair_no, position,
     ts.rps += rps
     ts.aps += aps
     ts.lps += lps
-    ts.board_mps[board_no] = mps
-    ts.board_lps[board_no] = lps
-    ts.board_rps[board_no] = rps
-    ts.board_aps[board_no] = aps
+    ts.board_points[board_no] = BoardPoints(mps, rps, lps, aps)
 
 def Calculate(boards, num_rounds):
     """ Boards is a list of Boards """
@@ -527,53 +578,125 @@ def Calculate(boards, num_rounds):
                               "ns", bsl)
             UpdateTeamSummary(team_summaries, hr._board_no, hr.ew_pair_no(),
                               "ew", bsl)
-    for ts in team_summaries.values():
+    return list(RankTeamSummaries(team_summaries.values(),
+                                  num_rounds).Ordered("AP"))
+
+def RankTeamSummaries(team_summaries, num_rounds):
+    """ Applies sit-out bonuses to a list of fully summed TeamSummaries and
+        sets their ranks. Returns the Rankings of the summaries.
+    """
+    for ts in team_summaries:
       ts.UpdateSitOutBonuses(num_rounds)
-      
-    ret = team_summaries.values()
-    
-    # Calculate Ranks.
-    # MP:
-    OrderBy(ret, "MP")
-    for i in range(len(ret)):
-      ret[i].mp_rank = i + 1 
-    
-    # RP:
-    OrderBy(ret, "RP")
-    for i in range(len(ret)):
-      ret[i].rp_rank = i + 1 
+    rankings = Rankings(team_summaries)
+    for ts in team_summaries:
+      ts.mp_rank = rankings.Rank("MP", ts.team_no)
+      ts.rp_rank = rankings.Rank("RP", ts.team_no)
+      ts.lp_rank = rankings.Rank("LP", ts.team_no)
+      ts.ap_rank = rankings.Rank("AP", ts.team_no)
+    return rankings
+
+# Totals each ranking orders by, most significant first. All orders are
+# descending and remaining ties go to the lower team number.
+RANK_KEYS = {
+  "MP": ("mps", "rps"),
+  "RP": ("rps", "mps"),
+  "LP": ("lps", "mps", "rps"),
+  "AP": ("aps", "mps", "lps", "rps"),
+}
+
+def _RankKey(rank_by):
+    try:
+      attrs = RANK_KEYS[rank_by]
+    except KeyError:
+      raise KeyError("Bad error %s" % rank_by)
+    return lambda ts: tuple([-getattr(ts, attr) for attr in attrs]) + (ts.team_no,)
+
+class Rankings(object):
+    """ MP, RP, LP and AP orders of a list of TeamSummaries, each computed once.
+
+    Orders are tuples and are never re-sorted, so they can be shared by every
+    consumer of the results.
+    """
+    __slots__ = ("_orders", "_ranks")
+
+    def __init__(self, team_summaries):
+        self._orders = {}
+        self._ranks = {}
+        for rank_by in RANK_KEYS:
+          order = tuple(sorted(team_summaries, key=_RankKey(rank_by)))
+          self._orders[rank_by] = order
+          self._ranks[rank_by] = dict(
+              (ts.team_no, i + 1) for i, ts in enumerate(order))
+
+    def Ordered(self, rank_by):
+        """ Returns a tuple of the TeamSummaries ordered by rank_by, one of MP,
+            RP, LP or AP.
+        """
+        return self._orders[rank_by]
+
+    def Rank(self, rank_by, team_no):
+        """ Returns the 1-based rank by rank_by of team team_no. """
+        return self._ranks[rank_by][team_no]
+
+class Results:
+    """ Scores a tournament's boards once and keeps everything derived from
+        that single pass: the scored boards, the number of rounds and the
+        ranked team summaries.
+    """
+    def __init__(self, boards, team_summaries=None):
+        """ Boards is a list of Boards. Boards that already hold a score, e.g.
+            restored with SetBoardScore, are not scored again.
+
+            team_summaries is an optional list of TeamSummaries that already
+            hold every team's totals and board points, before sit-out bonuses
+            and ranks. The boards are then not needed to rank the teams, and
+            boards may be a function returning them that is only called the
+            first time boards() is.
+        """
+        if team_summaries is None:
+            self._boards = self._SortBoards(boards)
+            summaries = {}
+            for bs in self._boards:
+                for bsl in bs.board_score() or bs.ScoreBoard():
+                    hr = bsl.hr()
+                    UpdateTeamSummary(summaries, hr._board_no,
+                                      hr.ns_pair_no(), "ns", bsl)
+                    UpdateTeamSummary(summaries, hr._board_no,
+                                      hr.ew_pair_no(), "ew", bsl)
+            team_summaries = summaries.values()
+        else:
+            self._boards = boards
+        self._max_rounds = max(
+            [len(ts.board_points) for ts in team_summaries] or [0])
+        self._rankings = RankTeamSummaries(team_summaries, self._max_rounds)
+
+    @staticmethod
+    def _SortBoards(boards):
+        return sorted(boards, key=lambda bs: bs._board_no)
+
+    def boards(self):
+        """ Returns the scored Boards ordered by board number. """
+        if callable(self._boards):
+            self._boards = self._SortBoards(self._boards())
+        return self._boards
 
-    # RP:
-    OrderBy(ret, "LP")
-    for i in range(len(ret)):
-      ret[i].rp_rank = i + 1 
+    def max_rounds(self):
+        """ Returns the maximum number of rounds any team has played. """
+        return self._max_rounds
 
-    # AP:
-    OrderBy(ret, "AP")
-    for i in range(len(ret)):
-      ret[i].ap_rank = i + 1 
+    def team_summaries(self):
+        """ Returns a list of the ranked TeamSummaries ordered by AP. """
+        return list(self._rankings.Ordered("AP"))
 
-    return ret
+    def rankings(self):
+        """ Returns the Rankings of the TeamSummaries. """
+        return self._rankings
 
 def OrderBy(boards, rank_by = "MP"):
-  if rank_by == "MP":
-    # Secondary sort by rps.
-    boards.sort(key=lambda ts : ts.rps, reverse = True) 
-    boards.sort(key=lambda ts : ts.mps, reverse = True)
-  elif rank_by == "RP":
-    # Secondary sort by mps.
-    boards.sort(key=lambda ts : ts.mps, reverse = True)
-    boards.sort(key=lambda ts : ts.rps, reverse = True) 
-  elif rank_by == "LP":
-    # Secondary sort by mps.
-    boards.sort(key=lambda ts : ts.mps, reverse = True)
-    boards.sort(key=lambda ts : ts.lps, reverse = True) 
-  elif rank_by == "AP":
-    # Secondary sort by mps.
-    boards.sort(key=lambda ts : ts.mps, reverse = True)
-    boards.sort(key=lambda ts : ts.aps, reverse = True) 
-  else:
-    raise KeyError("Bad error %s" % rank_by)
+  """ Sorts a list of TeamSummaries in place by rank_by, one of MP, RP, LP or
+      AP. Prefer Rankings, which does not mutate shared lists.
+  """
+  boards.sort(key=_RankKey(rank_by))
 
 def GetMaxRounds(board_list):
   """ Gets the maximum number of rounds any team has played in the tournament. """
@@ -581,8 +704,7 @@ def GetMaxRounds(board_list):
     return 0
   board_counts = {}
   for bs in board_list:
-    for bsl in bs.ScoreBoard():
-      hr = bsl.hr()
+    for hr in bs._hand_results:
       board_counts[hr.ns_pair_no()] = 1 + board_counts.get(hr.ns_pair_no(), 0)
       board_counts[hr.ew_pair_no()] = 1 + board_counts.get(hr.ew_pair_no(), 0)
   return max(board_counts.values())
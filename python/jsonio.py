@@ -1,10 +1,7 @@
 import json
 from calculator import Calls
 from calculator import HandResult
-from calculator import OrderBy
 from calculator import Board
-from calculator import Calculate
-from calculator import TeamSummary
 
 
 def ReadJSONInput(hand_list):
@@ -30,22 +27,71 @@ def ReadJSONInput(hand_list):
   return board_list
   
 
-def OutputJSON(hand_list, team_summaries):
+# Compact encoder for results. Without indentation or sorted keys json uses its
+# C encoder.
+_RESULTS_ENCODER = json.JSONEncoder(separators=(",", ":"))
+# Number of hands serialized into each chunk of OutputJSONChunks.
+_HANDS_PER_CHUNK = 200
+
+
+def OutputJSONChunks(hand_list, team_summaries, sections=None):
+  """ Generates the JSON results of a tournament as a sequence of strings,
+  so that no single string holds all of them. Note that this alone does not
+  stream them: webapp2 buffers the whole response body before sending it.
+
+  Each hand in hand_list is annotated in place with the MPs, RPs and APs both
+  pairs scored on it.
+
+  Args:
+    hand_list: list of hand dicts, see ReadJSONInput.
+    team_summaries: list of TeamSummaries of all pairs, in output order.
+    sections: list of (section name, list of pair numbers) tuples. Optional.
+
+  Yields:
+    Strings that concatenate to a JSON object with keys pair_summaries and
+    hands, and sections if sections is set. sections lists the name of every
+    section and the numbers of its pairs in MP order.
+  """
+  summaries_by_pair = {}
   pair_summaries = []
   for ts in team_summaries:
+    summaries_by_pair[ts.team_no] = ts
     pair_summaries.append({"pair_no": ts.team_no, "mps": ts.mps, "rps": ts.rps, "aps" : ts.aps})
+  header = '{"pair_summaries":' + _RESULTS_ENCODER.encode(pair_summaries)
+  if sections is not None:
+    section_list = []
+    for name, pair_nos in sections:
+      section_summaries = sorted(
+          [summaries_by_pair[p] for p in pair_nos if p in summaries_by_pair],
+          key=lambda ts: ts.mp_rank)
+      section_list.append(
+          {"name": name, "pair_nos": [ts.team_no for ts in section_summaries]})
+    header += ',"sections":' + _RESULTS_ENCODER.encode(section_list)
+  yield header + ',"hands":['
+  chunk = []
+  separator = ""
   for hand in hand_list:
     board_no = hand["board_no"]
-    ns_pair = hand["ns_pair"]
-    ew_pair = hand["ew_pair"]
-    for ts in team_summaries: 
-      if ts.team_no == ns_pair:
-         hand["ns_mps"] = ts.board_mps[board_no]
-         hand["ns_rps"] = ts.board_rps[board_no]
-         hand["ns_aps"] = ts.board_aps[board_no]
-      if ts.team_no == ew_pair:
-         hand["ew_mps"] = ts.board_mps[board_no]
-         hand["ew_rps"] = ts.board_rps[board_no]
-         hand["ew_aps"] = ts.board_aps[board_no]
-  ret = {"pair_summaries": pair_summaries, "hands": hand_list}
-  return json.dumps(ret, sort_keys=True, indent=2)
+    ns_points = summaries_by_pair[hand["ns_pair"]].board_points[board_no]
+    ew_points = summaries_by_pair[hand["ew_pair"]].board_points[board_no]
+    hand["ns_mps"] = ns_points.mps
+    hand["ns_rps"] = ns_points.rps
+    hand["ns_aps"] = ns_points.aps
+    hand["ew_mps"] = ew_points.mps
+    hand["ew_rps"] = ew_points.rps
+    hand["ew_aps"] = ew_points.aps
+    chunk.append(_RESULTS_ENCODER.encode(hand))
+    if len(chunk) == _HANDS_PER_CHUNK:
+      yield separator + ",".join(chunk)
+      chunk = []
+      separator = ","
+  if chunk:
+    yield separator + ",".join(chunk)
+  yield "]}"
+
+
+def OutputJSON(hand_list, team_summaries, sections=None):
+  """ Returns the JSON results of a tournament as a single string. See
+      OutputJSONChunks.
+  """
+  return "".join(OutputJSONChunks(hand_list, team_summaries, sections))
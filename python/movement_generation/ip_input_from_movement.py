@@ -8,6 +8,8 @@
 ###  
 ### After this is finished, use submit ample_data.txt, model.mod and command.txt
 ### to https://neos-server.org/neos/solvers/lp:Gurobi/AMPL.html.
+###
+### optimize_movement.py minimizes the same objective locally, without NEOS.
 
 import json
 import os
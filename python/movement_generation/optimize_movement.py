@@ -0,0 +1,225 @@
+#!/usr/bin/python
+
+### This program reseats an existing movement to make it as fair as possible,
+### without a remote solver. It minimizes the same objective as model.mod: for
+### every pair, the sum over all other two pairs of the difference between the
+### number of board sets it is compared with each of them.
+### Example commandline:
+### python optimize_movement.py -i <path to an existing movement> \
+###    -o <output file> [-n <number of iterations>] [-s <seed>]
+###
+### If -o is not specified, the input movement is overwritten. Only the N/E
+### seat of each pair changes; opponents, hands and tables are kept as is.
+
+import json
+import math
+import os
+import random
+import sys, getopt
+from collections import defaultdict
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.pardir, os.pardir, "api", "src"))
+from movement_fairness import Imbalance
+
+DEFAULT_ITERATIONS = 300000
+
+
+def GetNumHandsPerRound(movement):
+  '''Determines the number of hands played in each round'''
+  for (pair, pair_movements) in movement.items():
+    for round in pair_movements:
+      if not round.get('hands', None):
+        continue;
+      return len(round['hands'])
+
+
+def GetMatchups(movement):
+  '''Returns the list of (hand set, lower pair, higher pair, lower pair is north)
+  tuples of every table in the movement.
+
+    Hand set identifiers are computed the same way as ip_input_from_movement.py.
+  '''
+  num_hands_per_round = GetNumHandsPerRound(movement)
+  matchups = []
+  for (pair, pair_movements) in movement.items():
+    for round in pair_movements:
+      if not round.get('opponent', None):
+        continue
+      opp = round['opponent']
+      if opp < int(pair):
+        continue
+      hand_set_identifier = round['hands'][num_hands_per_round - 1] / num_hands_per_round
+      matchups.append((hand_set_identifier, int(pair), opp,
+                       round['position'].endswith('N')))
+  matchups.sort()
+  return matchups
+
+
+class FairnessState(object):
+  '''Seating of every matchup along with the comparison counts and objective.
+
+  Attributes:
+    north: List of booleans. north[m] is True if the lower pair of matchup m
+      sits North/South.
+    objective: Integer. Value of the fairness objective for this seating.
+  '''
+  def __init__(self, matchups, num_pairs):
+    self._matchups = matchups
+    self._num_pairs = num_pairs
+    self.north = [m[3] for m in matchups]
+    # Matchups sharing a hand set with matchup m, other than m itself.
+    by_hand_set = defaultdict(list)
+    for i, m in enumerate(matchups):
+      by_hand_set[m[0]].append(i)
+    self._neighbours = [[j for j in by_hand_set[m[0]] if j != i]
+                        for i, m in enumerate(matchups)]
+    # Number of hand sets two pairs play in the same direction without facing
+    # each other. Row p of the objective only uses the entries of other pairs.
+    self._comparisons = [[0] * (num_pairs + 1) for _ in xrange(num_pairs + 1)]
+    for i in xrange(len(matchups)):
+      for j in self._neighbours[i]:
+        if j > i:
+          self._AddComparisons(i, j, 1)
+    self._row_costs = [0] + [self._ComputeRowCost(p)
+                             for p in xrange(1, num_pairs + 1)]
+    self.objective = sum(self._row_costs)
+
+  def FlipDelta(self, i):
+    '''Returns the change in the objective if matchup i swapped seats.'''
+    rows = self._ApplyFlip(i)
+    delta = sum(self._ComputeRowCost(p) - self._row_costs[p] for p in rows)
+    self._ApplyFlip(i)
+    return delta
+
+  def Flip(self, i):
+    '''Swaps the seats of matchup i and updates the objective.'''
+    for p in self._ApplyFlip(i):
+      cost = self._ComputeRowCost(p)
+      self.objective += cost - self._row_costs[p]
+      self._row_costs[p] = cost
+
+  def _ApplyFlip(self, i):
+    '''Swaps the seats of matchup i and updates the comparison counts.
+
+    Returns:
+      Set of pairs whose objective row changed.
+    '''
+    for j in self._neighbours[i]:
+      self._AddComparisons(i, j, -1)
+    self.north[i] = not self.north[i]
+    for j in self._neighbours[i]:
+      self._AddComparisons(i, j, 1)
+    rows = set(self._matchups[i][1:3])
+    for j in self._neighbours[i]:
+      rows.update(self._matchups[j][1:3])
+    return rows
+
+  def _AddComparisons(self, i, j, weight):
+    '''Adds weight to the counts of the pairs of matchups i and j sitting in
+    the same direction.
+    '''
+    _, i_low, i_high, i_north = self._matchups[i]
+    _, j_low, j_high, j_north = self._matchups[j]
+    if self.north[i] == self.north[j]:
+      same = ((i_low, j_low), (i_high, j_high))
+    else:
+      same = ((i_low, j_high), (i_high, j_low))
+    for p, q in same:
+      self._comparisons[p][q] += weight
+      self._comparisons[q][p] += weight
+
+  def _ComputeRowCost(self, p):
+    row = self._comparisons[p]
+    return Imbalance([row[q] for q in xrange(1, self._num_pairs + 1) if q != p])
+
+
+def Optimize(movement, iterations=DEFAULT_ITERATIONS, seed=None):
+  '''Reseats the movement by simulated annealing over single matchup flips.
+
+  Args:
+    movement: Dict loaded from a movement file. Not modified.
+    iterations: Integer. Number of flips to try.
+    seed: Optional seed for the random number generator.
+
+  Returns:
+    Tuple (objective before, objective after, optimized movement dict).
+  '''
+  rng = random.Random(seed)
+  matchups = GetMatchups(movement)
+  state = FairnessState(matchups, len(movement))
+  initial = state.objective
+  best = state.objective
+  best_north = list(state.north)
+  if not matchups or iterations < 1:
+    return (initial, best, ApplySeating(movement, matchups, best_north))
+  # Scale the temperature to the size of a typical move, which grows quickly
+  # with the number of pairs, and cool geometrically to a greedy search. The
+  # start is hot enough to leave the local optima a poor seating starts in.
+  sample = [abs(state.FlipDelta(rng.randrange(len(matchups))))
+            for _ in xrange(100)]
+  typical_delta = max(1.0, float(sum(sample)) / len(sample))
+  start_temperature = typical_delta * 2
+  end_temperature = typical_delta / 50
+  for it in xrange(iterations):
+    temperature = start_temperature * math.pow(
+        end_temperature / start_temperature, float(it) / iterations)
+    i = rng.randrange(len(matchups))
+    delta = state.FlipDelta(i)
+    if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+      state.Flip(i)
+      if state.objective < best:
+        best = state.objective
+        best_north = list(state.north)
+  return (initial, best, ApplySeating(movement, matchups, best_north))
+
+
+def ApplySeating(movement, matchups, north):
+  '''Returns a copy of movement where the lower pair of matchups[m] sits
+  North/South iff north[m]. Table numbers are kept.
+  '''
+  movement = json.loads(json.dumps(movement))
+  num_hands_per_round = GetNumHandsPerRound(movement)
+  seating = {}
+  for m, is_north in zip(matchups, north):
+    seating[(m[0], m[1])] = is_north
+    seating[(m[0], m[2])] = not is_north
+  for (pair, pair_movements) in movement.items():
+    for round in pair_movements:
+      if not round.get('opponent', None):
+        continue
+      hand_set_identifier = round['hands'][num_hands_per_round - 1] / num_hands_per_round
+      table = round['position'][:-1]
+      is_north = seating[(hand_set_identifier, int(pair))]
+      round['position'] = table + ("N" if is_north else "E")
+  return movement
+
+
+def main(argv):
+  inputfile = ''
+  outputfile = ''
+  iterations = DEFAULT_ITERATIONS
+  seed = None
+  opts, args = getopt.getopt(argv, "i:o:n:s:")
+  for opt, arg in opts:
+      if opt in ("-i", "--ifile"):
+        inputfile = arg
+      elif opt in ("-o", "--ofile"):
+        outputfile = arg
+      elif opt == "-n":
+        iterations = int(arg)
+      elif opt == "-s":
+        seed = int(arg)
+  json_data=open(os.path.join(os.getcwd(), inputfile)).read()
+  movement = json.loads(json_data)
+
+  initial, best, optimized = Optimize(movement, iterations, seed)
+  print "Fairness objective {} -> {}".format(initial, best)
+
+  output = open(os.path.join(os.getcwd(), outputfile or inputfile), "w")
+  output.write(json.dumps(optimized, sort_keys=True, indent = 2))
+  output.close()
+
+
+if __name__ == "__main__":
+   main(sys.argv[1:])
@@ -6,8 +6,8 @@ import os
 
 from board import *
 from teams import ExtractTeamNames
-from calculator import OrderBy
 from reportlab.lib.pagesizes import LETTER
+from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfgen import canvas
 from reportlab.platypus import Table, TableStyle
 from svglib.svglib import svg2rlg
@@ -238,6 +238,16 @@ _COLORS = [
 ]
 
 
+def Preload():
+  """Parses the suit icons and loads the metrics of every font boards and
+  results are rendered in, so that the first pdf request does not pay for it.
+  """
+  for color in _COLORS:
+    color.GetSymbol()
+  for font_name in ['Helvetica', 'Helvetica-Bold']:
+    pdfmetrics.getFont(font_name)
+
+
 def _Offsets(*args):
   """Combines any number of given offsets, relative to the upper left corner.
 
@@ -397,7 +407,6 @@ def _RenderResultsOverview(c, tourney_name, summaries, player_futures):
   c.setFont('Helvetica-Bold', 32)
   c.drawCentredString(titleLocation[0], titleLocation[1], tourney_name + " Results")
 
-  OrderBy(summaries, "MP")
   rows = [["Place", "Team", "Match Points"]]
   place = 1
   for summary in summaries:
@@ -471,7 +480,8 @@ def RenderBoardsToIo(boards, write_target):
   c.save()
 
 
-def RenderResultsToIo(tourney_name, boards, hand_results, summaries, player_futures, write_target):
+def RenderResultsToIo(tourney_name, boards, hand_results, summaries, player_futures, write_target,
+                      sections=None):
   """Renders tournament results to the passed output stream.
 
   Args:
@@ -481,13 +491,21 @@ def RenderResultsToIo(tourney_name, boards, hand_results, summaries, player_futu
     hand_results: List of calculator.Board objects. Board results sorted by
         board order.
     summaries: List of calculator.TeamSummary objects. Team summaries for the
-        tournament.
+        tournament in descending total MP order.
     player_futures: <fill in>
     write_target: Output stream or file name. Location to write the results to.
+    sections: List of (section name, list of team numbers) tuples. If there is
+        more than one section, each section gets its own overview page
+        following the overall one.
   """
   c = canvas.Canvas(write_target, pagesize=LETTER)
 
   _RenderResultsOverview(c, tourney_name, summaries, player_futures)
+  if sections and len(sections) > 1:
+    for name, team_nos in sections:
+      _RenderResultsOverview(c, "{} Section {}".format(tourney_name, name),
+                             [s for s in summaries if s.team_no in team_nos],
+                             player_futures)
 
   for board, hand in zip(boards, hand_results):
     _BoardRenderer(board, c).RenderFull((_CENTER_X, _RESULTS_CENTER_Y), highlightFirstEight=True)
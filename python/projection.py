@@ -0,0 +1,215 @@
+""" Monte Carlo projection of the final standings of an unfinished tournament. """
+
+import time
+
+import numpy
+
+from calculator import Board
+from calculator import Calls
+from calculator import HandResult
+
+# Number of simulations scored together by the array operations of one batch.
+# Bounds the memory of the pairwise comparisons and how often the deadline is
+# checked.
+BATCH_SIZE = 250
+
+# (MP factor, RP factor) of every average score, as in calculator.Board.
+_AVG_FACTORS = {
+    "AVG": (1.0, 0.0),
+    "AVG+": (1.2, 0.2),
+    "AVG++": (1.6, 0.6),
+    "AVG-": (0.8, -0.2),
+    "AVG--": (0.4, -0.6),
+}
+
+
+class _IncompleteBoard(object):
+  """ Arrays describing a board that still has unplayed hands.
+
+  Pairs are given by their index in the sorted list of all pairs. Scored
+  non-average hands come first in ns_pairs and ew_pairs, followed by the
+  unplayed ones.
+  """
+  __slots__ = ["scored_diffs", "ns_pairs", "ew_pairs", "num_unplayed",
+               "avg_lines", "num_avg", "samples"]
+
+
+class Projection(object):
+  """ Simulates completions of an unfinished tournament.
+
+  Every unplayed hand is given a score sampled from the results already scored
+  on the same board, or from all scored results if nobody has played the board
+  yet. Boards with no unplayed hands are scored once up front with
+  calculator.Board. Incomplete boards are scored for a whole batch of
+  simulations at once with NumPy, replicating calculator.Board's MPs and RPs.
+  """
+
+  def __init__(self, hand_list, unplayed_hands, seed=None):
+    """ Prepares the simulation.
+
+    Args:
+      hand_list: List of scored hand dicts, see jsonio.ReadJSONInput.
+      unplayed_hands: List of (board_no, ns_pair, ew_pair) tuples of all hands
+        that are still to be played.
+      seed: Optional seed for the sampled scores.
+
+    Raises:
+      ValueError: if there are unplayed hands but no scored hand has a score
+        to sample from.
+    """
+    self._rng = numpy.random.RandomState(seed)
+    scored = {}
+    board_samples = {}
+    all_samples = []
+    num_boards = {}
+    for hand in hand_list:
+      hr = HandResult(hand["board_no"], hand["ns_pair"], hand["ew_pair"],
+                      hand["ns_score"], hand["ew_score"],
+                      Calls.FromDict(hand["calls"]))
+      scored.setdefault(hr.board_no(), []).append(hr)
+      if hr.diff() != "AVG":
+        board_samples.setdefault(hr.board_no(), []).append(hr.diff())
+        all_samples.append(hr.diff())
+      for pair_no in (hr.ns_pair_no(), hr.ew_pair_no()):
+        num_boards[pair_no] = num_boards.get(pair_no, 0) + 1
+
+    unplayed = {}
+    for board_no, ns_pair, ew_pair in unplayed_hands:
+      unplayed.setdefault(board_no, []).append((ns_pair, ew_pair))
+      for pair_no in (ns_pair, ew_pair):
+        num_boards[pair_no] = num_boards.get(pair_no, 0) + 1
+    if unplayed and not all_samples:
+      raise ValueError("No scored hands to sample from")
+
+    self._pairs = sorted(num_boards)
+    index = dict((pair_no, i) for i, pair_no in enumerate(self._pairs))
+
+    # Number of boards every pair plays once the tournament is complete, used
+    # for sit-out bonuses the same way calculator.Results does.
+    num_rounds = max(num_boards.values()) if num_boards else 0
+    self._sit_out_factor = numpy.array(
+        [float(num_rounds) / num_boards[p] if num_boards[p] < num_rounds else 1
+         for p in self._pairs])
+
+    # Totals from complete boards, which are the same in every simulation.
+    self._fixed_mps = numpy.zeros(len(self._pairs))
+    self._fixed_rps = numpy.zeros(len(self._pairs))
+    for board_no, hand_results in scored.items():
+      if board_no in unplayed:
+        continue
+      for bsl in Board(board_no, hand_results).ScoreBoard():
+        hr = bsl.hr()
+        self._fixed_mps[index[hr.ns_pair_no()]] += bsl.ns_mps
+        self._fixed_rps[index[hr.ns_pair_no()]] += bsl.ns_rps
+        self._fixed_mps[index[hr.ew_pair_no()]] += bsl.ew_mps
+        self._fixed_rps[index[hr.ew_pair_no()]] += bsl.ew_rps
+
+    self._incomplete = []
+    for board_no in sorted(unplayed):
+      hand_results = scored.get(board_no, [])
+      non_avg = [hr for hr in hand_results if hr.diff() != "AVG"]
+      board = _IncompleteBoard()
+      board.scored_diffs = numpy.array([hr.diff() for hr in non_avg],
+                                       dtype=numpy.int64)
+      board.ns_pairs = numpy.array(
+          [index[hr.ns_pair_no()] for hr in non_avg] +
+          [index[ns_pair] for ns_pair, _ in unplayed[board_no]])
+      board.ew_pairs = numpy.array(
+          [index[hr.ew_pair_no()] for hr in non_avg] +
+          [index[ew_pair] for _, ew_pair in unplayed[board_no]])
+      board.num_unplayed = len(unplayed[board_no])
+      # (pair index, MP factor, RP factor) of both sides of every AVG hand.
+      board.avg_lines = []
+      for hr in hand_results:
+        if hr.diff() == "AVG":
+          board.avg_lines.append(
+              (index[hr.ns_pair_no()],) + _AVG_FACTORS[hr.ns_score()])
+          board.avg_lines.append(
+              (index[hr.ew_pair_no()],) + _AVG_FACTORS[hr.ew_score()])
+      board.num_avg = len(hand_results) - len(non_avg)
+      board.samples = numpy.array(board_samples.get(board_no) or all_samples,
+                                  dtype=numpy.int64)
+      self._incomplete.append(board)
+
+  def Run(self, num_simulations, deadline_sec=None):
+    """ Runs up to num_simulations simulated completions.
+
+    Args:
+      num_simulations: Integer. Number of simulations to run.
+      deadline_sec: Optional number of seconds after which no new batch of
+        simulations is started.
+
+    Returns:
+      Dict with keys "simulations", the number of simulations run, and "pairs",
+      a list ordered by pair number of dicts with keys "pair_no", "mean_mps"
+      and "place_probabilities". The latter lists the probability of finishing
+      in each place, starting with first.
+    """
+    start = time.time()
+    num_pairs = len(self._pairs)
+    place_counts = numpy.zeros(num_pairs * num_pairs, dtype=numpy.int64)
+    mps_sums = numpy.zeros(num_pairs)
+    runs = 0
+    while runs < num_simulations:
+      if deadline_sec is not None and time.time() - start > deadline_sec:
+        break
+      batch = min(BATCH_SIZE, num_simulations - runs)
+      mps, rps = self._SimulateBatch(batch)
+      mps *= self._sit_out_factor
+      rps *= self._sit_out_factor
+      # Same order as the MP ranking of calculator.Rankings: MPs, then RPs,
+      # then pair number, which the stable sort keeps from the column order.
+      order = numpy.lexsort((-rps, -mps))
+      place_counts += numpy.bincount(
+          (order * num_pairs + numpy.arange(num_pairs)).ravel(),
+          minlength=num_pairs * num_pairs)
+      mps_sums += mps.sum(axis=0)
+      runs += batch
+
+    place_counts = place_counts.reshape((num_pairs, num_pairs))
+    ret = {"simulations": runs, "pairs": []}
+    for i, pair_no in enumerate(self._pairs):
+      ret["pairs"].append({
+          "pair_no": pair_no,
+          "mean_mps": float(mps_sums[i]) / runs if runs else 0,
+          "place_probabilities":
+              [float(c) / runs if runs else 0 for c in place_counts[i]],
+      })
+    return ret
+
+  def _SimulateBatch(self, num_simulations):
+    """ Returns (mps, rps), arrays of the total MPs and RPs of every pair,
+    before sit-out bonuses, in num_simulations simulated completions. """
+    mps = numpy.tile(self._fixed_mps, (num_simulations, 1))
+    rps = numpy.tile(self._fixed_rps, (num_simulations, 1))
+    for board in self._incomplete:
+      sampled = board.samples[self._rng.randint(
+          0, len(board.samples), (num_simulations, board.num_unplayed))]
+      diffs = numpy.hstack(
+          [numpy.tile(board.scored_diffs, (num_simulations, 1)), sampled])
+      num_hands = diffs.shape[1]
+
+      # MPs as in calculator.Board._mp_ranks, from the number of lower and
+      # equal diffs on the board in the same simulation.
+      lower = (diffs[:, numpy.newaxis, :] < diffs[:, :, numpy.newaxis]).sum(
+          axis=2)
+      equal = (diffs[:, numpy.newaxis, :] == diffs[:, :, numpy.newaxis]).sum(
+          axis=2)
+      ties = 0.5 * (equal + board.num_avg) - 0.5
+      mps[:, board.ns_pairs] += lower + ties
+      mps[:, board.ew_pairs] += (num_hands - lower - equal) + ties
+
+      # Python 2 integer division, like calculator.Board._get_avg_score_diff.
+      avg_diff = numpy.floor_divide(diffs.sum(axis=1), num_hands)
+      deviation = diffs - avg_diff[:, numpy.newaxis]
+      ns_rps = numpy.sign(deviation) * numpy.log1p(numpy.abs(deviation))
+      rps[:, board.ns_pairs] += ns_rps
+      rps[:, board.ew_pairs] -= ns_rps
+
+      if board.avg_lines:
+        avg_mps = (num_hands + board.num_avg - 1) / 2.0
+        max_rps = numpy.abs(ns_rps).max(axis=1)
+        for pair, mp_factor, rp_factor in board.avg_lines:
+          mps[:, pair] += avg_mps * mp_factor
+          rps[:, pair] += rp_factor * max_rps
+    return mps, rps
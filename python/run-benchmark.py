@@ -0,0 +1,140 @@
+#!/usr/bin/python
+
+### Times the results pipeline on synthetic tournaments.
+### Example commandline:
+### python run-benchmark.py -m ../api/src/movement_files -b benchmark_baseline.json
+###
+### Every movement in the movement directory is scored with random valid hands,
+### as are a few large barometer fields. For each tournament the script times
+### hand validation (ReadJSONInput), scoring (Results), OutputJSON and XLSX
+### generation and compares them to the baseline. Timings depend on the
+### machine, so the baseline is not checked in: record one on your machine
+### with -w before making a change, then run without -w to compare.
+
+import json
+import os
+import sys, getopt
+import time
+
+from calculator import Results
+from jsonio import OutputJSON
+from jsonio import ReadJSONInput
+import synthetic
+import xlsxio
+
+# (no_pairs, no_rounds, no_hands_per_round) of the large barometer fields.
+_LARGE_FIELDS = [(50, 8, 3), (100, 8, 3), (200, 8, 3), (400, 8, 3)]
+
+_PHASES = ["validation", "calculate", "output_json", "xlsx"]
+
+
+def _BestTime(func, repeat, setup=lambda: None):
+  """ Runs func repeat times and returns the fastest run in seconds and the
+      result of the last run. func is passed the result of setup, which is not
+      timed.
+  """
+  best = None
+  for i in xrange(repeat):
+    arg = setup()
+    start = time.time()
+    ret = func(arg)
+    elapsed = time.time() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best, ret
+
+
+def TimeTournament(hand_list, repeat):
+  """ Times every phase of the results pipeline on hand_list.
+
+  Returns:
+    Dict from phase name to the fastest time in seconds.
+  """
+  timings = {}
+  timings["validation"], _ = _BestTime(
+      lambda _: ReadJSONInput(hand_list), repeat)
+  # Results skips boards that are already scored so each run needs fresh ones.
+  timings["calculate"], results = _BestTime(
+      Results, repeat, lambda: ReadJSONInput(hand_list))
+  summaries = results.team_summaries()
+  rankings = results.rankings()
+  timings["output_json"], _ = _BestTime(
+      lambda hands: OutputJSON(hands, summaries), repeat,
+      lambda: [dict(h) for h in hand_list])
+  timings["xlsx"], _ = _BestTime(
+      lambda _: xlsxio.OutputWorkbookAsBytesIO(xlsxio.WriteResultsToXlsx(
+          results.max_rounds(), rankings.Ordered("MP"),
+          rankings.Ordered("AP"), results.boards())),
+      repeat)
+  return timings
+
+
+def Tournaments(movement_dir):
+  """ Returns a list of (name, hand_list) of all benchmarked tournaments. """
+  tournaments = []
+  for path in synthetic.MovementFiles(movement_dir):
+    name = os.path.splitext(os.path.basename(path))[0]
+    tournaments.append((name, synthetic.HandListFromMovementFile(path)))
+  for no_pairs, no_rounds, no_hands in _LARGE_FIELDS:
+    tournaments.append(
+        ("{}_pair_barometer_{}_rounds".format(no_pairs, no_rounds),
+         synthetic.BarometerHandList(no_pairs, no_rounds, no_hands)))
+  return tournaments
+
+
+def main(argv):
+  movement_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "..", "api", "src", "movement_files")
+  baseline_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "benchmark_baseline.json")
+  repeat = 3
+  threshold = 1.25
+  write_baseline = False
+  opts, args = getopt.getopt(argv, "m:b:r:t:w")
+  for opt, arg in opts:
+      if opt == "-m":
+        movement_dir = arg
+      elif opt == "-b":
+        baseline_file = arg
+      elif opt == "-r":
+        repeat = int(arg)
+      elif opt == "-t":
+        threshold = float(arg)
+      elif opt == "-w":
+        write_baseline = True
+
+  baseline = {}
+  if os.path.exists(baseline_file):
+    baseline = json.loads(open(baseline_file).read())
+  elif not write_baseline:
+    print "No baseline at {0}, record one with -w".format(baseline_file)
+
+  current = {}
+  regressions = []
+  print "{0:40s} {1:>12s} {2:>10s} {3:>10s}".format(
+      "Tournament", "Phase", "Seconds", "Baseline")
+  for name, hand_list in Tournaments(movement_dir):
+    current[name] = TimeTournament(hand_list, repeat)
+    for phase in _PHASES:
+      seconds = current[name][phase]
+      expected = baseline.get(name, {}).get(phase)
+      print "{0:40s} {1:>12s} {2:10.4f} {3:>10s}".format(
+          name, phase, seconds,
+          "{0:.4f}".format(expected) if expected is not None else "-")
+      # Ignore noise on phases that take less than a millisecond.
+      if (expected is not None and seconds > 0.001 and
+          seconds > expected * threshold):
+        regressions.append((name, phase, seconds, expected))
+
+  if write_baseline:
+    with open(baseline_file, "w") as f:
+      f.write(json.dumps(current, sort_keys=True, indent=2))
+    print "Wrote baseline to " + baseline_file
+    return 0
+
+  for name, phase, seconds, expected in regressions:
+    print "REGRESSION {0} {1}: {2:.4f}s vs {3:.4f}s baseline".format(
+        name, phase, seconds, expected)
+  return 1 if regressions else 0
+
+if __name__ == "__main__":
+   sys.exit(main(sys.argv[1:]))
@@ -1,30 +1,174 @@
 #!/usr/bin/python
 
-from calculator import Calculate
-from calculator import OrderBy
-from calculator import GetMaxRounds
+### Scores tournaments stored as XLSX workbooks.
+### Example commandlines:
+### python run-calculator.py -i <input workbook> -o <output workbook>
+### python run-calculator.py -b '<directory or glob of workbooks>' \
+###    -o <output directory> [-j <number of processes>] [-s <summary csv>]
+###
+### In batch mode every workbook is scored in a pool of processes and its
+### results are written to the output directory, which is required, as
+### <name>_results.xlsx under the same subdirectory the input has relative to
+### the other inputs. Inputs named *_results.xlsx are skipped, so the output
+### directory may be the input directory. A summary CSV with the totals and
+### ranks of every team in every tournament is written next to them, and
+### per-file timings and failures are printed.
+
+from calculator import Results
 import xlsxio
+import csv
+import glob
+import multiprocessing
+import os
 import sys, getopt
-      
+import time
+import traceback
+
+SUMMARY_HEADERS = ["File", "Team", "MP Rank", "MPs", "RPs", "LPs", "APs"]
+# Suffix of the results workbooks written in batch mode.
+RESULTS_SUFFIX = "_results.xlsx"
+
+
+def ScoreWorkbook(inputfile, outputfile):
+  """ Scores the tournament in inputfile and writes the results to outputfile.
+
+  Returns:
+    Tuple of TeamSummaries ordered by MP.
+  """
+  input_wb, board_list = xlsxio.ReadXlsxInput(inputfile)
+  results = Results(board_list)
+  mp_summaries = results.rankings().Ordered("MP")
+  ap_summaries = results.rankings().Ordered("AP")
+  wb = xlsxio.WriteResultsToXlsx(results.max_rounds(), mp_summaries,
+                                 ap_summaries, results.boards(),
+                                 input_wb=input_wb)
+  wb.save(outputfile)
+  return mp_summaries
+
+
+def _ScoreWorkbookInBatch(args):
+  """ Pool worker for batch mode. Never raises so one bad workbook does not
+  stop the batch.
+
+  Args:
+    args: Tuple (inputfile, outputfile, name), where name identifies the
+      workbook in the summary.
+
+  Returns:
+    Tuple (inputfile, seconds, summary rows, error). error is None on success.
+  """
+  inputfile, outputfile, name = args
+  start = time.time()
+  try:
+    summaries = ScoreWorkbook(inputfile, outputfile)
+  except Exception:
+    return (inputfile, time.time() - start, [], traceback.format_exc())
+  rows = [[name, ts.team_no, ts.mp_rank, ts.mps, ts.rps, ts.lps, ts.aps]
+          for ts in summaries]
+  return (inputfile, time.time() - start, rows, None)
+
+
+def _BatchInputFiles(pattern):
+  """ Returns the sorted list of workbooks in a directory or matching a glob,
+  leaving out results written by an earlier batch.
+  """
+  if os.path.isdir(pattern):
+    pattern = os.path.join(pattern, "*.xlsx")
+  return sorted(f for f in glob.glob(pattern)
+                if not f.endswith(RESULTS_SUFFIX))
+
+
+def _BatchNames(inputfiles):
+  """ Returns the path of every input relative to the deepest directory
+  containing all of them, without extension. Unlike the base names these are
+  unique even if the inputs come from several directories.
+  """
+  dirs = [os.path.dirname(os.path.abspath(f)) + os.sep for f in inputfiles]
+  base = os.path.dirname(os.path.commonprefix(dirs))
+  return [os.path.splitext(os.path.relpath(os.path.abspath(f), base))[0]
+          for f in inputfiles]
+
+
+def RunBatch(pattern, outputdir, processes=None, summaryfile=None):
+  """ Scores every workbook matched by pattern across a process pool.
+
+  Args:
+    pattern: Directory or glob of input workbooks.
+    outputdir: Directory for the results workbooks. Created if missing.
+    processes: Size of the process pool. Defaults to the number of CPUs.
+    summaryfile: Path of the summary CSV. Defaults to summary.csv in
+      outputdir.
+
+  Returns:
+    Number of workbooks that failed to score.
+
+  Raises:
+    ValueError: if outputdir is empty.
+  """
+  if not outputdir:
+    raise ValueError("Batch mode needs an output directory")
+  inputfiles = _BatchInputFiles(pattern)
+  summaryfile = summaryfile or os.path.join(outputdir, "summary.csv")
+  tasks = []
+  for inputfile, name in zip(inputfiles, _BatchNames(inputfiles)):
+    outputfile = os.path.join(outputdir, name + RESULTS_SUFFIX)
+    if not os.path.isdir(os.path.dirname(outputfile)):
+      os.makedirs(os.path.dirname(outputfile))
+    tasks.append((inputfile, outputfile, name))
+  if not os.path.isdir(outputdir):
+    os.makedirs(outputdir)
+
+  start = time.time()
+  pool = multiprocessing.Pool(processes)
+  try:
+    outcomes = pool.map(_ScoreWorkbookInBatch, tasks, chunksize=1)
+  finally:
+    pool.close()
+    pool.join()
+
+  failures = 0
+  with open(summaryfile, "wb") as f:
+    writer = csv.writer(f)
+    writer.writerow(SUMMARY_HEADERS)
+    for inputfile, seconds, rows, error in outcomes:
+      if error:
+        failures += 1
+        print "FAILED {0} ({1:.2f}s)\n{2}".format(inputfile, seconds, error)
+        continue
+      print "OK     {0} ({1:.2f}s)".format(inputfile, seconds)
+      writer.writerows(rows)
+  print "Scored {0} of {1} workbooks in {2:.2f}s. Summary in {3}".format(
+      len(outcomes) - failures, len(outcomes), time.time() - start,
+      summaryfile)
+  return failures
+
+
 def main(argv):
   inputfile = ''
   outputfile = ''
-  opts, args = getopt.getopt(argv, "i:o:n:")
+  batch = ''
+  processes = None
+  summaryfile = None
+  opts, args = getopt.getopt(argv, "i:o:n:b:j:s:")
   for opt, arg in opts:
       if opt in ("-i", "--ifile"):
         inputfile = arg
       elif opt in ("-o", "--ofile"):
         outputfile = arg
-  
-  input_wb, board_list = xlsxio.ReadXlsxInput(inputfile)
-  max_rounds = GetMaxRounds(board_list)
-  summaries = Calculate(board_list, max_rounds)
-  mp_summaries = summaries
-  ap_summaries = summaries
-  board_list.sort(key=lambda bs : bs._board_no, reverse = False)
-  wb = xlsxio.WriteResultsToXlsx(max_rounds, mp_summaries, ap_summaries,
-                                 board_list, input_wb)                       
-  wb.save(outputfile)
+      elif opt == "-b":
+        batch = arg
+      elif opt == "-j":
+        processes = int(arg)
+      elif opt == "-s":
+        summaryfile = arg
+
+  if batch:
+    if not outputfile:
+      print "Batch mode needs an output directory, set with -o"
+      return 2
+    return 1 if RunBatch(batch, outputfile, processes, summaryfile) else 0
+  ScoreWorkbook(inputfile, outputfile)
+  return 0
 
 if __name__ == "__main__":
-   main(sys.argv[1:])
\ No newline at end of file
+   sys.exit(main(sys.argv[1:]))
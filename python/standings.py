@@ -0,0 +1,233 @@
+import json
+from calculator import Board
+from calculator import BoardPoints
+from calculator import BoardScoreLine
+from calculator import Calls
+from calculator import HandResult
+from calculator import Results
+from calculator import TeamSummary
+
+# Fields of a hand dict, in the order ToJson packs them.
+_HAND_FIELDS = ("board_no", "ns_pair", "ew_pair", "ns_score", "ew_score",
+                "calls", "notes")
+
+
+class Standings:
+  """ Scores of a tournament that are kept up to date one hand at a time.
+
+  Every change to a hand only rescores the board the hand was played on and
+  re-adds the totals of the pairs that play that board, so reading the results
+  never requires scoring the whole tournament or summing its boards.
+
+  Hands are dicts with the structure used by jsonio.ReadJSONInput, i.e. with
+  keys board_no, ns_pair, ew_pair, ns_score, ew_score, calls and notes.
+  """
+
+  def __init__(self):
+    # Board number to the list of hand dicts played on that board.
+    self._hands = {}
+    # Pair number to a dict from board number to [mps, rps, lps, aps] scored
+    # by the pair on that board.
+    self._pair_boards = {}
+    # Pair number to [mps, rps, lps, aps] summed over all boards, before
+    # sit-out bonuses.
+    self._pair_totals = {}
+
+  @classmethod
+  def FromHandList(cls, hand_list):
+    """ Builds standings for all hands in hand_list. """
+    standings = cls()
+    for hand in hand_list:
+      standings._hands.setdefault(hand["board_no"], []).append(dict(hand))
+    for board_no in standings._hands.keys():
+      standings._RescoreBoard(board_no)
+    return standings
+
+  @classmethod
+  def FromJson(cls, standings_json):
+    """ Loads standings serialized with ToJson, or with its older unpacked
+        format of nested dicts.
+    """
+    standings_dict = json.loads(standings_json)
+    standings = cls()
+    if "packed" in standings_dict:
+      for packed_hand in standings_dict["packed"]["hands"]:
+        hand = dict(zip(_HAND_FIELDS, packed_hand))
+        standings._hands.setdefault(hand["board_no"], []).append(hand)
+      for pair_no, board_no, mps, rps, lps, aps in (
+          standings_dict["packed"]["pair_boards"]):
+        standings._pair_boards.setdefault(pair_no, {})[board_no] = [
+            mps, rps, lps, aps]
+      for packed_totals in standings_dict["packed"].get("pair_totals", []):
+        standings._pair_totals[packed_totals[0]] = packed_totals[1:]
+    else:
+      for board_no, hands in standings_dict["hands"].items():
+        standings._hands[int(board_no)] = hands
+      for pair_no, boards in standings_dict["pair_boards"].items():
+        standings._pair_boards[int(pair_no)] = dict(
+            (int(board_no), scores) for board_no, scores in boards.items())
+    if len(standings._pair_totals) != len(standings._pair_boards):
+      # Stored before the totals were.
+      for pair_no in standings._pair_boards:
+        standings._SumPairTotals(pair_no)
+    return standings
+
+  @classmethod
+  def HandListFromJson(cls, standings_json):
+    """ Returns the hand dicts of standings serialized with ToJson, ordered by
+        board number, without loading any of their scores.
+    """
+    standings_dict = json.loads(standings_json)
+    if "packed" not in standings_dict:
+      return cls.FromJson(standings_json).HandList()
+    return [dict(zip(_HAND_FIELDS, packed_hand))
+            for packed_hand in standings_dict["packed"]["hands"]]
+
+  @classmethod
+  def Merge(cls, standings_list):
+    """ Combines standings of disjoint sets of boards, e.g. of single boards
+        stored apart, into the standings of all of them.
+    """
+    merged = cls()
+    for standings in standings_list:
+      merged._hands.update(standings._hands)
+      for pair_no, boards in standings._pair_boards.items():
+        merged._pair_boards.setdefault(pair_no, {}).update(boards)
+    for pair_no in merged._pair_boards:
+      merged._SumPairTotals(pair_no)
+    return merged
+
+  def ToJson(self):
+    """ Serializes the standings to a compact json string. Every hand is a
+        list of its fields in the order of _HAND_FIELDS and every score a
+        list [pair_no, board_no, mps, rps, lps, aps] and every total a list
+        [pair_no, mps, rps, lps, aps], so no key is repeated per hand.
+    """
+    hands = [self._PackHand(hand) for board_no in sorted(self._hands)
+             for hand in self._hands[board_no]]
+    pair_boards = [[pair_no, board_no] + scores
+                   for pair_no, boards in sorted(self._pair_boards.items())
+                   for board_no, scores in sorted(boards.items())]
+    pair_totals = [[pair_no] + totals
+                   for pair_no, totals in sorted(self._pair_totals.items())]
+    return json.dumps({"packed": {"hands": hands, "pair_boards": pair_boards,
+                                  "pair_totals": pair_totals}},
+                      separators=(',', ':'))
+
+  def SetHand(self, hand):
+    """ Adds a hand or replaces the hand with the same board and pairs, then
+        rescores its board.
+    """
+    board_no = hand["board_no"]
+    hands = self._hands.setdefault(board_no, [])
+    for i in xrange(len(hands)):
+      if (hands[i]["ns_pair"] == hand["ns_pair"] and
+          hands[i]["ew_pair"] == hand["ew_pair"]):
+        hands[i] = dict(hand)
+        break
+    else:
+      hands.append(dict(hand))
+    self._RescoreBoard(board_no)
+
+  def RemoveHand(self, board_no, ns_pair, ew_pair):
+    """ Removes a hand if it is present and rescores its board. """
+    hands = self._hands.get(board_no, [])
+    remaining = [h for h in hands
+                 if h["ns_pair"] != ns_pair or h["ew_pair"] != ew_pair]
+    if len(remaining) == len(hands):
+      return
+    if remaining:
+      self._hands[board_no] = remaining
+    else:
+      del self._hands[board_no]
+    self._RescoreBoard(board_no)
+
+  def HandList(self):
+    """ Returns copies of all hand dicts ordered by board number. """
+    return [dict(hand) for board_no in sorted(self._hands)
+            for hand in self._hands[board_no]]
+
+  def Results(self):
+    """ Returns the calculator.Results of all hands, ranked from the running
+        totals. The scored Boards are only rebuilt if the Results are asked
+        for them.
+    """
+    team_summaries = []
+    for pair_no, totals in self._pair_totals.items():
+      ts = TeamSummary(pair_no)
+      ts.mps, ts.rps, ts.lps, ts.aps = totals
+      ts.board_points = dict(
+          (board_no, BoardPoints(*scores))
+          for board_no, scores in self._pair_boards[pair_no].items())
+      team_summaries.append(ts)
+    return Results(self.Boards, team_summaries)
+
+  def Boards(self):
+    """ Returns the list of scored Boards ordered by board number, without
+        scoring them again.
+    """
+    boards = []
+    for board_no in sorted(self._hands):
+      hand_results = [self._ToHandResult(h) for h in self._hands[board_no]]
+      board = Board(board_no, hand_results)
+      board_score = []
+      for hr in hand_results:
+        bs = BoardScoreLine(hr)
+        (bs.ns_mps, bs.ns_rps, bs.ns_lps, bs.ns_aps) = \
+            self._pair_boards[hr.ns_pair_no()][board_no]
+        (bs.ew_mps, bs.ew_rps, bs.ew_lps, bs.ew_aps) = \
+            self._pair_boards[hr.ew_pair_no()][board_no]
+        board_score.append(bs)
+      # ScoreBoard lists AVG hands after all other hands before sorting.
+      board_score.sort(key=lambda bs: bs.hr().diff() == "AVG")
+      board.SetBoardScore(board_score)
+      boards.append(board)
+    return boards
+
+  @staticmethod
+  def _PackHand(hand):
+    """ Returns the list of the fields of hand in _HAND_FIELDS order, leaving
+        out trailing fields the hand does not have.
+    """
+    fields = list(_HAND_FIELDS)
+    while fields[-1] not in hand:
+      fields.pop()
+    return [hand[field] for field in fields]
+
+  @staticmethod
+  def _ToHandResult(hand):
+    return HandResult(hand["board_no"], hand["ns_pair"], hand["ew_pair"],
+                      hand["ns_score"], hand["ew_score"],
+                      Calls.FromDict(hand["calls"]))
+
+  def _RescoreBoard(self, board_no):
+    touched_pairs = set()
+    for pair_no, boards in self._pair_boards.items():
+      if boards.pop(board_no, None) is not None:
+        touched_pairs.add(pair_no)
+    hand_results = [self._ToHandResult(h) for h in self._hands.get(board_no, [])]
+    for bsl in Board(board_no, hand_results).ScoreBoard():
+      hr = bsl.hr()
+      self._pair_boards.setdefault(hr.ns_pair_no(), {})[board_no] = [
+          bsl.ns_mps, bsl.ns_rps, bsl.ns_lps, bsl.ns_aps]
+      self._pair_boards.setdefault(hr.ew_pair_no(), {})[board_no] = [
+          bsl.ew_mps, bsl.ew_rps, bsl.ew_lps, bsl.ew_aps]
+      touched_pairs.add(hr.ns_pair_no())
+      touched_pairs.add(hr.ew_pair_no())
+    for pair_no in touched_pairs:
+      self._SumPairTotals(pair_no)
+
+  def _SumPairTotals(self, pair_no):
+    """ Re-adds the totals of pair_no over its boards, dropping the pair if it
+        has no boards left.
+    """
+    boards = self._pair_boards[pair_no]
+    if not boards:
+      del self._pair_boards[pair_no]
+      self._pair_totals.pop(pair_no, None)
+      return
+    # Sum in board order so totals match a full Calculate exactly.
+    totals = [0, 0, 0, 0]
+    for board_no in sorted(boards):
+      totals = [t + s for t, s in zip(totals, boards[board_no])]
+    self._pair_totals[pair_no] = totals
@@ -0,0 +1,132 @@
+""" Generates synthetic, valid tournaments for testing and benchmarking. """
+
+import json
+import os
+import random
+
+# Calls and the probability with which a single player makes them.
+_CALL_WEIGHTS = [("", 0.82), ("T", 0.15), ("GT", 0.03)]
+
+
+def _RandomCall(rng):
+  draw = rng.random()
+  for call, weight in _CALL_WEIGHTS:
+    if draw < weight:
+      return call
+    draw -= weight
+  return ""
+
+
+def _CallScore(call):
+  if call == "T":
+    return 100
+  if call == "GT":
+    return 200
+  return 0
+
+
+def RandomHand(rng, board_no, ns_pair, ew_pair, avg_probability=0.01):
+  """ Returns a hand dict with a random but valid score.
+
+  Args:
+    rng: random.Random used for all choices.
+    board_no: Integer. Board the hand is played on.
+    ns_pair: Integer. North/South pair number.
+    ew_pair: Integer. East/West pair number.
+    avg_probability: Probability that the director assigns average scores.
+
+  Returns:
+    Dict with keys board_no, ns_pair, ew_pair, calls, ns_score, ew_score and
+    notes, as consumed by jsonio.ReadJSONInput.
+  """
+  hand = {"board_no": board_no, "ns_pair": ns_pair, "ew_pair": ew_pair,
+          "notes": None}
+  if rng.random() < avg_probability:
+    hand["calls"] = {}
+    hand["ns_score"] = rng.choice(["AVG", "AVG+", "AVG-"])
+    hand["ew_score"] = rng.choice(["AVG", "AVG+", "AVG-"])
+    return hand
+  calls = {"north": _RandomCall(rng), "south": _RandomCall(rng),
+           "east": _RandomCall(rng), "west": _RandomCall(rng)}
+  first_out = rng.choice(["north", "south", "east", "west"])
+  ns_first = first_out in ("north", "south")
+  if rng.random() < 0.1:
+    ns_score, ew_score = (200, 0) if ns_first else (0, 200)
+  else:
+    ns_score = rng.randrange(-25, 130, 5)
+    ew_score = 100 - ns_score
+  for player, call in calls.items():
+    bonus = _CallScore(call) * (1 if player == first_out else -1)
+    if player in ("north", "south"):
+      ns_score += bonus
+    else:
+      ew_score += bonus
+  hand["calls"] = calls
+  hand["ns_score"] = ns_score
+  hand["ew_score"] = ew_score
+  return hand
+
+
+def HandListFromMovement(movement, seed=0):
+  """ Scores every hand of a movement with random valid scores.
+
+  Args:
+    movement: Dict loaded from a file in api/src/movement_files, mapping pair
+      numbers to the list of rounds the pair plays.
+    seed: Seed for the random scores.
+
+  Returns:
+    List of hand dicts, as returned by RandomHand.
+  """
+  rng = random.Random(seed)
+  hand_list = []
+  for pair_no in sorted(movement, key=int):
+    for round in movement[pair_no]:
+      if (not round.get("opponent") or not round.get("hands") or
+          not round.get("position", "").endswith("N")):
+        continue
+      for board_no in round["hands"]:
+        hand_list.append(
+            RandomHand(rng, board_no, int(pair_no), round["opponent"]))
+  return hand_list
+
+
+def HandListFromMovementFile(path, seed=0):
+  """ Same as HandListFromMovement for the movement stored in path. """
+  return HandListFromMovement(json.loads(open(path).read()), seed)
+
+
+def BarometerHandList(no_pairs, no_rounds, no_hands_per_round, seed=0):
+  """ Scores a barometer movement with random valid scores.
+
+  Every table plays the same boards in each round, with the North/South pairs
+  staying put and the East/West pairs moving up one table. Works for any even
+  number of pairs, which makes it suitable for very large fields.
+
+  Args:
+    no_pairs: Even integer. Number of pairs in the tournament.
+    no_rounds: Integer. At most no_pairs / 2.
+    no_hands_per_round: Integer. Number of boards played in each round.
+    seed: Seed for the random scores.
+
+  Returns:
+    List of hand dicts, as returned by RandomHand.
+  """
+  no_tables = no_pairs / 2
+  assert no_pairs % 2 == 0 and no_rounds <= no_tables
+  rng = random.Random(seed)
+  hand_list = []
+  for round in xrange(no_rounds):
+    for table in xrange(no_tables):
+      ns_pair = table + 1
+      ew_pair = no_tables + (table + round) % no_tables + 1
+      for i in xrange(no_hands_per_round):
+        board_no = round * no_hands_per_round + i + 1
+        hand_list.append(RandomHand(rng, board_no, ns_pair, ew_pair))
+  return hand_list
+
+
+def MovementFiles(movement_dir):
+  """ Returns a sorted list of paths of all movement files in movement_dir. """
+  return sorted(os.path.join(movement_dir, f) for f in os.listdir(movement_dir)
+                if f.endswith(".txt"))
@@ -2,7 +2,6 @@
 
 from calculator import Calls
 from calculator import HandResult
-from calculator import OrderBy
 from calculator import Board
 from calculator import Calculate
 from calculator import TeamSummary
@@ -57,6 +56,20 @@ def ReadXlsxInput(filename):
   return (wb, board_list)
 
 
+# Style objects are immutable, so every cell with the same style shares one
+# instance instead of building its own.
+_FILLS = {}
+_FONTS = {}
+_BORDERS = {}
+_ALIGNMENTS = {}
+
+
+def _HorizontalAlignment(horizontal):
+  if horizontal not in _ALIGNMENTS:
+    _ALIGNMENTS[horizontal] = Alignment(horizontal=horizontal)
+  return _ALIGNMENTS[horizontal]
+
+
 def SetNumberFormat(cell, format):
   cell.number_format = format
 
@@ -66,23 +79,30 @@ def SetAlignment(cell, alignment):
 
 
 def SetFill(cell, color):
-  cell.fill = PatternFill(fill_type=fills.FILL_SOLID, start_color=color, 
-                          end_color=color)
+  if color not in _FILLS:
+    _FILLS[color] = PatternFill(fill_type=fills.FILL_SOLID, start_color=color,
+                                end_color=color)
+  cell.fill = _FILLS[color]
 
 
 def SetFont(cell, bold, color=colors.BLACK):
-  cell.font = Font(bold=bold, color=color)
+  if (bold, color) not in _FONTS:
+    _FONTS[(bold, color)] = Font(bold=bold, color=color)
+  cell.font = _FONTS[(bold, color)]
 
 
 def SetBorder(cell, left=False, right=False, top=False, bottom=False):
-  left_border = 'thin' if left else 'none'
-  right_border = 'thin' if right else 'none'
-  top_border = 'thin' if top else 'none'
-  bottom_border = 'thin' if bottom  else 'none'
-  cell.border = Border(left=Side(style=left_border), 
-                       right=Side(style=right_border), 
-                       top=Side(style=top_border), 
-                       bottom=Side(style=bottom_border))
+  key = (bool(left), bool(right), bool(top), bool(bottom))
+  if key not in _BORDERS:
+    left_border = 'thin' if left else 'none'
+    right_border = 'thin' if right else 'none'
+    top_border = 'thin' if top else 'none'
+    bottom_border = 'thin' if bottom  else 'none'
+    _BORDERS[key] = Border(left=Side(style=left_border),
+                           right=Side(style=right_border),
+                           top=Side(style=top_border),
+                           bottom=Side(style=bottom_border))
+  cell.border = _BORDERS[key]
 
 
 def SetColumnStyle(sheet, column, style_fun):
@@ -101,8 +121,8 @@ def SetSheetHeaders(sheet):
   
   for meta_cell in sheet['A1:U1']:
     for cell in meta_cell:
-      cell.font = Font(bold=True)
-      cell.alignment = Alignment(horizontal='center')
+      SetFont(cell, True)
+      SetAlignment(cell, _HorizontalAlignment('center'))
   sheet.freeze_panes = sheet['A2']
 
 
@@ -125,7 +145,7 @@ def SetSectionHeaderStyleAndText(sheet, row_no, col_no, num_cols, text_list):
   for col in xrange(col_no, col_no + num_cols):
     cell = sheet.cell(row=row_no, column=col)
     SetFill(cell, SECTION_HEADER_COLOR)
-    SetAlignment(cell, Alignment(horizontal='center'))
+    SetAlignment(cell, _HorizontalAlignment('center'))
     SetFont(cell, True, color=colors.WHITE)
 
     if len(text_list) > 1:
@@ -162,7 +182,7 @@ def SetDataTableStyle(sheet, start_row, start_col, num_rows, num_cols,
   for row_no in xrange(start_row, start_row + num_rows):
     for col_no in xrange(start_col, num_cols + start_col):
       SetAlignment(sheet.cell(column=col_no, row=row_no),
-                   Alignment(horizontal='right'))
+                   _HorizontalAlignment('right'))
 
   # Fill in right and left borders on all rows but the last one.
   for row in xrange(start_row, start_row + num_rows - 1):
@@ -229,24 +249,24 @@ def WriteXlsxAggressivenessSummaries(max_rounds, scores, sheet):
     SetSectionHeaderStyleAndText(sheet, row_no, 1, len(headers),
                                  ["Team {0}".format(s.team_no)])
     start_row = row_no + 1
-    for key in sorted(s.board_aps.keys()):
+    for key in sorted(s.board_points.keys()):
       row_no += 1
-      row_dict = [key, s.board_aps[key]]
+      row_dict = [key, s.board_points[key].aps]
       for col_no in range(1, len(headers) + 1):
         sheet.cell(column=col_no, row=row_no, value = row_dict[col_no - 1])
     # This is kind of a hack, but back calculate how much was added from the 
     # sit-out bonus.
-    if len(s.board_aps) < max_rounds:
+    if len(s.board_points) < max_rounds:
       row_no += 1
       row_dict = [SIT_OUT_BONUS_TEXT, 
-                  s.aps - s.aps * len(s.board_aps) / max_rounds]
+                  s.aps - s.aps * len(s.board_points) / max_rounds]
       for col_no in range(1, len(headers) + 1):
         sheet.cell(column=col_no, row=row_no, value = row_dict[col_no - 1])
         SetAlignment(sheet.cell(column=col_no, row=row_no),
-                     Alignment(horizontal='right'))
+                     _HorizontalAlignment('right'))
     
     SetDataTableStyle(sheet, start_row, 1, 
-                      len(s.board_aps) + 1 if len(s.board_aps) < max_rounds else len(s.board_aps),
+                      len(s.board_points) + 1 if len(s.board_points) < max_rounds else len(s.board_points),
                       len(headers))
     # Space before the next set of scores.
     sheet.append([])
@@ -305,11 +325,12 @@ def WriteXlsxTeamSummaries(max_rounds, scores, sheet):
         ["Place {1}. Team {0}: MPs {2:.1f} RPs {3:.2f} LPs {4:.2f}".format(
             s.team_no, s.mp_rank, s.mps, s.rps, s.lps)])
     start_row = row_no + 1
-    keys = sorted(s.board_mps.keys())
+    keys = sorted(s.board_points.keys())
     for key in keys:
       row_no+= 1
-      row_dict = {BOARD_NO_TEXT: key, MPS_TEXT: s.board_mps[key],
-                  RPS_TEXT: s.board_rps[key], LPS_TEXT: s.board_lps[key]}
+      points = s.board_points[key]
+      row_dict = {BOARD_NO_TEXT: key, MPS_TEXT: points.mps,
+                  RPS_TEXT: points.rps, LPS_TEXT: points.lps}
       for col_no in xrange(1, len(headers) + 1):
         sheet.cell(column=col_no, row=row_no, value=row_dict[headers[col_no - 1]])
 
@@ -323,7 +344,7 @@ def WriteXlsxTeamSummaries(max_rounds, scores, sheet):
         sheet.cell(column=col_no, row=row_no,
                    value=row_dict[headers[col_no - 1]])
         SetAlignment(sheet.cell(column=col_no, row=row_no),
-                     Alignment(horizontal='right'))
+                     _HorizontalAlignment('right'))
     SetDataTableStyle(sheet, start_row, 1,
                       len(keys) + 1 if len(keys) < max_rounds else len(keys),
                       len(headers))
@@ -364,6 +385,57 @@ def WriteXlsxTeamSummaries(max_rounds, scores, sheet):
   sheet.row_dimensions[1].height = 15
 
 
+def WriteXlsxSectionSummaries(mp_scores, sections, sheet):
+  """ Writes the standings of every section to sheet.
+
+  Pairs are ranked within their section by the match points they scored
+  against the whole field.
+
+  Args:
+    mp_scores: TeamSummaries of all teams in decreasing order of MPs.
+    sections: List of (section name, list of team numbers) tuples.
+    sheet: sheet in which the summaries will be written.
+  """
+
+  sheet.title = 'Summary by Section'
+
+  SECTION_PAIR_TEXT = "Section Pair"
+  OVERALL_RANK_TEXT = "Overall Rank"
+  headers = [RANK_TEXT, TEAM_TEXT, SECTION_PAIR_TEXT, OVERALL_RANK_TEXT,
+             MPS_TEXT, RPS_TEXT, LPS_TEXT]
+  sheet.append(headers)
+  SetSheetHeaders(sheet)
+
+  row_no = 1
+  for name, team_nos in sections:
+    row_no += 1
+    SetSectionHeaderStyleAndText(sheet, row_no, 1, len(headers),
+                                 ["Section {0}".format(name)])
+    start_row = row_no + 1
+    section_scores = [s for s in mp_scores if s.team_no in team_nos]
+    for rank, s in enumerate(section_scores):
+      row_no += 1
+      row_dict = {RANK_TEXT: rank + 1, TEAM_TEXT: s.team_no,
+                  SECTION_PAIR_TEXT: "{0}{1}".format(
+                      name, team_nos.index(s.team_no) + 1),
+                  OVERALL_RANK_TEXT: s.mp_rank, MPS_TEXT: s.mps,
+                  RPS_TEXT: s.rps, LPS_TEXT: s.lps}
+      for col_no in xrange(1, len(headers) + 1):
+        sheet.cell(column=col_no, row=row_no,
+                   value=row_dict[headers[col_no - 1]])
+    if section_scores:
+      SetDataTableStyle(sheet, start_row, 1, len(section_scores), len(headers))
+    row_no += 1
+    sheet.append([])
+
+  SetColumnStyle(sheet, 'E', lambda x: SetNumberFormat(x, '0.0'))
+  SetColumnStyle(sheet, 'F', lambda x: SetNumberFormat(x, '0.00'))
+  SetColumnStyle(sheet, 'G', lambda x: SetNumberFormat(x, '0'))
+  sheet.column_dimensions['C'].width = 13
+  sheet.column_dimensions['D'].width = 13
+  sheet.row_dimensions[1].height = 15
+
+
 def WriteXlsxBoardSummaries(board_list, sheet):
   """ Writes a summary of play organized by board.
   
@@ -438,7 +510,7 @@ def WriteHandNames(name_list, sheet):
   
   for row_no in xrange(2, len(name_list) + 2):
     cell = sheet.cell(row=row_no, column=1)
-    SetAlignment(cell, Alignment(horizontal='right'))
+    SetAlignment(cell, _HorizontalAlignment('right'))
   
 
 def WriteXlsxRawScores(board_list, sheet):
@@ -496,7 +568,7 @@ def CopySheet(from_sheet, to_sheet):
 
 
 def WriteResultsToXlsx(max_rounds, mp_scores, ap_scores, board_list,
-                       name_list=None, input_wb=None):
+                       name_list=None, input_wb=None, sections=None):
   """ Creates an Xlx workbook with all the information about a tournament.
 
       Args: 
@@ -511,17 +583,20 @@ def WriteResultsToXlsx(max_rounds, mp_scores, ap_scores, board_list,
         input_wb: The input workbook as it was read in. Used to copy raw hand
           and team details into the output workbook. If None, raw scores and 
           team details will not be present in the output.
+        sections: List of (section name, list of team numbers) tuples. If
+          there is more than one section, the standings of each are written
+          to their own sheet.
       Returns:
         formatted workbook
   """
 
   wb = Workbook()
-  OrderBy(mp_scores, "MP")
   WriteXlsxTeamSummaries(max_rounds, mp_scores, wb.worksheets[0])
+  if sections and len(sections) > 1:
+    WriteXlsxSectionSummaries(mp_scores, sections, wb.create_sheet())
   board_sheet = wb.create_sheet()
   WriteXlsxBoardSummaries(board_list, board_sheet)
   aggro_sheet = wb.create_sheet()
-  OrderBy(ap_scores, "AP")
   WriteXlsxAggressivenessSummaries(max_rounds, ap_scores, aggro_sheet)
   raw_scores_sheet = wb.create_sheet()
   WriteXlsxRawScores(board_list, raw_scores_sheet)
@@ -541,3 +616,20 @@ def OutputWorkbookAsBytesIO(wb):
   """ Writes the Xlx workbook to a BytesIO stream. """
   return BytesIO(save_virtual_workbook(wb))
 
+
+def Preload():
+  """ Builds every style object the results workbook uses and writes an empty
+  workbook once, so that the first results request does not pay for either.
+  """
+  cell = Workbook().active.cell(row=1, column=1)
+  for bold in [True, False]:
+    SetFont(cell, bold)
+  SetFont(cell, True, color=colors.WHITE)
+  for color in [SECTION_HEADER_COLOR, SUMMARY_TABLE_COLOR]:
+    SetFill(cell, color)
+  for i in xrange(16):
+    SetBorder(cell, i & 1, i & 2, i & 4, i & 8)
+  for horizontal in ['center', 'right']:
+    _HorizontalAlignment(horizontal)
+  OutputWorkbookAsBytesIO(Workbook())
+